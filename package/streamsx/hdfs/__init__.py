@@ -30,6 +30,26 @@ The mandatory JSON elements are "user", "password" and "webhdfs"::
 If you are using HDFS server(s) different to the "Analytics Engine" service, 
 then you can provide the  *configuration file* (``hdfs-site.xml`` or ``core-site.xml``) to configure the connection.
 
+If the configuration file defines HA nameservices (``dfs.nameservices``, ``dfs.ha.namenodes.<nameservice>``),
+then a copy of the file with fast namenode failover settings is added to the application bundle.
+The hedging proxy provider probes all namenodes of a nameservice for the active one and the IPC client
+gives up on an unreachable namenode after a short connect timeout, so that a failover takes seconds instead of minutes.
+Settings that are already defined in the configuration file are not changed.
+
+Consistent region
++++++++++++++++++
+
+The scan operator can start a consistent region to process the files *exactly once*.
+The operators in the region checkpoint their state: the scan state and the written files. The reader joins the region and reads a file again from the beginning after a reset.
+After a failure the region is reset to the last checkpoint, so that only the tuples after this checkpoint are processed again.
+Set the ``tempFile`` parameter of :py:class:`HdfsFileSink` in a consistent region, so that files are written as temporary file and renamed to the final name when they are complete::
+
+    from streamsx.topology.state import ConsistentRegionConfig
+
+    scanned = hdfs.scan(topo, credentials=credentials, directory='/sample', consistent_region_config=ConsistentRegionConfig.periodic(30))
+    lines = hdfs.read(scanned, credentials=credentials)
+    lines.for_each(hdfs.HdfsFileSink(credentials=credentials, file='/result/lines%FILENUM.txt', tempFile='/result/lines.tmp', tuplesPerFile=100000))
+
 Sample
 ++++++
 
@@ -67,5 +87,5 @@ a file to HDFS. Scan for created file on HDFS and read the content::
 
 __version__='1.5.9'
 
-__all__ = ['HdfsDirectoryScan', 'HdfsFileSink', 'HdfsFileSource', 'HdfsFileCopy', 'download_toolkit', 'configure_connection', 'scan', 'read', 'write']
-from streamsx.hdfs._hdfs import download_toolkit, configure_connection, scan, read, write, copy, HdfsDirectoryScan, HdfsFileSink, HdfsFileSource, HdfsFileCopy
+__all__ = ['HdfsDirectoryScan', 'HdfsFileSink', 'HdfsFileSource', 'HdfsFileCopy', 'HdfsCompactor', 'ContainerRecordSchema', 'DirectoryScanMetadataSchema', 'FileStatisticsSchema', 'download_toolkit', 'configure_connection', 'scan', 'read', 'write']
+from streamsx.hdfs._hdfs import download_toolkit, configure_connection, scan, read, write, copy, HdfsDirectoryScan, HdfsFileSink, HdfsFileSource, HdfsFileCopy, HdfsCompactor, ContainerRecordSchema, DirectoryScanMetadataSchema, FileStatisticsSchema
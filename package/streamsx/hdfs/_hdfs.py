@@ -2,9 +2,31 @@
 # Licensed Materials - Property of IBM
 # Copyright IBM Corp. 2019
 
+import atexit
+import base64
+import collections
 import datetime
+import hashlib
+import heapq
+import http.client
+import io
 import json
-from urllib.parse import urlparse
+import logging
+import math
+import os
+import pickle
+import random
+import re
+import shutil
+import struct
+import uuid
+import zlib
+import tempfile
+import threading
+import time
+import urllib.error
+import xml.etree.ElementTree as ET
+from urllib.parse import urlencode, urlparse, parse_qsl, quote
 from enum import Enum
 
 import streamsx.spl.op
@@ -12,18 +34,30 @@ import streamsx.spl.types
 from streamsx.topology.schema import CommonSchema, StreamSchema
 from streamsx.toolkits import download_toolkit
 import streamsx.topology.composite
+import streamsx.topology.state
 
 
 
 
 _TOOLKIT_NAME = 'com.ibm.streamsx.hdfs'
 
+trace = logging.getLogger('streamsx.hdfs')
+
 FileInfoSchema = StreamSchema('tuple<rstring fileName, uint64 fileSize>')
 """Structured schema of the file write response tuple. This schema is the output schema of the write method.
 
 ``'tuple<rstring fileName, uint64 fileSize>'``
 """
 
+FileStatisticsSchema = StreamSchema('tuple<rstring fileName, uint64 fileSize, uint64 tupleCount, int64 firstTupleTime, int64 lastTupleTime, float64 writeDuration, float64 bytesPerSecond, uint32 checksum>')
+"""Structured schema of the file write response tuple with the write statistics of the file. This schema can be used as output schema of the write method with ``commitOnPunct``.
+
+The times of the first and the last tuple are the arrival times in milliseconds since the epoch, the write duration is the time of the write requests in seconds
+and the checksum is the CRC-32 of the file content, so that the files can be planned for compaction and indexing without reading them again.
+
+``'tuple<rstring fileName, uint64 fileSize, uint64 tupleCount, int64 firstTupleTime, int64 lastTupleTime, float64 writeDuration, float64 bytesPerSecond, uint32 checksum>'``
+"""
+
 FileCopySchema = StreamSchema('tuple<rstring message, uint64 elapsedTime>')
 """Structured schema of the file copy response tuple. This schema is the output schema of the copy method.
 
@@ -36,6 +70,18 @@ DirectoryScanSchema = StreamSchema('tuple<rstring fileName>')
 ``'tuple<rstring fileName>'``
 """
 
+DirectoryScanMetadataSchema = StreamSchema('tuple<rstring fileName, uint64 fileSize, int64 modificationTime, int32 replication, uint64 blockSize, rstring owner>')
+"""Structured schema of the directory scan response tuple with the file metadata of the listing. This schema can be used as output schema of HdfsDirectoryScan.
+
+``'tuple<rstring fileName, uint64 fileSize, int64 modificationTime, int32 replication, uint64 blockSize, rstring owner>'``
+"""
+
+ContainerRecordSchema = StreamSchema('tuple<rstring key, blob value>')
+"""Structured schema of the records read from container files. This schema is the output schema of HdfsFileSource in container mode.
+
+``'tuple<rstring key, blob value>'``
+"""
+
 def _add_toolkit_dependency(topo):
     # IMPORTANT: Dependency of this python wrapper to a specific toolkit version
     # This is important when toolkit is not set with streamsx.spl.toolkit.add_toolkit (selecting toolkit from remote build service)
@@ -82,11 +128,12 @@ def _setCredentials(LocalCredentials, topology):
          if ('xml' in LocalCredentials):
              try:
                   with open(LocalCredentials):
-                      topology.add_file_dependency(LocalCredentials, 'etc')
-                      configPath = 'etc'
-                      credentials = None
+                      pass
              except IOError:
                 raise ValueError(LocalCredentials)
+             configFile, hdfsUri = _configure_ha_failover(LocalCredentials)
+             configPath = _add_config_file(topology, configFile)
+             credentials = None
          else:
              if isinstance(LocalCredentials, dict):
                  hdfsUri, hdfsUser, hdfsPassword = _read_service_credentials(LocalCredentials)
@@ -97,6 +144,151 @@ def _setCredentials(LocalCredentials, topology):
 
 
 
+# Client settings applied to HA nameservices, unless already set in the configuration file.
+# The hedging proxy provider probes all namenodes concurrently and sticks to the active one,
+# the IPC settings replace the default connect timeout of 20 seconds with 45 retries on timeouts
+# that stall a client for minutes before it fails over to the standby namenode.
+_HA_FAILOVER_PROPERTIES = {
+    'dfs.client.failover.proxy.provider.{nameservice}': 'org.apache.hadoop.hdfs.server.namenode.ha.RequestHedgingProxyProvider',
+    'dfs.client.failover.max.attempts': '15',
+    'dfs.client.failover.sleep.base.millis': '100',
+    'dfs.client.failover.sleep.max.millis': '2000',
+    'dfs.client.failover.connection.retries': '0',
+    'dfs.client.failover.connection.retries.on.timeouts': '0',
+    'ipc.client.connect.timeout': '2000',
+    'ipc.client.connect.max.retries': '1',
+    'ipc.client.connect.max.retries.on.timeouts': '0',
+}
+
+
+def _split_list(value):
+    if value is None:
+        return []
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+def _read_hadoop_config(config_file):
+    """Returns the properties of a Hadoop configuration file (``core-site.xml``, ``hdfs-site.xml``) as dict.
+    """
+    try:
+        root = ET.parse(config_file).getroot()
+    except ET.ParseError:
+        raise ValueError("Invalid Hadoop configuration file: " + config_file)
+    properties = {}
+    for prop in root.findall('property'):
+        name = prop.findtext('name')
+        if name is not None:
+            properties[name.strip()] = (prop.findtext('value') or '').strip()
+    return properties
+
+# temporary directories of the configuration files written by _write_hadoop_config
+_generated_config_dirs = set()
+
+def _add_config_file(topology, config_file):
+    """Adds a Hadoop configuration file to the etc directory of the application bundle and returns the configPath.
+
+    A file written by :py:func:`_write_hadoop_config` is added with its own directory, because the files of the operators
+    have the same name and the settings of each operator must not replace the file of another operator.
+    """
+    config_dir = os.path.dirname(config_file)
+    if config_dir in _generated_config_dirs:
+        return topology.add_file_dependency(config_dir, 'etc')
+    topology.add_file_dependency(config_file, 'etc')
+    return 'etc'
+
+def _write_hadoop_config(config_file, properties):
+    """Writes a copy of the Hadoop configuration file with additional properties.
+
+    The copy is written to a new temporary directory and keeps the name of the original file,
+    because the toolkit operators look for ``core-site.xml`` and ``hdfs-site.xml`` in the ``configPath`` directory.
+    The file is copied to the application bundle when the topology is submitted, so the directory is removed when the Python process exits.
+    Properties that are defined in the file already are overridden, because the last definition of a property is used.
+    If config_file is ``None``, then a new ``core-site.xml`` with the properties is written.
+    Returns the path of the copy.
+    """
+    if config_file is None:
+        config_file = 'core-site.xml'
+        tree = ET.ElementTree(ET.Element('configuration'))
+    else:
+        tree = ET.parse(config_file)
+    root = tree.getroot()
+    for name, value in properties.items():
+        prop = ET.SubElement(root, 'property')
+        ET.SubElement(prop, 'name').text = name
+        ET.SubElement(prop, 'value').text = str(value)
+    config_dir = tempfile.mkdtemp(prefix='streamsx_hdfs_')
+    atexit.register(shutil.rmtree, config_dir, True)
+    _generated_config_dirs.add(config_dir)
+    result = os.path.join(config_dir, os.path.basename(config_file))
+    tree.write(result, encoding='UTF-8', xml_declaration=True)
+    return result
+
+def _read_ha_nameservices(properties):
+    """Returns the HA nameservices defined in the Hadoop configuration properties.
+
+    Result is a dict with the nameservice ID as key and the list of ``(host, port)`` RPC addresses of its namenodes as value.
+    Nameservices without ``dfs.ha.namenodes.<nameservice>`` are not HA enabled and are ignored.
+    """
+    nameservices = {}
+    for nameservice in _split_list(properties.get('dfs.nameservices')):
+        namenode_ids = _split_list(properties.get('dfs.ha.namenodes.' + nameservice))
+        if not namenode_ids:
+            continue
+        namenodes = []
+        for namenode_id in namenode_ids:
+            key = 'dfs.namenode.rpc-address.' + nameservice + '.' + namenode_id
+            address = properties.get(key)
+            if not address:
+                raise ValueError("Missing HA namenode address: " + key)
+            host, _, port = address.rpartition(':')
+            if not host or not port.isdigit():
+                raise ValueError("Invalid HA namenode address: " + key + "=" + address)
+            namenodes.append((host, int(port)))
+        nameservices[nameservice] = namenodes
+    return nameservices
+
+def _configure_ha_failover(config_file):
+    """Adds the fast failover settings to a Hadoop configuration file that defines HA nameservices.
+
+    Returns the configuration file to be added to the application bundle and the HDFS URI of the nameservice.
+    The URI is ``None`` unless the file defines exactly one HA nameservice and no ``fs.defaultFS``.
+    """
+    properties = _read_hadoop_config(config_file)
+    nameservices = _read_ha_nameservices(properties)
+    if not nameservices:
+        return config_file, None
+
+    failover_properties = {}
+    for nameservice in nameservices:
+        for name, value in _HA_FAILOVER_PROPERTIES.items():
+            name = name.format(nameservice=nameservice)
+            if name not in properties:
+                failover_properties[name] = value
+
+    hdfs_uri = None
+    if len(nameservices) == 1 and 'fs.defaultFS' not in properties:
+        hdfs_uri = 'hdfs://' + next(iter(nameservices))
+
+    if failover_properties:
+        config_file = _write_hadoop_config(config_file, failover_properties)
+    return config_file, hdfs_uri
+
+
+# default of dfs.blocksize
+_DEFAULT_BLOCK_SIZE = 128 * 1024 * 1024
+
+def _output_file_properties(block_size=None, replication=None):
+    # client settings for the block size and the replication of the files created by the sink
+    properties = {}
+    if block_size is not None:
+        properties['dfs.blocksize'] = str(int(block_size))
+    if replication is not None:
+        properties['dfs.replication'] = str(int(replication))
+    return properties
+
+def _add_hadoop_config(topology, properties):
+    # adds a core-site.xml with the properties in its own directory below the etc directory of the application bundle, returns the configPath
+    return _add_config_file(topology, _write_hadoop_config(None, properties))
+
    
 def _check_time_param(time_value, parameter_name):
     if isinstance(time_value, datetime.timedelta):
@@ -117,6 +309,63 @@ def _is_a_valid_json(credentials):
     except:
         pass
         return 0
+
+def _add_vm_args(vmArg, args):
+    """Appends JVM arguments to the value of the vmArg parameter.
+
+    System properties that are defined in vmArg already are not overridden.
+    """
+    if vmArg is None:
+        result = []
+    elif isinstance(vmArg, str):
+        result = [vmArg]
+    else:
+        result = list(vmArg)
+    defined = [arg.split('=')[0] for arg in result]
+    for arg in args:
+        if arg.split('=')[0] not in defined:
+            result.append(arg)
+    return result
+
+def _hdfs_uri_of(hdfsUri, credentials):
+    # returns the HDFS URI given by the hdfsUri parameter or by the credentials JSON string
+    if hdfsUri is not None:
+        return hdfsUri
+    if credentials is not None and _is_a_valid_json(credentials):
+        connection = json.loads(credentials)
+        if isinstance(connection, dict):
+            return _read_service_credentials(connection)[0]
+    return None
+
+def _is_webhdfs_uri(uri):
+    return urlparse(uri).scheme in ('webhdfs', 'swebhdfs', 'http', 'https')
+
+def _keep_alive_vm_args(max_connections=None):
+    """Returns the JVM arguments for the size of the HTTP keep-alive connection cache used by the WEBHDFS client.
+
+    Keep-alive is enabled in the JVM by default, this only tunes the number of idle connections per host that are cached (default 5).
+    The redirect of each OPEN and CREATE request from the namenode (or gateway) to a datanode is still issued and followed by the toolkit,
+    so a file still takes two round trips, a larger cache only avoids that connections are closed when more than 5 are idle.
+    The Python operators that read via WEBHDFS cache the redirects of their reads, see :py:class:`_WebHdfsClient`.
+    """
+    args = []
+    if max_connections is not None:
+        args.append('-Dhttp.maxConnections=' + str(int(max_connections)))
+    return args
+
+def _connection_vm_args(vmArg, hdfsUri, credentials, max_connections=None):
+    """Returns the vmArg parameter value with the WEBHDFS connection cache settings.
+
+    The settings are applied when the HDFS URI is a WEBHDFS or HTTPS URI (for example a Knox gateway)
+    or when the URI is not known at build time, for example when it is read from an application configuration.
+    A TLS handshake is only saved when an idle connection is reused, the JVM caches TLS sessions by default.
+    """
+    if max_connections is None:
+        return vmArg
+    uri = _hdfs_uri_of(hdfsUri, credentials)
+    if uri and not _is_webhdfs_uri(uri):
+        return vmArg
+    return _add_vm_args(vmArg, _keep_alive_vm_args(max_connections))
            
 class CopyDirection(Enum):
     """Defines File Copy directions for HDFS2FileCopy.
@@ -227,7 +476,7 @@ def download_toolkit(url=None, target_dir=None):
 
     
 
-def scan(topology, credentials, directory, pattern=None, init_delay=None, name=None):
+def scan(topology, credentials, directory, pattern=None, init_delay=None, consistent_region_config=None, name=None):
     """Scans a Hadoop Distributed File System directory for new or modified files.
 
     Repeatedly scans a HDFS directory and writes the names of new or modified files that are found in the directory to the output stream.
@@ -238,6 +487,7 @@ def scan(topology, credentials, directory, pattern=None, init_delay=None, name=N
         directory(str): The directory to be scanned. Relative path is relative to the '/user/userid/' directory. 
         pattern(str): Limits the file names that are listed to the names that match the specified regular expression.
         init_delay(int|float|datetime.timedelta): The time to wait in seconds before the operator scans the directory for the first time. If not set, then the default value is 0.
+        consistent_region_config(ConsistentRegionConfig): Optional configuration of the consistent region that is started by the scan operator, see :py:class:`streamsx.topology.state.ConsistentRegionConfig`.
         schema(Schema): Optional output stream schema. Default is ``CommonSchema.String``. Alternative a structured streams schema with a single attribute of type ``rstring`` is supported.  
         name(str): Source name in the Streams context, defaults to a generated name.
 
@@ -250,6 +500,8 @@ def scan(topology, credentials, directory, pattern=None, init_delay=None, name=N
     if init_delay is not None:
         _op.params['initDelay'] = streamsx.spl.types.float64(_check_time_param(init_delay, 'init_delay'))
 
+    if consistent_region_config is not None:
+        return _set_consistent(_op.outputs[0], consistent_region_config)
     return _op.outputs[0]
 
 def scanComposite(topology, credentials, directory, pattern=None, init_delay=None, name=None):
@@ -283,6 +535,8 @@ def read(stream, credentials, schema=CommonSchema.String, name=None):
     """Reads files from a Hadoop Distributed File System.
 
     Filenames of file to be read are part of the input stream.
+    If the input stream is part of a consistent region, for example started by :py:func:`scan`, then the reader joins this region.
+    After a reset of the region a file is read again from the beginning, the reader does not resume at an offset.
 
     Args:
         stream(Stream): Stream of tuples containing file names to be read. Supports ``CommonSchema.String`` as input. Alternative a structured streams schema with a single attribute of type ``rstring`` is supported.
@@ -296,15 +550,16 @@ def read(stream, credentials, schema=CommonSchema.String, name=None):
 
     credentials, hdfsUri, hdfsUser, hdfsPassword, configPath = _setCredentials(credentials, stream.topology)
     _op = _HDFS2FileSource(stream, configPath=configPath, credentials=credentials, hdfsUri=hdfsUri, hdfsUser=hdfsUser,  hdfsPassword=hdfsPassword, schema=schema, name=name)
-
     return _op.outputs[0]
 
 
-def write(stream, credentials, file=None, fileAttributeName=None, schema=None, timePerFile=None, tuplesPerFile=None, bytesPerFile=None, name=None):
+def write(stream, credentials, file=None, fileAttributeName=None, schema=None, timePerFile=None, tuplesPerFile=None, bytesPerFile=None, minBytesPerFile=None, commitOnPunct=False, name=None):
     """Writes files to a Hadoop Distributed File System.
 
-    When writing to a file, that exists already on HDFS with the same name, then this file is overwritten.
+    When writing to a file, that exists already on HDFS with the same name, then this file is overwritten. Use the ``append`` parameter of :py:class:`HdfsFileSink` to continue with the existing files after a restart.
     Per default the file is closed when window punctuation mark is received. Different close modes can be specified with the parameters: ``timePerFile``, ``tuplesPerFile``, ``bytesPerFile``
+    If more than one of these parameters is specified, then the file is closed when the first of the limits is reached, for example to keep the files near the HDFS block size under high load and to limit the latency when the load is low.
+    With ``commitOnPunct`` the window punctuation commits the tuples of the window to a file that is kept for the following windows, so that frequent windows do not create a file per window.
 
     Example with input stream of type ``CommonSchema.String``::
 
@@ -324,25 +579,50 @@ def write(stream, credentials, file=None, fileAttributeName=None, schema=None, t
           * %TIME The time when the file is created. The time format is yyyyMMdd_HHmmss.
           
           Important: If the %FILENUM or %TIME specification is not included, the file is overwritten every time a new file is created.
-        timePerFile(int|float|datetime.timedelta): Specifies the approximate time, in seconds, after which the current output file is closed and a new file is opened for writing. The ``bytesPerFile``, ``timePerFile`` and ``tuplesPerFile`` parameters are mutually exclusive.
-        tuplesPerFile(int): The maximum number of tuples that can be received for each output file. When the specified number of tuples are received, the current output file is closed and a new file is opened for writing. The ``bytesPerFile``, ``timePerFile`` and ``tuplesPerFile`` parameters are mutually exclusive. 
-        bytesPerFile(int): Approximate size of the output file, in bytes. When the file size exceeds the specified number of bytes, the current output file is closed and a new file is opened for writing. The ``bytesPerFile``, ``timePerFile`` and ``tuplesPerFile`` parameters are mutually exclusive.
+        timePerFile(int|float|datetime.timedelta): Specifies the approximate time, in seconds, after which the current output file is closed and a new file is opened for writing. If more than one of the ``bytesPerFile``, ``timePerFile`` and ``tuplesPerFile`` parameters is specified, then the file is closed when the first limit is reached.
+        tuplesPerFile(int): The maximum number of tuples that can be received for each output file. When the specified number of tuples are received, the current output file is closed and a new file is opened for writing. If more than one of the ``bytesPerFile``, ``timePerFile`` and ``tuplesPerFile`` parameters is specified, then the file is closed when the first limit is reached.
+        bytesPerFile(int): Approximate size of the output file, in bytes. When the file size exceeds the specified number of bytes, the current output file is closed and a new file is opened for writing. If more than one of the ``bytesPerFile``, ``timePerFile`` and ``tuplesPerFile`` parameters is specified, then the file is closed when the first limit is reached.
+        minBytesPerFile(int): Minimum size of the output file, in bytes. The file is not closed by the ``timePerFile`` and ``tuplesPerFile`` limits before it reaches this size. If this parameter is specified, then the time is checked when a tuple is received, so that a file remains open without tuples.
+        schema(StreamSchema): Output schema :py:const:`~streamsx.hdfs.FileStatisticsSchema` with ``commitOnPunct``. Otherwise the output schema is :py:const:`~streamsx.hdfs.FileInfoSchema` and other values are ignored.
+        commitOnPunct(bool): If ``True``, then each window punctuation commits the tuples of the window to the current file instead of closing the file. The offset, length and number of tuples of each window are recorded as JSON line in the manifest file ``<file>.manifest``, and an output tuple with the file name and the committed file size, or the statistics of the committed part of the file, is submitted per window. A new file is started when the current file has reached the ``timePerFile``, ``tuplesPerFile`` or ``bytesPerFile`` limit at the end of a window. This mode writes via WEBHDFS and requires WEBHDFS credentials, it cannot be used with ``fileAttributeName`` and ``minBytesPerFile``.
         name(str): Sink name in the Streams context, defaults to a generated name.
 
     Returns:
-        Output Stream with schema :py:const:`~streamsx.hdfs.FileInfoSchema`.
+        Output Stream with schema :py:const:`~streamsx.hdfs.FileInfoSchema` or :py:const:`~streamsx.hdfs.FileStatisticsSchema`.
     """
-    # check bytesPerFile, timePerFile and tuplesPerFile parameters
-    if (timePerFile is not None and tuplesPerFile is not None) or (tuplesPerFile is not None and bytesPerFile is not None) or (timePerFile is not None and bytesPerFile is not None):
-        raise ValueError("The parameters are mutually exclusive: bytesPerFile, timePerFile, tuplesPerFile")
+    statistics = schema == FileStatisticsSchema
+    if statistics and not commitOnPunct:
+        raise ValueError("The schema FileStatisticsSchema requires commitOnPunct")
+    if timePerFile is not None:
+        timePerFile = _check_time_param(timePerFile, 'timePerFile')
+    if commitOnPunct:
+        if fileAttributeName is not None or minBytesPerFile is not None:
+            raise ValueError("The parameters fileAttributeName and minBytesPerFile cannot be used with commitOnPunct")
+        credentials, hdfsUri, hdfsUser, hdfsPassword, configPath = _setCredentials(credentials, stream.topology)
+        client = _webhdfs_client(hdfsUri, hdfsUser, hdfsPassword, credentials)
+        _add_python_dependency(stream.topology)
+        writer = _PunctCommitWriter(client, file, bytes_per_file=bytesPerFile, time_per_file=timePerFile, tuples_per_file=tuplesPerFile, statistics=statistics)
+        if statistics:
+            stream = stream.map(_arrival_time, name=name+'Arrival' if name else None)
+        committed = stream.batch('punct').aggregate(writer, name=name)
+        return committed.map(schema=schema if statistics else FileInfoSchema, name=name+'Info' if name else None)
+
+    roll_policy = _is_roll_policy(bytesPerFile, timePerFile, tuplesPerFile, minBytesPerFile)
+    if roll_policy:
+        # the bytesPerFile, timePerFile and tuplesPerFile parameters are mutually exclusive in the operator
+        _add_python_dependency(stream.topology)
+        stream = stream.punctor(_FileRollPolicy(bytesPerFile, timePerFile, tuplesPerFile, minBytesPerFile), before=False, name=name+'Roll' if name else None)
+        timePerFile = timePerFile if minBytesPerFile is None else None
+        tuplesPerFile = None
+        bytesPerFile = None
 
     credentials, hdfsUri, hdfsUser, hdfsPassword, configPath = _setCredentials(credentials, stream.topology)
     _op = _HDFS2FileSink(stream, configPath=configPath, credentials=credentials, hdfsUri=hdfsUri, hdfsUser=hdfsUser,  hdfsPassword=hdfsPassword, file=file, fileAttributeName=fileAttributeName, schema=FileInfoSchema, name=name)
 
-    if timePerFile is None and tuplesPerFile is None and bytesPerFile is None:
+    if (timePerFile is None and tuplesPerFile is None and bytesPerFile is None) or roll_policy:
         _op.params['closeOnPunct'] = _op.expression('true')
     if timePerFile is not None:
-        _op.params['timePerFile'] = streamsx.spl.types.float64(_check_time_param(timePerFile, 'timePerFile'))
+        _op.params['timePerFile'] = streamsx.spl.types.float64(timePerFile)
     if tuplesPerFile is not None:
         _op.params['tuplesPerFile'] = streamsx.spl.types.int64(tuplesPerFile)
     if bytesPerFile is not None:
@@ -376,6 +656,1422 @@ def copy(stream, credentials, direction, hdfsFile=None, hdfsFileAttrName=None, l
     return _op.outputs[0]
 
 
+def _set_consistent(stream, consistent_region_config):
+    # starts the consistent region at the given stream
+    if not isinstance(consistent_region_config, streamsx.topology.state.ConsistentRegionConfig):
+        raise TypeError(consistent_region_config)
+    return stream.set_consistent(consistent_region_config)
+
+def _add_python_dependency(topology):
+    # the Python callables of this package are executed in the Streams runtime
+    topology.add_pip_package('streamsx.hdfs')
+
+
+# Container file format: each container starts with the magic header, followed by records.
+# A record is the key length (big-endian int32), the UTF-8 encoded key, the value length (big-endian int32) and the value,
+# like the uncompressed records of a Hadoop SequenceFile.
+_CONTAINER_MAGIC = b'SXHC\x01'
+
+_ContainerPackSchema = StreamSchema('tuple<blob record, rstring containerName, rstring key, uint64 offset, uint64 length, boolean blockStart>')
+
+def _container_record(key, value):
+    key = key.encode('utf-8')
+    return struct.pack('>i', len(key)) + key + struct.pack('>i', len(value)) + value
+
+class _ContainerWriter(object):
+    """Packs tuples into records of container files.
+
+    The container name of the output tuple changes when the container size is exceeded,
+    so that the sink closes the current container and opens the next one.
+
+    The records of a container are indexed in blocks of ``index_interval`` records.
+    Each output tuple carries the key, offset and length of its record, and ``blockStart`` is ``True``
+    for the first record of a block (except the first record of the stream), that is also the first record of each container.
+    The index entries are aggregated from these tuples by :py:func:`_container_index_entry` in windows that end before each block start,
+    so that the last block is indexed on final punctuation, too.
+    """
+    def __init__(self, file, container_size, key_attribute=None, index_interval=1):
+        self.file = file
+        self.container_size = container_size
+        self.key_attribute = key_attribute
+        self.index_interval = index_interval
+        self._container_num = -1
+        self._offset = 0
+        self._block_records = 0
+
+    def __call__(self, tuple_):
+        key = None
+        value = tuple_
+        if isinstance(tuple_, dict):
+            if self.key_attribute is not None:
+                key = str(tuple_[self.key_attribute])
+            value = [v for k, v in tuple_.items() if k != self.key_attribute][0]
+        if key is None:
+            key = uuid.uuid4().hex
+        if isinstance(value, str):
+            value = value.encode('utf-8')
+        record = _container_record(key, bytes(value))
+
+        block_start = self._block_records >= self.index_interval
+        if self._container_num < 0 or (self._offset > len(_CONTAINER_MAGIC) and self._offset + len(record) > self.container_size):
+            block_start = self._container_num >= 0
+            self._container_num += 1
+            self._offset = len(_CONTAINER_MAGIC)
+            data = _CONTAINER_MAGIC + record
+        else:
+            data = record
+        if block_start:
+            self._block_records = 0
+        container_name = self.file.replace('%FILENUM', str(self._container_num))
+        offset = self._offset
+        self._offset += len(record)
+        self._block_records += 1
+        return {'record': data, 'containerName': container_name, 'key': key, 'offset': offset, 'length': len(record), 'blockStart': block_start}
+
+def _is_block_start(tuple_):
+    return tuple_['blockStart']
+
+def _container_index_entry(records):
+    """Returns the index entry of a block of container records.
+
+    The index entry is ``minKey<TAB>maxKey<TAB>offset<TAB>length<TAB>records``, it is written to the index file ``<container>.idx``.
+    """
+    if not records:
+        return None
+    keys = [record['key'] for record in records]
+    offset = records[0]['offset']
+    length = sum(record['length'] for record in records)
+    entry = min(keys) + '\t' + max(keys) + '\t' + str(offset) + '\t' + str(length) + '\t' + str(len(records))
+    return {'indexEntry': entry, 'indexName': records[0]['containerName'] + '.idx'}
+
+class _ContainerReader(object):
+    """Decodes the records of container files from blob chunks of any size.
+
+    Records that span chunks are buffered until they are complete.
+    If keys are given, then only the records with these keys are returned.
+    If a key range ``(min, max)`` is given, then only the records with keys in the range (including the bounds) are returned.
+    """
+    def __init__(self, keys=None, key_range=None):
+        self.keys = set(keys) if keys is not None else None
+        self.key_range = tuple(key_range) if key_range is not None else None
+        self._buffer = bytearray()
+
+    def _selected(self, key):
+        if self.keys is not None and key not in self.keys:
+            return False
+        if self.key_range is not None and not (self.key_range[0] <= key <= self.key_range[1]):
+            return False
+        return True
+
+    def __call__(self, tuple_):
+        if isinstance(tuple_, dict):
+            tuple_ = next(iter(tuple_.values()))
+        self._buffer += tuple_
+        buf = self._buffer
+        records = []
+        pos = 0
+        while len(buf) - pos >= 4:
+            if buf[pos:pos+4] == _CONTAINER_MAGIC[:4]:
+                if len(buf) - pos < len(_CONTAINER_MAGIC):
+                    break
+                pos += len(_CONTAINER_MAGIC)
+                continue
+            key_length = struct.unpack_from('>i', buf, pos)[0]
+            if len(buf) - pos < 8 + key_length:
+                break
+            value_length = struct.unpack_from('>i', buf, pos + 4 + key_length)[0]
+            end = pos + 8 + key_length + value_length
+            if len(buf) < end:
+                break
+            key = bytes(buf[pos+4:pos+4+key_length]).decode('utf-8')
+            if self._selected(key):
+                records.append({'key': key, 'value': bytes(buf[pos+8+key_length:end])})
+            pos = end
+        del buf[:pos]
+        return records
+
+# number of container indexes that are cached by a lookup
+_INDEX_CACHE_SIZE = 16
+
+class _ContainerLookup(object):
+    """Looks up the records of a key or a key range in container files via their index files.
+
+    The index of the container selects the blocks whose key range contains the key or overlaps the key range,
+    only the byte ranges of these blocks are read from the container with WEBHDFS OPEN requests.
+    The key or key range is the value of the key attribute or of the range attributes of the input tuple,
+    the container is given by file or by the first other attribute of the input tuple.
+    The parsed indexes of the recently used containers are cached, an index is read again when its file has changed.
+    """
+    def __init__(self, client, file=None, key_attribute=None, range_attributes=None):
+        self.client = client
+        self.file = file
+        self.key_attribute = key_attribute
+        self.range_attributes = tuple(range_attributes) if range_attributes is not None else None
+        self._indexes = collections.OrderedDict()
+
+    def _index(self, container):
+        index_file = container + '.idx'
+        status = self.client.get_file_status(index_file)
+        version = (status.get('modificationTime'), status.get('length'))
+        cached = self._indexes.pop(container, None)
+        if cached is None or cached[0] != version:
+            entries = []
+            for line in self.client.read(index_file).decode('utf-8').splitlines():
+                if line:
+                    min_key, max_key, offset, length = line.split('\t')[:4]
+                    entries.append((min_key, max_key, int(offset), int(length)))
+            cached = (version, sorted(entries, key=lambda entry: entry[2]))
+        self._indexes[container] = cached
+        while len(self._indexes) > _INDEX_CACHE_SIZE:
+            self._indexes.popitem(last=False)
+        return cached[1]
+
+    def _container(self, tuple_):
+        if self.file is not None:
+            return self.file
+        keys = (self.key_attribute,) + (self.range_attributes or ())
+        return next(value for name, value in tuple_.items() if name not in keys)
+
+    def __call__(self, tuple_):
+        if self.range_attributes is not None:
+            min_key, max_key = str(tuple_[self.range_attributes[0]]), str(tuple_[self.range_attributes[1]])
+        else:
+            min_key = max_key = str(tuple_[self.key_attribute])
+        container = self._container(tuple_)
+        try:
+            index = self._index(container)
+        except urllib.error.HTTPError as e:
+            if e.code != 404:
+                raise
+            trace.warning("No index file for container: " + container)
+            return []
+        # adjacent blocks are read with one request
+        ranges = []
+        for block_min, block_max, offset, length in index:
+            if block_max >= min_key and block_min <= max_key:
+                if ranges and ranges[-1][0] + ranges[-1][1] == offset:
+                    ranges[-1][1] += length
+                else:
+                    ranges.append([offset, length])
+        records = []
+        for offset, length in ranges:
+            reader = _ContainerReader(key_range=(min_key, max_key))
+            records.extend(reader(self.client.read(container, offset, length)))
+        return records
+
+def _tuple_size(tuple_):
+    # approximate size in bytes of the string and blob attributes of a tuple
+    if isinstance(tuple_, dict):
+        return sum(_tuple_size(value) for value in tuple_.values())
+    if isinstance(tuple_, (str, bytes, bytearray, memoryview)):
+        return len(tuple_)
+    return 0
+
+def _is_roll_policy(bytes_per_file, time_per_file, tuples_per_file, min_bytes_per_file):
+    # True if the file roll limits cannot be handled by the sink operator alone
+    return min_bytes_per_file is not None or len([limit for limit in (bytes_per_file, time_per_file, tuples_per_file) if limit is not None]) > 1
+
+class _FileRollPolicy(object):
+    """Decides after which tuple the current file is closed, when the first of the size, time and tuple limits is reached.
+
+    The callable is used as punctor, the sink operator closes the file on the punctuation.
+    A file is not closed before it reaches min_bytes. Without min_bytes the sink operator closes the file after time_per_file
+    also when no tuples are received, then the counters of the policy restart with the next tuple after this time.
+    """
+    def __init__(self, bytes_per_file=None, time_per_file=None, tuples_per_file=None, min_bytes=None):
+        self.bytes_per_file = bytes_per_file
+        self.time_per_file = time_per_file
+        self.tuples_per_file = tuples_per_file
+        self.min_bytes = min_bytes if min_bytes is not None else 0
+        self._bytes = 0
+        self._tuples = 0
+        self._start = None
+
+    def __call__(self, tuple_):
+        now = time.time()
+        if self._start is None or (self.time_per_file is not None and self.min_bytes == 0 and now - self._start >= self.time_per_file):
+            self._bytes = 0
+            self._tuples = 0
+            self._start = now
+        self._bytes += _tuple_size(tuple_)
+        self._tuples += 1
+        if self._bytes < self.min_bytes:
+            return False
+        if (self.bytes_per_file is not None and self._bytes >= self.bytes_per_file) or \
+           (self.tuples_per_file is not None and self._tuples >= self.tuples_per_file) or \
+           (self.time_per_file is not None and now - self._start >= self.time_per_file):
+            self._start = None
+            return True
+        return False
+
+class _BlockAlignPolicy(object):
+    """Decides before which tuple the current file is closed, so that the file size stays just under the limit.
+
+    The callable is used as punctor that generates the punctuation before the tuple,
+    the sink operator closes the file on the punctuation. Strings are written as lines in UTF-8 encoding.
+    If time_per_file is given, then the sink operator closes the file after this time, too,
+    and the size of the file restarts with the next tuple after this time, like with :py:class:`_FileRollPolicy`.
+    """
+    def __init__(self, limit, time_per_file=None):
+        self.limit = limit
+        self.time_per_file = time_per_file
+        self._bytes = 0
+        self._start = None
+
+    def _size(self, tuple_):
+        if isinstance(tuple_, dict):
+            return sum(self._size(value) for value in tuple_.values())
+        if isinstance(tuple_, str):
+            return len(tuple_.encode('utf-8')) + 1
+        return _tuple_size(tuple_)
+
+    def __call__(self, tuple_):
+        now = time.time()
+        if self._start is None or (self.time_per_file is not None and now - self._start >= self.time_per_file):
+            self._bytes = 0
+            self._start = now
+        size = self._size(tuple_)
+        close = self._bytes > 0 and self._bytes + size > self.limit
+        if close:
+            self._bytes = size
+            self._start = now
+        else:
+            self._bytes += size
+        return close
+
+class _DedupFilter(object):
+    """Drops the tuples with a key that was seen before within the time window, with Bloom filters of bounded memory.
+
+    The memory is split into two generations, the keys are looked up in both and added to the current generation.
+    The current generation becomes the previous one after the window or when it holds the number of keys, for which
+    it keeps the false positive rate. So a key is recognized for at least the window, unless more keys are received.
+    Each generation is sized for half of the error rate, because a new key is a false positive if it matches either generation.
+    The bit arrays are part of the state of the callable, that is checkpointed in a consistent region.
+    """
+    def __init__(self, window, memory, error_rate, attribute=None):
+        self.window = window
+        self.attribute = attribute
+        self.bits = max(8, int(memory) * 4)
+        generation_rate = error_rate / 2.0
+        self.hashes = max(1, int(round(-math.log2(generation_rate))))
+        self.capacity = max(1, int(-self.bits * math.log(2) ** 2 / math.log(generation_rate)))
+        self._current = bytearray(self.bits // 8)
+        self._previous = bytearray(self.bits // 8)
+        self._count = 0
+        self._started = None
+
+    def _positions(self, key):
+        # double hashing with the two halves of the first 16 bytes of SHA-256, that is available with Python 3.5 and FIPS
+        h1, h2 = struct.unpack('>QQ', hashlib.sha256(str(key).encode('utf-8')).digest()[:16])
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def _rotate(self, now):
+        self._previous = self._current
+        self._current = bytearray(self.bits // 8)
+        self._count = 0
+        self._started = now
+
+    def __call__(self, tuple_):
+        now = time.time()
+        if self._started is None:
+            self._started = now
+        elif now - self._started >= self.window or self._count >= self.capacity:
+            self._rotate(now)
+        key = tuple_[self.attribute] if self.attribute is not None and isinstance(tuple_, dict) else tuple_
+        positions = self._positions(key)
+        if all(self._current[p >> 3] & (1 << (p & 7)) for p in positions) or \
+           all(self._previous[p >> 3] & (1 << (p & 7)) for p in positions):
+            return False
+        for p in positions:
+            self._current[p >> 3] |= 1 << (p & 7)
+        self._count += 1
+        return True
+
+_SortedRunSchema = StreamSchema('tuple<blob record, rstring runName>')
+
+def _run_key_name(key):
+    # the key as part of a file name
+    return re.sub(r'[/\s]', '_', str(key))
+
+def _sort_record(tuple_, attribute, encoding):
+    # returns the key and the encoded record of a tuple for the sorted files
+    if not isinstance(tuple_, dict):
+        return tuple_, _encode_tuple(tuple_, encoding)
+    key = tuple_[attribute] if attribute is not None else next(iter(tuple_.values()))
+    data = [value for name, value in tuple_.items() if name != attribute]
+    return key, _encode_tuple(data[0] if data else key, encoding)
+
+def _read_run(path):
+    # reads the records of a spilled run and removes the file
+    try:
+        with open(path, 'rb') as f:
+            while True:
+                try:
+                    yield pickle.load(f)
+                except EOFError:
+                    return
+    finally:
+        os.remove(path)
+
+# marks of the tuples for the sorted files, set by _SortedRunPolicy
+_SORT_BUFFER_FULL = 1
+_SORT_RUN_COMPLETE = 2
+
+def _is_sort_buffer_end(marked):
+    # the punctuation after a marked tuple ends the window of the buffer
+    return marked[1] != 0
+
+class _SortedRunPolicy(object):
+    """Marks the tuple, which fills the buffer of the sorted files up to buffer_size bytes or completes the run with file_size bytes or time_per_file.
+
+    The callable is used as map and returns the tuple with the mark, :py:func:`_is_sort_buffer_end` generates the punctuation
+    after a marked tuple, so that each punctuation based window of :py:class:`_SortedBuffer` holds one buffer and the mark
+    of the last tuple tells whether the run is complete. The size and the time of the run are only tracked here.
+    """
+    def __init__(self, buffer_size, file_size=None, time_per_file=None, attribute=None, encoding=None):
+        self.buffer_size = buffer_size
+        self.file_size = file_size if file_size is not None else buffer_size
+        self.time_per_file = time_per_file
+        self.attribute = attribute
+        self.encoding = encoding if encoding is not None else 'utf-8'
+        self._started = None
+        self._buffered = 0
+        self._size = 0
+
+    def __call__(self, tuple_):
+        now = time.time()
+        if self._started is None:
+            self._started = now
+        size = len(_sort_record(tuple_, self.attribute, self.encoding)[1])
+        self._buffered += size
+        self._size += size
+        if self._size >= self.file_size or (self.time_per_file is not None and now - self._started >= self.time_per_file):
+            self._started = None
+            self._buffered = 0
+            self._size = 0
+            return (tuple_, _SORT_RUN_COMPLETE)
+        if self._buffered >= self.buffer_size:
+            self._buffered = 0
+            return (tuple_, _SORT_BUFFER_FULL)
+        return (tuple_, 0)
+
+class _SortedBuffer(object):
+    """Returns the records of a window sorted by key as list of (key, encoded record) and whether the window completes the run.
+
+    The callable aggregates the punctuation based window of one buffer. A window completes the run, unless its last tuple
+    is marked as full buffer by :py:class:`_SortedRunPolicy`, so that the window of the pending tuples, that is aggregated
+    on the final punctuation, completes the run, too.
+    """
+    def __init__(self, attribute=None, encoding=None):
+        self.attribute = attribute
+        self.encoding = encoding if encoding is not None else 'utf-8'
+
+    def __call__(self, marked_tuples):
+        records = sorted((_sort_record(tuple_, self.attribute, self.encoding) for tuple_, mark in marked_tuples), key=lambda record: record[0])
+        complete = not marked_tuples or marked_tuples[-1][1] != _SORT_BUFFER_FULL
+        return (records, complete)
+
+class _SortedRunWriter(object):
+    """Collects the sorted buffers in runs and names the file of each run by the smallest and the largest key.
+
+    The callable receives the sorted buffers of :py:class:`_SortedBuffer`. A buffer that does not complete the run
+    is spilled to a local temporary file. When the run is complete, the spilled buffers and the last buffer are merged
+    and the records are submitted in key order with the file name of the run, in which %FILENUM, %MINKEY and %MAXKEY
+    are replaced by the number and the key range of the run. The sink operator closes the file, when the file name changes.
+    The spilled buffers of an incomplete run are removed on shutdown.
+    """
+    def __init__(self, file, spill_directory=None):
+        self.file = file
+        self.spill_directory = spill_directory
+        self._number = 0
+        # spilled buffers as (file path, smallest key, largest key)
+        self._runs = []
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for path, first, last in self._runs:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._runs = []
+
+    def _spill(self, records):
+        fd, path = tempfile.mkstemp(suffix='.run', dir=self.spill_directory)
+        with os.fdopen(fd, 'wb') as f:
+            for record in records:
+                pickle.dump(record, f)
+        self._runs.append((path, records[0][0], records[-1][0]))
+
+    def _flush(self, records):
+        runs = [_read_run(path) for path, first, last in self._runs] + [iter(records)]
+        firsts = [first for path, first, last in self._runs] + ([records[0][0]] if records else [])
+        lasts = [last for path, first, last in self._runs] + ([records[-1][0]] if records else [])
+        name = _file_name(self.file, self._number, time.time()).replace('%MINKEY', _run_key_name(min(firsts))).replace('%MAXKEY', _run_key_name(max(lasts)))
+        self._number += 1
+        self._runs = []
+        return ({'record': record, 'runName': name} for key, record in heapq.merge(*runs, key=lambda record: record[0]))
+
+    def __call__(self, buffer):
+        records, complete = buffer
+        if not complete:
+            if records:
+                self._spill(records)
+            return None
+        if not records and not self._runs:
+            return None
+        return self._flush(records)
+
+class _ReadThrottle(object):
+    """Limits the rate of the read data with a token bucket of one second capacity.
+
+    The callable is used as filter and passes all tuples. It blocks while the rate is exceeded,
+    so the reading operator is blocked by the full input queue of the filter.
+    """
+    def __init__(self, max_bytes_per_second):
+        self.rate = float(max_bytes_per_second)
+        self._allowance = self.rate
+        self._last = None
+
+    def __call__(self, tuple_):
+        now = time.monotonic()
+        if self._last is not None:
+            self._allowance = min(self.rate, self._allowance + max(0.0, now - self._last) * self.rate)
+        self._last = now
+        self._allowance -= _tuple_size(tuple_)
+        if self._allowance < 0:
+            time.sleep(-self._allowance / self.rate)
+        return True
+
+def _webhdfs_url(hdfs_uri, password=None):
+    """Returns the base URL of the WEBHDFS REST API for the HDFS URI of the credentials.
+
+    A webhdfs or https URI with password refers to a Knox gateway, that serves the REST API via HTTPS under /gateway/default.
+    """
+    parsed = urlparse(hdfs_uri)
+    path = parsed.path.rstrip('/')
+    if '/webhdfs/v1' in path:
+        path = path[:path.index('/webhdfs/v1')]
+    elif password and parsed.scheme in ('webhdfs', 'swebhdfs', 'https'):
+        path = '/gateway/default'
+    if parsed.scheme in ('swebhdfs', 'https') or (parsed.scheme == 'webhdfs' and password):
+        scheme = 'https'
+    else:
+        scheme = 'http'
+    return scheme + '://' + parsed.netloc + path + '/webhdfs/v1'
+
+# parameters of the toolkit operators, that the Python operators via WEBHDFS do not support
+_OPERATOR_ONLY_OPTIONS = ('appConfigName', 'authKeytab', 'authPrincipal', 'credFile', 'keyStorePassword', 'keyStorePath', 'libPath', \
+                          'maxConnectionsPerHost', 'policyFilePath', 'reconnectionBound', 'reconnectionInterval', 'reconnectionPolicy', 'vmArg')
+
+def _check_webhdfs_options(composite, names, mode):
+    # raises ValueError if one of the named parameters is set, that the Python operators of the mode ignore
+    used = [option for option in names if getattr(composite, option) is not None]
+    if used:
+        raise ValueError("The parameters " + ', '.join(used) + " cannot be used with " + mode)
+
+def _webhdfs_client(hdfsUri, hdfsUser, hdfsPassword, credentials):
+    # returns the WEBHDFS client for the credentials given by parameters or by the credentials JSON string
+    if credentials is not None and _is_a_valid_json(credentials):
+        connection = json.loads(credentials)
+        if isinstance(connection, dict):
+            hdfsUri, hdfsUser, hdfsPassword = _read_service_credentials(connection)
+    if not hdfsUri or not _is_webhdfs_uri(hdfsUri):
+        raise ValueError("The options require WEBHDFS credentials with a webhdfs URI: " + str(hdfsUri))
+    return _WebHdfsClient(_webhdfs_url(hdfsUri, hdfsPassword), hdfsUser, hdfsPassword)
+
+# granularity of the cached read redirects, the default block size of HDFS
+_REDIRECT_BLOCK_SIZE = 128 * 1024 * 1024
+
+# maximum number of cached read redirects, the expired entries are removed when it is reached
+_MAX_REDIRECTS = 1024
+
+def _redirect_location(location, params):
+    # the datanode location of a cached redirect with the byte range of the read
+    parsed = urlparse(location)
+    query = [(key, value) for key, value in parse_qsl(parsed.query) if key not in ('offset', 'length')]
+    query.extend(sorted(params.items()))
+    return parsed._replace(query=urlencode(query)).geturl()
+
+class _WebHdfsClient(object):
+    """Minimal WEBHDFS REST client for directory listings and file writes.
+
+    The client keeps one HTTP connection per host and thread, so that the listings, status polls and writes
+    reuse the TCP and TLS session to the namenode or gateway. The connections are created when they are used first
+    and are not pickled with the callables that use the client.
+    The datanode location, to which the namenode redirects a read, is cached per file and block of redirect_block_size bytes
+    for redirect_ttl seconds, so that the ranged reads of a block go to the datanode directly.
+    Relative paths are relative to the home directory of the user, like with the toolkit operators.
+    """
+    def __init__(self, url, user=None, password=None, timeout=30.0, redirect_ttl=60.0, redirect_block_size=_REDIRECT_BLOCK_SIZE):
+        self.url = url
+        self.user = user
+        self.password = password
+        self.timeout = timeout
+        self.redirect_ttl = redirect_ttl
+        self.redirect_block_size = redirect_block_size
+        self.batch = True
+        self._home = None
+        self._local = None
+        # (path, block) -> (datanode location, expiry time)
+        self._redirects = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_local'] = None
+        state['_redirects'] = {}
+        return state
+
+    def absolute(self, path):
+        """Returns the absolute path of a path, that is relative to the home directory of the user if it does not start with ``/``.
+
+        The home directory is requested with GETHOMEDIRECTORY once, ``/user/<user>`` is used if the request fails.
+        """
+        if path.startswith('/'):
+            return path
+        if self._home is None:
+            try:
+                self._home = self._request('/', 'GETHOMEDIRECTORY')['Path'].rstrip('/')
+            except (OSError, ValueError, KeyError, TypeError):
+                self._home = '/user/' + str(self.user)
+        if path.startswith('./'):
+            path = path[2:]
+        return self._home + '/' + path if path not in ('', '.') else self._home
+
+    def _url(self, path, op, params):
+        query = {'op': op}
+        query.update(params)
+        if self.user and not self.password:
+            query['user.name'] = self.user
+        return self.url + quote(self.absolute(path)) + '?' + urlencode(query)
+
+    def _connection(self, scheme, host, new=False):
+        # the connections of the thread by scheme and host
+        if self._local is None:
+            self._local = threading.local()
+        if not hasattr(self._local, 'connections'):
+            self._local.connections = {}
+        connections = self._local.connections
+        connection = connections.get((scheme, host))
+        if connection is not None and new:
+            connection.close()
+            connection = None
+        if connection is None:
+            if scheme == 'https':
+                connection = http.client.HTTPSConnection(host, timeout=self.timeout)
+            else:
+                connection = http.client.HTTPConnection(host, timeout=self.timeout)
+            connections[(scheme, host)] = connection
+        return connection
+
+    def _open(self, url, method='GET', data=None):
+        """Sends the request and returns the body of the response.
+
+        A response that is not successful, including a redirect, raises :py:class:`urllib.error.HTTPError`.
+        The request is sent once more on a new connection, if the server has closed the idle connection.
+        """
+        parsed = urlparse(url)
+        headers = {}
+        if self.password:
+            token = base64.b64encode((str(self.user) + ':' + self.password).encode('utf-8')).decode('ascii')
+            headers['Authorization'] = 'Basic ' + token
+        if data is not None:
+            headers['Content-Type'] = 'application/octet-stream'
+        target = parsed.path + ('?' + parsed.query if parsed.query else '')
+        for retry in (False, True):
+            connection = self._connection(parsed.scheme, parsed.netloc, new=retry)
+            try:
+                connection.request(method, target, body=data, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+                break
+            except (ConnectionError, http.client.HTTPException) as e:
+                connection.close()
+                if retry:
+                    raise OSError('Request to ' + parsed.netloc + ' failed: ' + str(e))
+        if response.status >= 300:
+            raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, io.BytesIO(body))
+        return body
+
+    def _request(self, path, op, method='GET', **params):
+        body = self._open(self._url(path, op, params), method)
+        return json.loads(body.decode('utf-8')) if body else None
+
+    def _write(self, method, path, op, data, **params):
+        """Sends the data of a CREATE or APPEND request.
+
+        The namenode (or gateway) redirects the request to the datanode that writes the data, the data is sent to the redirect location.
+        """
+        try:
+            location = json.loads(self._open(self._url(path, op, params), method).decode('utf-8'))['Location']
+        except urllib.error.HTTPError as e:
+            if e.code != 307:
+                raise
+            location = e.headers['Location']
+        self._open(location, method, data)
+
+    def create(self, path, data, overwrite=True, block_size=None, replication=None):
+        params = {'overwrite': 'true' if overwrite else 'false'}
+        if block_size is not None:
+            params['blocksize'] = int(block_size)
+        if replication is not None:
+            params['replication'] = int(replication)
+        self._write('PUT', path, 'CREATE', data, **params)
+
+    def append(self, path, data):
+        self._write('POST', path, 'APPEND', data)
+
+    def read(self, path, offset=None, length=None):
+        # the namenode redirects the request to a datanode, that serves the content or the byte range of the content
+        params = {}
+        if offset is not None:
+            params['offset'] = int(offset)
+        if length is not None:
+            params['length'] = int(length)
+        key = (self.absolute(path), (offset or 0) // self.redirect_block_size)
+        cached = self._redirects.get(key)
+        if cached is not None and cached[1] > time.monotonic():
+            try:
+                return self._open(_redirect_location(cached[0], params))
+            except OSError as e:
+                trace.info('Cached location of ' + path + ' failed, the read is redirected again: ' + str(e))
+                self._redirects.pop(key, None)
+        try:
+            return self._open(self._url(path, 'OPEN', params))
+        except urllib.error.HTTPError as e:
+            if e.code not in (301, 302, 303, 307) or 'Location' not in e.headers:
+                raise
+            location = e.headers['Location']
+        now = time.monotonic()
+        if len(self._redirects) >= _MAX_REDIRECTS:
+            self._redirects = {k: v for k, v in self._redirects.items() if v[1] > now}
+            if len(self._redirects) >= _MAX_REDIRECTS:
+                self._redirects = {}
+        self._redirects[key] = (location, now + self.redirect_ttl)
+        return self._open(location)
+
+    def concat(self, path, sources):
+        self._request(path, 'CONCAT', 'POST', sources=','.join(self.absolute(source) for source in sources))
+
+    def rename(self, path, destination):
+        if not self._request(path, 'RENAME', 'PUT', destination=self.absolute(destination))['boolean']:
+            raise OSError('Failed to rename ' + path + ' to ' + destination)
+
+    def delete(self, path):
+        return self._request(path, 'DELETE', 'DELETE')['boolean']
+
+    def get_file_status(self, path):
+        return self._request(path, 'GETFILESTATUS')['FileStatus']
+
+    def iter_status(self, path):
+        """Yields the status of the directory entries page by page.
+
+        LISTSTATUS_BATCH returns at most dfs.ls.limit entries per request, so that the namenode serves a huge directory
+        in short requests instead of building the complete listing at once.
+        Servers that do not support LISTSTATUS_BATCH (before Hadoop 3.0) are listed with LISTSTATUS.
+        """
+        start_after = None
+        while self.batch:
+            params = {'startAfter': start_after} if start_after is not None else {}
+            try:
+                listing = self._request(path, 'LISTSTATUS_BATCH', **params)['DirectoryListing']
+            except urllib.error.HTTPError as e:
+                if e.code != 400 or start_after is not None:
+                    raise
+                self.batch = False
+                break
+            entries = listing['partialListing']['FileStatuses']['FileStatus']
+            for entry in entries:
+                yield entry
+            if listing.get('remainingEntries', 0) == 0 or not entries:
+                return
+            start_after = entries[-1]['pathSuffix']
+        for entry in self._request(path, 'LISTSTATUS')['FileStatuses']['FileStatus']:
+            yield entry
+
+# durability levels of the files written by HdfsFileSink
+_DURABILITY_LEVELS = ('none', 'hflush', 'hsync')
+
+def _file_name(pattern, number, now):
+    # replaces the %FILENUM and %TIME variables like the sink operator
+    return pattern.replace('%FILENUM', str(number)).replace('%TIME', time.strftime('%Y%m%d_%H%M%S', time.localtime(now)))
+
+def _encode_tuple(tuple_, encoding):
+    # strings are written as lines, blobs as they are, like the sink operator
+    value = next(iter(tuple_.values())) if isinstance(tuple_, dict) else tuple_
+    if isinstance(value, str):
+        return (value + '\n').encode(encoding)
+    return bytes(value)
+
+def _file_name_regex(name):
+    # regular expression for the file names of the pattern, the group matches the file number
+    parts = re.split('(%FILENUM|%TIME)', name)
+    regex = ''.join('(\\d+)' if part == '%FILENUM' else '\\d{8}_\\d{6}' if part == '%TIME' else re.escape(part) for part in parts)
+    return re.compile(regex + '$')
+
+def _last_file(client, pattern):
+    """Returns the status of the existing file of the pattern with the highest file number and this number.
+
+    The files of the same number are ordered by name, which orders the %TIME variable by time. Returns (None, -1) if no file exists.
+    """
+    directory, name = client.absolute(pattern).rsplit('/', 1)
+    regex = _file_name_regex(name)
+    last = None
+    last_key = None
+    try:
+        entries = list(client.iter_status(directory or '/'))
+    except urllib.error.HTTPError as e:
+        if e.code != 404:
+            raise
+        entries = []
+    for entry in entries:
+        match = regex.match(entry['pathSuffix'])
+        if entry.get('type') == 'FILE' and match:
+            key = (int(match.group(1)) if match.groups() else 0, entry['pathSuffix'])
+            if last_key is None or key > last_key:
+                last, last_key = entry, key
+    if last is None:
+        return None, -1
+    return dict(last, pathSuffix=directory + '/' + last['pathSuffix']), last_key[0]
+
+class _WebHdfsFileWriter(object):
+    """Writes the tuples to files via WEBHDFS and commits the written data in groups.
+
+    The tuples are collected in a buffer, that a commit thread writes with one CREATE or APPEND request per file and commit interval,
+    so that many tuples share one round trip through the datanode pipeline. The data of a committed request is visible
+    for readers of the file, like after hflush. WEBHDFS does not offer hsync, a commit is synced to disk when the datanodes
+    are configured with dfs.datanode.synconclose, because each request closes the replica.
+    The callable is used with for_each, the commit thread is started by the Streams runtime with __enter__.
+
+    The tuple thread does not wait for the requests, it is blocked only when max_buffered tuples wait for the commit,
+    for example during a latency spike of the datanode pipeline. Data of failed requests is kept and written with the next commit.
+
+    In append mode the writer continues with the existing file of the highest file number when it is started, so that a restarted
+    job neither overwrites files nor starts a new range of small files. A new file is not created over an existing file, when another
+    writer created a file with the same name, the next file number is used.
+    """
+    def __init__(self, client, file, commit_interval, encoding=None, bytes_per_file=None, time_per_file=None, tuples_per_file=None, block_size=None, replication=None, append=False, max_buffered=None):
+        self.client = client
+        self.file = file
+        self.commit_interval = commit_interval
+        self.encoding = encoding if encoding is not None else 'utf-8'
+        self.bytes_per_file = bytes_per_file
+        self.time_per_file = time_per_file
+        self.tuples_per_file = tuples_per_file
+        self.block_size = block_size
+        self.replication = replication
+        self.append = append
+        self.max_buffered = max_buffered
+        self._number = 0
+        self._path = None
+        self._opened = None
+        self._bytes = 0
+        self._tuples = 0
+        # data to commit as list of [file name, list of encoded tuples] in the order of the files
+        self._segments = []
+        self._buffered = 0
+        # file name of the tuples and the name of the created file, that differs when the name was taken by another writer
+        self._created = None
+        self._condition = None
+        self._stopped = False
+        self._thread = None
+
+    def __enter__(self):
+        if self.append:
+            self._resume()
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name='hdfs-commit', daemon=True)
+        self._thread.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        self._thread.join()
+        if self._segments:
+            trace.error('Failed to write ' + str(self._buffered) + ' tuples to ' + ', '.join(segment[0] for segment in self._segments))
+
+    def _full(self):
+        return self.max_buffered is not None and self._buffered >= self.max_buffered
+
+    def _run(self):
+        stopped = False
+        failed = []
+        while not stopped:
+            with self._condition:
+                # a full buffer is committed at once, after a failed request the commit interval is awaited
+                self._condition.wait_for(lambda: self._stopped or (self._full() and not failed), self.commit_interval)
+                stopped = self._stopped
+                if self.time_per_file is not None and self._path is not None and time.time() - self._opened >= self.time_per_file:
+                    self._path = None
+                segments = self._segments
+                self._segments = []
+            # the requests are sent without the lock, the tuple thread continues to fill the buffer
+            failed = self._commit(segments)
+            with self._condition:
+                self._segments[0:0] = failed
+                self._buffered = sum(len(segment[1]) for segment in self._segments)
+                self._condition.notify_all()
+
+    def _resume(self):
+        # continues with the last file, unless it has reached the size limit
+        status, number = _last_file(self.client, self.file)
+        self._number = number + 1
+        if status is not None and (self.bytes_per_file is None or status['length'] < self.bytes_per_file):
+            self._opened = time.time()
+            self._path = status['pathSuffix']
+            self._created = (self._path, self._path)
+            self._bytes = status['length']
+            self._tuples = 0
+
+    def _open(self):
+        self._opened = time.time()
+        self._path = _file_name(self.file, self._number, self._opened)
+        self._number += 1
+        self._bytes = 0
+        self._tuples = 0
+
+    def _commit(self, segments):
+        # writes each segment with one request, returns the segments that are not written
+        for i, (path, tuples) in enumerate(segments):
+            data = b''.join(tuples)
+            try:
+                if self._created is not None and self._created[0] == path:
+                    self.client.append(self._created[1], data)
+                else:
+                    self._created = (path, self._create(path, data))
+            except OSError as e:
+                trace.error('Failed to write ' + str(len(data)) + ' bytes to ' + path + ': ' + str(e))
+                return segments[i:]
+        return []
+
+    def _create(self, path, data):
+        # creates the file and returns its name
+        while True:
+            try:
+                self.client.create(path, data, overwrite=not self.append, block_size=self.block_size, replication=self.replication)
+                return path
+            except urllib.error.HTTPError as e:
+                if not self.append or 'FileAlreadyExistsException' not in e.read().decode('utf-8', 'replace'):
+                    raise
+            if '%FILENUM' not in self.file:
+                self.client.append(path, data)
+                return path
+            trace.info('File ' + path + ' exists, continue with the next file number')
+            with self._condition:
+                path = _file_name(self.file, self._number, time.time())
+                self._number += 1
+
+    def __call__(self, tuple_):
+        data = _encode_tuple(tuple_, self.encoding)
+        with self._condition:
+            while self._full():
+                self._condition.notify_all()
+                self._condition.wait()
+            if self._path is None:
+                self._open()
+            if not self._segments or self._segments[-1][0] != self._path:
+                self._segments.append([self._path, []])
+            self._segments[-1][1].append(data)
+            self._buffered += 1
+            self._bytes += len(data)
+            self._tuples += 1
+            if (self.bytes_per_file is not None and self._bytes >= self.bytes_per_file) or \
+               (self.tuples_per_file is not None and self._tuples >= self.tuples_per_file):
+                self._path = None
+
+def _arrival_time(tuple_):
+    # pairs the tuple with its arrival time for the write statistics
+    return (time.time(), tuple_)
+
+class _PunctCommitWriter(object):
+    """Writes each window of tuples with one request to a file, that is kept open for the following windows.
+
+    The callable aggregates a punctuation based window, so that the window punctuation is the commit point of the tuples
+    of the window. The offset, the length and the number of tuples of each committed window are appended as JSON line
+    to the manifest file, which is named like the file with the suffix .manifest.
+    A new file is started at the beginning of a window when the file has reached one of the limits.
+    Returns the name and the committed size of the file with the attributes of FileInfoSchema.
+    With statistics the tuples are paired with their arrival time and the statistics of the committed part of the file
+    are returned with the attributes of FileStatisticsSchema.
+    """
+    def __init__(self, client, file, encoding=None, bytes_per_file=None, time_per_file=None, tuples_per_file=None, statistics=False):
+        self.client = client
+        self.file = file
+        self.encoding = encoding if encoding is not None else 'utf-8'
+        self.bytes_per_file = bytes_per_file
+        self.time_per_file = time_per_file
+        self.tuples_per_file = tuples_per_file
+        self.statistics = statistics
+        self._number = 0
+        self._path = None
+        self._opened = None
+        self._bytes = 0
+        self._tuples = 0
+        self._windows = 0
+        self._first = None
+        self._duration = 0.0
+        self._checksum = 0
+
+    def _full(self):
+        return (self.bytes_per_file is not None and self._bytes >= self.bytes_per_file) or \
+               (self.tuples_per_file is not None and self._tuples >= self.tuples_per_file) or \
+               (self.time_per_file is not None and time.time() - self._opened >= self.time_per_file)
+
+    def __call__(self, tuples):
+        if not tuples:
+            return None
+        if self._path is None or self._full():
+            self._opened = time.time()
+            self._path = _file_name(self.file, self._number, self._opened)
+            self._number += 1
+            self._bytes = 0
+            self._tuples = 0
+            self._windows = 0
+            self._first = None
+            self._duration = 0.0
+            self._checksum = 0
+        if self.statistics:
+            times = [arrival for arrival, tuple_ in tuples]
+            tuples = [tuple_ for arrival, tuple_ in tuples]
+        data = b''.join(_encode_tuple(tuple_, self.encoding) for tuple_ in tuples)
+        entry = (json.dumps({'window': self._windows, 'offset': self._bytes, 'length': len(data), 'tuples': len(tuples)}) + '\n').encode('utf-8')
+        start = time.time()
+        if self._windows == 0:
+            self.client.create(self._path, data)
+            self.client.create(self._path + '.manifest', entry)
+        else:
+            self.client.append(self._path, data)
+            self.client.append(self._path + '.manifest', entry)
+        self._duration += time.time() - start
+        self._bytes += len(data)
+        self._tuples += len(tuples)
+        self._windows += 1
+        if not self.statistics:
+            return {'fileName': self._path, 'fileSize': self._bytes}
+        self._checksum = zlib.crc32(data, self._checksum)
+        if self._first is None:
+            self._first = times[0]
+        return {'fileName': self._path, 'fileSize': self._bytes, 'tupleCount': self._tuples, \
+                'firstTupleTime': int(self._first * 1000), 'lastTupleTime': int(times[-1] * 1000), \
+                'writeDuration': self._duration, 'bytesPerSecond': self._bytes / self._duration if self._duration > 0 else 0.0, \
+                'checksum': self._checksum}
+
+# size of the byte ranges that are read and appended when the compactor copies files
+_COMPACT_CHUNK_SIZE = 8 * 1024 * 1024
+
+class _Compactor(object):
+    """Merges the small files of a directory into one file, when their total size reaches the target size.
+
+    The files of a group are merged with the native concat of the namenode into the first file of the group,
+    which replaces the files in one namenode operation. When the namenode rejects the concat, for example for files
+    with partial blocks before Hadoop 3, the content of the files is copied in byte ranges of chunk_size into a hidden file
+    ``.<name>.compacting`` in the directory. WEBHDFS can not rename onto an existing file, so the first file is renamed
+    to ``.<name>.replaced`` and the copy is renamed to the first file, before the other files are deleted.
+    Between these two renames the first file does not exist under its name. The compactor recovers the hidden files of a directory
+    the first time it sees the directory after a restart: a ``.replaced`` file is renamed back if the first file is missing
+    and deleted otherwise, a ``.compacting`` file is deleted. A failure leaves the files or duplicate data, but never loses data.
+    Relative names are resolved against the home directory, hidden files with a name that starts with ``.`` or ``_`` are not compacted.
+    A group that fails to merge is kept for the next file without the files that do not exist anymore.
+    Returns the name and the size of the merged file with the attributes of FileInfoSchema.
+    """
+    def __init__(self, client, target_size, max_group_age=None, native_concat=True, chunk_size=_COMPACT_CHUNK_SIZE):
+        self.client = client
+        self.target_size = target_size
+        self.max_group_age = max_group_age
+        self.native_concat = native_concat
+        self.chunk_size = chunk_size
+        # directory -> (start time of the group, file name -> file size)
+        self._groups = {}
+        # directories whose hidden files of an interrupted copy are recovered
+        self._recovered = set()
+
+    def _recover(self, directory):
+        names = [entry['pathSuffix'] for entry in self.client.iter_status(directory or '/')]
+        for name in names:
+            path = directory + '/' + name
+            if name.startswith('.') and name.endswith('.replaced'):
+                target = directory + '/' + name[1:-len('.replaced')]
+                if target[len(directory)+1:] in names:
+                    self.client.delete(path)
+                else:
+                    trace.warning('Restore ' + target + ' from the interrupted compaction')
+                    self.client.rename(path, target)
+            elif name.startswith('.') and name.endswith('.compacting'):
+                self.client.delete(path)
+
+    def _copy(self, path, temp, create):
+        # copies the file in byte ranges, so that only one chunk is held in memory
+        offset = 0
+        while True:
+            data = self.client.read(path, offset, self.chunk_size)
+            if create:
+                self.client.create(temp, data)
+                create = False
+            elif data:
+                self.client.append(temp, data)
+            offset += len(data)
+            if len(data) < self.chunk_size:
+                return
+
+    def _merge(self, paths):
+        target = paths[0]
+        if self.native_concat:
+            try:
+                self.client.concat(target, paths[1:])
+                return target
+            except urllib.error.HTTPError as e:
+                trace.info('Concat into ' + target + ' rejected, the files are copied: ' + str(e))
+        directory, name = target.rsplit('/', 1)
+        temp = directory + '/.' + name + '.compacting'
+        replaced = directory + '/.' + name + '.replaced'
+        self._copy(target, temp, True)
+        for path in paths[1:]:
+            self._copy(path, temp, False)
+        self.client.rename(target, replaced)
+        self.client.rename(temp, target)
+        for path in [replaced] + paths[1:]:
+            self.client.delete(path)
+        return target
+
+    def __call__(self, tuple_):
+        path = tuple_['fileName'] if isinstance(tuple_, dict) else tuple_
+        size = tuple_.get('fileSize') if isinstance(tuple_, dict) else None
+        directory = None
+        try:
+            path = self.client.absolute(path)
+            directory, name = path.rsplit('/', 1)
+            if name.startswith('.') or name.startswith('_'):
+                # hidden files, for example the files of an interrupted compaction or _SUCCESS markers
+                return None
+            if size is None:
+                size = self.client.get_file_status(path)['length']
+            if size >= self.target_size:
+                return None
+            if directory not in self._recovered:
+                self._recover(directory)
+                self._recovered.add(directory)
+            started, files = self._groups.setdefault(directory, (time.time(), {}))
+            files[path] = size
+            if sum(files.values()) < self.target_size and (self.max_group_age is None or time.time() - started < self.max_group_age):
+                return None
+            if len(files) < 2:
+                del self._groups[directory]
+                return None
+            target = self._merge(list(files))
+            del self._groups[directory]
+            return {'fileName': target, 'fileSize': self.client.get_file_status(target)['length']}
+        except OSError as e:
+            trace.error('Failed to compact ' + path + ': ' + str(e))
+            self._forget_missing(directory)
+            return None
+
+    def _forget_missing(self, directory):
+        # keeps the group of the failed merge for the next file, without the files that do not exist anymore
+        if directory not in self._groups:
+            return
+        started, files = self._groups[directory]
+        for path in list(files):
+            try:
+                self.client.get_file_status(path)
+            except urllib.error.HTTPError as e:
+                if e.code == 404:
+                    del files[path]
+            except OSError:
+                pass
+        if not files:
+            del self._groups[directory]
+
+# attributes of the scan output schema that are set from the file status of the listing
+_SCAN_METADATA_ATTRIBUTES = {'fileSize': 'length', 'modificationTime': 'modificationTime', 'replication': 'replication', 'blockSize': 'blockSize', 'owner': 'owner'}
+
+# sort keys of the files that are found by a scan
+_SCAN_ORDERS = {
+    'oldestFirst': lambda status: (status.get('modificationTime', 0), status['fileName']),
+    'smallestFirst': lambda status: (status.get('length', 0), status['fileName']),
+    'largestFirst': lambda status: (-status.get('length', 0), status['fileName']),
+}
+
+_GLOB_CHARACTERS = re.compile(r'[*?\[{]')
+
+# keys of the sharded scan: files are assigned to the scan channels by the hash of the file name or of the directory
+_SHARD_KEYS = ('fileName', 'directory')
+
+def _glob_regex(pattern):
+    """Translates the Hadoop glob pattern of a path component into a regular expression.
+
+    Supports ``*``, ``?``, ``[abc]``, ``[^abc]``, ``{a,b}`` and the escape character ``\\``.
+    """
+    result = ''
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == '*':
+            result += '.*'
+        elif c == '?':
+            result += '.'
+        elif c == '[' and pattern.find(']', i + 1) > i + 1:
+            j = pattern.find(']', i + 1)
+            result += '[' + pattern[i+1:j].replace('\\', '\\\\') + ']'
+            i = j
+        elif c == '{':
+            result += '(?:'
+            depth += 1
+        elif c == ',' and depth > 0:
+            result += '|'
+        elif c == '}' and depth > 0:
+            result += ')'
+            depth -= 1
+        elif c == '\\' and i + 1 < len(pattern):
+            i += 1
+            result += re.escape(pattern[i])
+        else:
+            result += re.escape(c)
+        i += 1
+    return result
+
+class _WebHdfsDirectoryScan(object):
+    """Scans directories via WEBHDFS and returns the names of new and modified files.
+
+    The directory is a path or a list of paths, that can contain Hadoop glob patterns, for example ``/data/*/2026-*/events-*.json``.
+    The directories of a glob are resolved level by level, only the directories that match the pattern of a level are listed.
+    A pattern in the last path component is applied to the file names, unless the path ends with ``/``.
+    Each directory is listed once per scan, even if it is given by more than one path.
+
+    The sleep time between the scans doubles while the directories do not change, up to max_sleep_time,
+    and is randomized by the jitter, so that the scans of many applications are spread over time
+    and the load of the namenode follows the rate of changes instead of the number of applications.
+
+    If change_poll_time is given, then the modification time of the listed directories is checked in this interval while sleeping.
+    The namenode updates it when a file is created, renamed or deleted in a directory, so that these changes
+    are detected with status requests and the directories are only listed when they changed.
+    The scans after the sleep time remain as fallback for the changes of existing files.
+
+    The files found by a scan are returned in the order given by the name of a _SCAN_ORDERS entry,
+    and the tuples contain the file metadata of the listing, if metadata is True.
+
+    Files that are still written are held back by the readiness checks: a file is returned when its size and modification time
+    did not change for stable_scans scans, files with one of the ignore_suffixes are skipped, and if a success_marker is given,
+    then the files of a directory are returned after the marker file exists in this directory.
+
+    If a shard ``(index, count)`` is given, then the scan returns only the files with a path hash modulo count equal to index.
+    The hash is taken of the file name or, if shard_by is ``directory``, of the directory, then the directories
+    of other shards are not listed at all. The CRC-32 of the path is used, that is the same in all processes.
+
+    The scan is its own iterator, so that it can be checkpointed in a consistent region: the state is the status of the seen
+    and pending files, the files of the last scan that are not returned yet and the current sleep time.
+    """
+    def __init__(self, client, directory, pattern=None, init_delay=None, sleep_time=None, max_sleep_time=None, jitter=None, attribute='fileName', strict=False, change_poll_time=None, order=None, metadata=False, stable_scans=None, success_marker=None, ignore_suffixes=None, shard=None, shard_by=None):
+        self.client = client
+        self.directories = [directory] if isinstance(directory, str) else list(directory)
+        self.pattern = pattern
+        self.init_delay = float(init_delay) if init_delay is not None else 0.0
+        self.sleep_time = float(sleep_time) if sleep_time is not None else 5.0
+        self.max_sleep_time = max(float(max_sleep_time), self.sleep_time) if max_sleep_time is not None else self.sleep_time
+        self.jitter = float(jitter) if jitter is not None else 0.0
+        self.attribute = attribute
+        self.strict = strict
+        self.change_poll_time = float(change_poll_time) if change_poll_time is not None else None
+        self.order = order
+        self.metadata = metadata
+        self.stable_scans = int(stable_scans) if stable_scans is not None else 1
+        self.success_marker = success_marker
+        if isinstance(ignore_suffixes, str):
+            ignore_suffixes = [ignore_suffixes]
+        self.ignore_suffixes = tuple(ignore_suffixes) if ignore_suffixes is not None else ()
+        self.shard = tuple(shard) if shard is not None else None
+        self.shard_by = shard_by if shard_by is not None else 'fileName'
+        self._seen = {}
+        self._pending = {}
+        self._directory_times = {}
+        self._queue = collections.deque()
+        self._current_sleep_time = self.sleep_time
+        self._started = False
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # the directory times are only valid during the sleep time of a scan
+        state['_directory_times'] = {}
+        state['_queue'] = list(self._queue)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._queue = collections.deque(state['_queue'])
+
+    def _jittered(self, seconds):
+        if self.jitter > 0:
+            return seconds * random.uniform(1.0 - self.jitter, 1.0 + self.jitter)
+        return seconds
+
+    def _owned(self, path):
+        return self.shard is None or zlib.crc32(path.encode('utf-8')) % self.shard[1] == self.shard[0]
+
+    def _list(self, path, listings):
+        # lists a directory once per scan, a directory that does not exist (anymore) has no entries
+        if path not in listings:
+            try:
+                if self.change_poll_time is not None:
+                    self._directory_times[path] = self.client.get_file_status(path).get('modificationTime')
+                listings[path] = list(self.client.iter_status(path))
+            except urllib.error.HTTPError as e:
+                if e.code != 404:
+                    raise
+                listings[path] = []
+        return listings[path]
+
+    def _resolve(self, directory, listings):
+        """Returns the directories of a path and the regular expression of the file names, None for all files."""
+        directory = self.client.absolute(directory)
+        components = [c for c in directory.split('/') if c]
+        file_regex = None
+        if components and not directory.endswith('/') and _GLOB_CHARACTERS.search(components[-1]):
+            file_regex = _glob_regex(components.pop())
+        paths = ['']
+        for component in components:
+            if _GLOB_CHARACTERS.search(component):
+                regex = _glob_regex(component)
+                paths = [path + '/' + entry['pathSuffix'] for path in paths for entry in self._list(path or '/', listings) \
+                    if entry.get('type') == 'DIRECTORY' and re.fullmatch(regex, entry['pathSuffix'])]
+            else:
+                paths = [path + '/' + component for path in paths]
+        return [path or '/' for path in paths], file_regex
+
+    def _directory_files(self, directory, file_regex, listings):
+        entries = [entry for entry in self._list(directory, listings) if entry.get('type') == 'FILE']
+        if self.success_marker is not None:
+            if not any(entry['pathSuffix'] == self.success_marker for entry in entries):
+                return []
+        files = []
+        for entry in entries:
+            name = entry['pathSuffix']
+            if name == self.success_marker or name.endswith(self.ignore_suffixes):
+                continue
+            if file_regex is not None and re.fullmatch(file_regex, name) is None:
+                continue
+            if self.pattern is not None and re.fullmatch(self.pattern, name) is None:
+                continue
+            files.append(dict(entry, fileName=directory.rstrip('/') + '/' + name))
+        return files
+
+    def scan(self):
+        """Lists the directories once and returns the file status of the new and modified files."""
+        listings = {}
+        statuses = {}
+        self._directory_times = {}
+        for directory in self.directories:
+            if self.strict and not _GLOB_CHARACTERS.search(directory):
+                # raises HTTPError 404, if the directory does not exist
+                self.client.get_file_status(directory)
+            paths, file_regex = self._resolve(directory, listings)
+            for path in paths:
+                if self.shard_by == 'directory' and not self._owned(path):
+                    continue
+                for status in self._directory_files(path, file_regex, listings):
+                    if self.shard_by == 'fileName' and not self._owned(status['fileName']):
+                        continue
+                    statuses[status['fileName']] = status
+        files = []
+        seen = {}
+        pending = {}
+        for path, status in statuses.items():
+            state = (status.get('length'), status.get('modificationTime'))
+            if self._seen.get(path) == state:
+                seen[path] = state
+                continue
+            previous, count = self._pending.get(path, (None, 0))
+            count = count + 1 if previous == state else 1
+            if count >= self.stable_scans:
+                seen[path] = state
+                files.append(status)
+            else:
+                pending[path] = (state, count)
+        self._seen = seen
+        self._pending = pending
+        if self.order is not None:
+            files.sort(key=_SCAN_ORDERS[self.order])
+        return files
+
+    def _changed(self):
+        try:
+            for path, modification_time in self._directory_times.items():
+                if self.client.get_file_status(path).get('modificationTime') != modification_time:
+                    return True
+        except (OSError, ValueError, KeyError):
+            pass
+        return False
+
+    def _wait(self, seconds):
+        """Sleeps the given time, returns True if a directory changed before."""
+        seconds = self._jittered(seconds)
+        if self.change_poll_time is None:
+            time.sleep(seconds)
+            return False
+        deadline = time.monotonic() + seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self.change_poll_time, remaining))
+            if self._changed():
+                return True
+
+    def _tuple(self, status):
+        if self.attribute is None:
+            return status['fileName']
+        result = {self.attribute: status['fileName']}
+        if self.metadata:
+            for attribute, field in _SCAN_METADATA_ATTRIBUTES.items():
+                result[attribute] = status.get(field, '' if attribute == 'owner' else 0)
+        return result
+
+    def _next_scan(self):
+        try:
+            files = self.scan()
+        except urllib.error.HTTPError as e:
+            if e.code == 404 and self.strict:
+                raise
+            trace.warning('Scan of directories %s failed: %s', self.directories, e)
+            files = []
+        except (OSError, ValueError, KeyError) as e:
+            trace.warning('Scan of directories %s failed: %s', self.directories, e)
+            files = []
+        self._queue.extend(files)
+        # files that are not ready yet are checked again after sleep time
+        self._current_sleep_time = self.sleep_time if files or self._pending else min(self._current_sleep_time * 2, self.max_sleep_time)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self._started:
+            time.sleep(self._jittered(self.init_delay))
+            self._started = True
+            self._next_scan()
+        while not self._queue:
+            self._wait(self._current_sleep_time)
+            self._next_scan()
+        return self._tuple(self._queue.popleft())
+
+def _scan_attribute(schema):
+    # name of the file name attribute of the scan output schema, None for CommonSchema.String
+    if schema is None or schema is CommonSchema.String:
+        return None
+    names = re.findall(r'\b[ru]string\s+(\w+)', str(schema))
+    if 'fileName' in names or not names:
+        return 'fileName'
+    return names[0]
+
+def _scan_metadata(schema):
+    # True if the scan output schema contains file metadata attributes
+    if schema is None or schema is CommonSchema.String:
+        return False
+    names = re.findall(r'(\w+)\s*[,>]', str(schema))
+    return any(name in _SCAN_METADATA_ATTRIBUTES for name in names)
 
 
 class _HDFS2DirectoryScan(streamsx.spl.op.Source):
@@ -634,18 +2330,31 @@ class HdfsDirectoryScan(streamsx.topology.composite.Source):
 
         s = topo.source(hdfs.HdfsDirectoryScan(directory=dir, pattern='.*\.csv$'))
 
+    Example, scanning via WEBHDFS with an adaptive scan interval of 2 up to 60 seconds, that is varied by 20% between the scans::
+
+        s = topo.source(hdfs.HdfsDirectoryScan(credentials=credentials, directory=dir, sleepTime=2.0, maxSleepTime=60.0, sleepTimeJitter=0.2))
+
+    Example, scanning via WEBHDFS for files with size and modification time, the largest files first::
+
+        s = topo.source(hdfs.HdfsDirectoryScan(credentials=credentials, directory=dir, schema=DirectoryScanMetadataSchema, scanOrder='largestFirst'))
+        large_files = s.filter(lambda f: f['fileSize'] > 1024 * 1024 * 1024)
+
+    Example, scanning the event files of all sources of 2026 and a second directory by a single operator::
+
+        s = topo.source(hdfs.HdfsDirectoryScan(credentials=credentials, directory=['/data/*/2026-*/events-*.json', '/archive/events']))
+
     Attributes
     ----------
     credentials : dict|str
         The credentials of Hadoop cluster as dict or JSON string that contains the hdfs credentials key/value pairs for user, password and webhdfs .
-    directory : str|Expression
-        Specifies the name of the directory to be scanned
+    directory : str|list(str)|Expression
+        Specifies the name of the directory to be scanned. A list of directories and Hadoop glob patterns, for example ``/data/*/2026-*/events-*.json``, are scanned by a single operator via WEBHDFS, see maxSleepTime. A pattern in the last path component is applied to the file names, unless the path ends with ``/``.
     pattern : str
         Instructs the operator to ignore file names that do not match the regular expression pattern
     initDelay : int
         initDelay specifies the time to wait in seconds before the operator reads the first file. The default value is 0 .     
     schema : StreamSchema
-        Output schema, defaults to CommonSchema.String
+        Output schema, defaults to CommonSchema.String. With :py:const:`~streamsx.hdfs.DirectoryScanMetadataSchema` the tuples contain the file metadata of the listing, so that no additional status requests are required. The metadata is read via WEBHDFS, see maxSleepTime.
     options : kwargs
         The additional optional parameters as variable keyword arguments.
     """
@@ -657,24 +2366,35 @@ class HdfsDirectoryScan(streamsx.topology.composite.Source):
         self.appConfigName = None
         self.authKeytab = None
         self.authPrincipal = None
+        self.changePollTime = None
         self.configPath = None
+        self.consistentRegionConfig = None
         self.credFile = None
         self.credentials = None
         self.directory = directory
         self.hdfsPassword = None
         self.hdfsUri = None
         self.hdfsUser = None
+        self.ignoreSuffixes = None
         self.initDelay = initDelay
         self.keyStorePassword = None
         self.keyStorePath = None
         self.libPath = None
+        self.maxConnectionsPerHost = None
+        self.maxSleepTime = None
         self.pattern = pattern
         self.policyFilePath = None
         self.reconnectionBound = None
         self.reconnectionInterval = None
         self.reconnectionPolicy = None
+        self.scanChannels = None
+        self.scanOrder = None
+        self.shardBy = None
         self.sleepTime = None
+        self.sleepTimeJitter = None
+        self.stableScans = None
         self.strictMode = None
+        self.successMarker = None
         self.vmArg = None
   
 
@@ -684,8 +2404,12 @@ class HdfsDirectoryScan(streamsx.topology.composite.Source):
             self.authKeytab = options.get('authKeytab')
         if 'authPrincipal' in options:
             self.authPrincipal = options.get('authPrincipal')
+        if 'changePollTime' in options:
+            self.changePollTime = options.get('changePollTime')
         if 'configPath' in options:
             self.configPath = options.get('configPath')
+        if 'consistentRegionConfig' in options:
+            self.consistentRegionConfig = options.get('consistentRegionConfig')
         if 'credFile' in options:
             self.credFile = options.get('credFile')
         if 'credentials' in options:
@@ -698,6 +2422,8 @@ class HdfsDirectoryScan(streamsx.topology.composite.Source):
             self.hdfsUri = options.get('hdfsUri')
         if 'hdfsUser' in options:
             self.hdfsUser = options.get('hdfsUser')
+        if 'ignoreSuffixes' in options:
+            self.ignoreSuffixes = options.get('ignoreSuffixes')
         if 'initDelay' in options:
             self.initDelay = options.get('initDelay')
         if 'keyStorePassword' in options:
@@ -706,6 +2432,10 @@ class HdfsDirectoryScan(streamsx.topology.composite.Source):
             self.keyStorePath = options.get('keyStorePath')
         if 'libPath' in options:
             self.libPath = options.get('libPath')
+        if 'maxConnectionsPerHost' in options:
+            self.maxConnectionsPerHost = options.get('maxConnectionsPerHost')
+        if 'maxSleepTime' in options:
+            self.maxSleepTime = options.get('maxSleepTime')
         if 'pattern' in options:
             self.pattern = options.get('pattern')
         if 'policyFilePath' in options:
@@ -716,12 +2446,24 @@ class HdfsDirectoryScan(streamsx.topology.composite.Source):
             self.reconnectionInterval = options.get('reconnectionInterval')
         if 'reconnectionPolicy' in options:
             self.reconnectionPolicy = options.get('reconnectionPolicy')
+        if 'scanChannels' in options:
+            self.scanChannels = options.get('scanChannels')
+        if 'scanOrder' in options:
+            self.scanOrder = options.get('scanOrder')
+        if 'shardBy' in options:
+            self.shardBy = options.get('shardBy')
         if 'sleepTime' in options:
             self.sleepTime = options.get('sleepTime')
+        if 'sleepTimeJitter' in options:
+            self.sleepTimeJitter = options.get('sleepTimeJitter')
+        if 'stableScans' in options:
+            self.stableScans = options.get('stableScans')
         if 'strictMode' in options:
             self.strictMode = options.get('strictMode')  
+        if 'successMarker' in options:
+            self.successMarker = options.get('successMarker')
         if 'vmArg' in options:
-            self.keyStorePath = options.get('vmArg')
+            self.vmArg = options.get('vmArg')
   
 
     @property
@@ -758,6 +2500,17 @@ class HdfsDirectoryScan(streamsx.topology.composite.Source):
         self._authPrincipal = value
      
 
+    @property
+    def changePollTime(self):
+        """
+            float: The optional parameter changePollTime enables the change detection of the directory. While waiting for the next scan, the modification time of the directory is checked every changePollTime seconds, for example 0.5. The namenode updates the modification time when a file is created, renamed or deleted in the directory, so that the directory is listed right after such a change instead of after sleepTime. The scans after sleepTime remain as fallback, for example for files that are modified. The scan is done via WEBHDFS, see maxSleepTime. Note, the HDFS inotify event stream is not used, because it is not available via WEBHDFS and requires HDFS superuser privileges.
+        """
+        return self._changePollTime
+
+    @changePollTime.setter
+    def changePollTime(self, value):
+        self._changePollTime = value
+
     @property
     def configPath(self):
         """
@@ -769,6 +2522,17 @@ class HdfsDirectoryScan(streamsx.topology.composite.Source):
     def configPath(self, value):
         self._configPath = value
 
+    @property
+    def consistentRegionConfig(self):
+        """
+            ConsistentRegionConfig: The optional parameter consistentRegionConfig specifies the configuration of a consistent region that is started by the operator, see :py:class:`streamsx.topology.state.ConsistentRegionConfig`. The operator checkpoints its scan state, the operators in the region, for example HdfsFileSink, checkpoint their written files. HdfsFileSource joins the region and reads a file again from the beginning after a reset. After a failure the region is reset to the last checkpoint and only the tuples after this checkpoint are processed again.
+        """
+        return self._consistentRegionConfig
+
+    @consistentRegionConfig.setter
+    def consistentRegionConfig(self, value):
+        self._consistentRegionConfig = value
+
     @property
     def credFile(self):
         """
@@ -794,7 +2558,7 @@ class HdfsDirectoryScan(streamsx.topology.composite.Source):
     @property
     def directory(self):
         """
-            str: This optional parameter specifies the name of the directory to be scanned. If the name starts with a slash, it is considered an absolute directory that you want to scan. If it does not start with a slash, it is considered a relative directory, relative to the /user/userid/ directory. This parameter is mandatory if the input port is not specified. 
+            str|list(str): This optional parameter specifies the name of the directory to be scanned. If the name starts with a slash, it is considered an absolute directory that you want to scan. If it does not start with a slash, it is considered a relative directory, relative to the /user/userid/ directory. A list of directories and Hadoop glob patterns, for example ``/data/*/2026-*/events-*.json``, are scanned by a single operator via WEBHDFS, see maxSleepTime. This parameter is mandatory if the input port is not specified. 
         """
         return self._directory
 
@@ -838,6 +2602,17 @@ class HdfsDirectoryScan(streamsx.topology.composite.Source):
         self._hdfsUser = value
 
 
+    @property
+    def ignoreSuffixes(self):
+        """
+            list(str): The optional parameter ignoreSuffixes specifies the suffixes of files that are still written, for example ``['._COPYING_', '.tmp']``. The files with these suffixes are not submitted, they are submitted after they are renamed. The scan is done via WEBHDFS, see maxSleepTime.
+        """
+        return self._ignoreSuffixes
+
+    @ignoreSuffixes.setter
+    def ignoreSuffixes(self, value):
+        self._ignoreSuffixes = value
+
     @property
     def initDelay(self):
         """
@@ -885,6 +2660,28 @@ class HdfsDirectoryScan(streamsx.topology.composite.Source):
     def libPath(self, value):
         self._libPath = value
 
+    @property
+    def maxConnectionsPerHost(self):
+        """
+            int: The optional parameter maxConnectionsPerHost specifies the number of idle connections per host that are kept alive for reuse when connecting via WEBHDFS. This is a tuning knob of the JVM keep-alive cache (system property http.maxConnections, default value 5), it does not avoid the redirect of each request from the namenode to a datanode.
+        """
+        return self._maxConnectionsPerHost
+
+    @maxConnectionsPerHost.setter
+    def maxConnectionsPerHost(self, value):
+        self._maxConnectionsPerHost = value
+
+    @property
+    def maxSleepTime(self):
+        """
+            float: The optional parameter maxSleepTime enables the adaptive scan interval. When a scan finds no new or modified files, then the time to wait before the next scan is doubled, starting at sleepTime up to maxSleepTime seconds. When files are found, then the time is reset to sleepTime. The scan is done via WEBHDFS with paged listings (LISTSTATUS_BATCH), so that the namenode serves huge directories in short requests. Requires WEBHDFS credentials. The directory can be a single directory or a list of directories, and each can contain Hadoop glob patterns. The scan via WEBHDFS is used for the parameters maxSleepTime, sleepTimeJitter, changePollTime, scanOrder, stableScans, successMarker, ignoreSuffixes, scanChannels and shardBy, and cannot be used with the parameters appConfigName, authKeytab, authPrincipal, credFile, keyStorePassword, keyStorePath, libPath, maxConnectionsPerHost, policyFilePath, reconnectionBound, reconnectionInterval, reconnectionPolicy and vmArg of the toolkit operator.
+        """
+        return self._maxSleepTime
+
+    @maxSleepTime.setter
+    def maxSleepTime(self, value):
+        self._maxSleepTime = value
+
     @property
     def pattern(self):
         """
@@ -946,6 +2743,39 @@ class HdfsDirectoryScan(streamsx.topology.composite.Source):
         self._reconnectionPolicy = value
 
 
+    @property
+    def scanChannels(self):
+        """
+            int: The optional parameter scanChannels specifies the number of scan operators, that scan the directories in parallel. Each operator submits only its share of the files, given by a hash of the file name or directory, see shardBy, so that no file is submitted twice. The outputs of the operators are merged. The scan is done via WEBHDFS, see maxSleepTime.
+        """
+        return self._scanChannels
+
+    @scanChannels.setter
+    def scanChannels(self, value):
+        self._scanChannels = value
+
+    @property
+    def scanOrder(self):
+        """
+            str: The optional parameter scanOrder specifies the order of the files that are found by a scan: ``oldestFirst`` (by modification time), ``smallestFirst`` or ``largestFirst`` (by file size). The scan is done via WEBHDFS, see maxSleepTime.
+        """
+        return self._scanOrder
+
+    @scanOrder.setter
+    def scanOrder(self, value):
+        self._scanOrder = value
+
+    @property
+    def shardBy(self):
+        """
+            str: The optional parameter shardBy specifies how the files are assigned to the scanChannels: ``fileName`` (default) by the hash of the file name, or ``directory`` by the hash of the directory. With ``directory`` each scan operator lists only its directories, which reduces the listings when many directories are scanned, see the directory parameter.
+        """
+        return self._shardBy
+
+    @shardBy.setter
+    def shardBy(self, value):
+        self._shardBy = value
+
     @property
     def sleepTime(self):
         """
@@ -958,6 +2788,28 @@ class HdfsDirectoryScan(streamsx.topology.composite.Source):
         self._sleepTime = value
 
 
+    @property
+    def sleepTimeJitter(self):
+        """
+            float: The optional parameter sleepTimeJitter specifies a random variation of the initDelay and the time between the scans, as a fraction of the time, for example 0.2 for +/- 20%. The jitter spreads the scans of many applications over time, so that they do not list the directories at the same moment. The scan is done via WEBHDFS with paged listings (LISTSTATUS_BATCH), see maxSleepTime.
+        """
+        return self._sleepTimeJitter
+
+    @sleepTimeJitter.setter
+    def sleepTimeJitter(self, value):
+        self._sleepTimeJitter = value
+
+    @property
+    def stableScans(self):
+        """
+            int: The optional parameter stableScans specifies the number of scans in which the size and the modification time of a file must be unchanged, before the file name is submitted. Use it to avoid reading files that are still written, for example 2 submits a file when it did not change between two scans. The scan is done via WEBHDFS, see maxSleepTime.
+        """
+        return self._stableScans
+
+    @stableScans.setter
+    def stableScans(self, value):
+        self._stableScans = value
+
     @property
     def strictMode(self):
         """
@@ -969,6 +2821,17 @@ class HdfsDirectoryScan(streamsx.topology.composite.Source):
     def strictMode(self, value):
         self._strictMode = value
 
+    @property
+    def successMarker(self):
+        """
+            str: The optional parameter successMarker specifies the name of a marker file, for example ``_SUCCESS``, that is created by the writer of the directory when all files are complete. The files of the directory are submitted after the marker file exists, the marker file itself is not submitted. The scan is done via WEBHDFS, see maxSleepTime.
+        """
+        return self._successMarker
+
+    @successMarker.setter
+    def successMarker(self, value):
+        self._successMarker = value
+
     @property
     def vmArg(self):
         """
@@ -984,6 +2847,59 @@ class HdfsDirectoryScan(streamsx.topology.composite.Source):
     def populate(self, topology, name, **options):
 
         self.credentials, self.hdfsUri, self.hdfsUser, self.hdfsPassword, self.configPath=_setCredentials(self.localCredentials, topology)
+
+        metadata = _scan_metadata(self.schema)
+        webhdfs_options = (self.maxSleepTime, self.sleepTimeJitter, self.changePollTime, self.scanOrder, self.stableScans, self.successMarker, self.ignoreSuffixes, self.scanChannels, self.shardBy)
+        if isinstance(self.directory, (list, tuple)) and len(self.directory) == 1 and isinstance(self.directory[0], str):
+            # a single directory is a string parameter of the toolkit operator
+            self.directory = self.directory[0]
+        directories = [self.directory] if isinstance(self.directory, str) else self.directory
+        glob = isinstance(directories, (list, tuple)) and (len(directories) != 1 or any(_GLOB_CHARACTERS.search(str(d)) for d in directories))
+        if metadata or glob or any(option is not None for option in webhdfs_options):
+            # scan via WEBHDFS by a Python source
+            if not isinstance(directories, (list, tuple)) or not all(isinstance(d, str) for d in directories):
+                raise TypeError(self.directory)
+            if self.scanOrder is not None and self.scanOrder not in _SCAN_ORDERS:
+                raise ValueError("Invalid scanOrder value. Valid values are: " + ', '.join(_SCAN_ORDERS))
+            if self.stableScans is not None and self.stableScans < 1:
+                raise ValueError("Invalid stableScans value. Value must be at least 1.")
+            if self.sleepTimeJitter is not None and not 0 <= self.sleepTimeJitter < 1:
+                raise ValueError("Invalid sleepTimeJitter value. Value must be at least 0 and less than 1.")
+            if self.scanChannels is not None and self.scanChannels < 1:
+                raise ValueError("Invalid scanChannels value. Value must be at least 1.")
+            if self.shardBy is not None and self.shardBy not in _SHARD_KEYS:
+                raise ValueError("Invalid shardBy value. Valid values are: " + ', '.join(_SHARD_KEYS))
+            _check_webhdfs_options(self, _OPERATOR_ONLY_OPTIONS, "the scan via WEBHDFS")
+            attribute = _scan_attribute(self.schema)
+            client = _webhdfs_client(self.hdfsUri, self.hdfsUser, self.hdfsPassword, self.credentials)
+            channels = int(self.scanChannels) if self.scanChannels is not None else 1
+            _add_python_dependency(topology)
+            outputs = []
+            for channel in range(channels):
+                scanner = _WebHdfsDirectoryScan(client, self.directory, \
+                            pattern=self.pattern, \
+                            init_delay=self.initDelay, \
+                            sleep_time=self.sleepTime, \
+                            max_sleep_time=self.maxSleepTime, \
+                            jitter=self.sleepTimeJitter, \
+                            attribute=attribute, \
+                            strict=self.strictMode is True, \
+                            change_poll_time=self.changePollTime, \
+                            order=self.scanOrder, \
+                            metadata=metadata, \
+                            stable_scans=self.stableScans, \
+                            success_marker=self.successMarker, \
+                            ignore_suffixes=self.ignoreSuffixes, \
+                            shard=(channel, channels) if channels > 1 else None, \
+                            shard_by=self.shardBy)
+                scanned = topology.source(scanner, name=name+'_'+str(channel) if name and channels > 1 else name)
+                if self.consistentRegionConfig is not None:
+                    _set_consistent(scanned, self.consistentRegionConfig)
+                outputs.append(scanned.as_string() if attribute is None else scanned.map(schema=self.schema))
+            if len(outputs) > 1:
+                _union = streamsx.spl.op.Invoke(topology, 'spl.utility::Union', outputs, schemas=outputs[0].oport.schema, name=name+'Union' if name else None)
+                return _union.outputs[0]
+            return outputs[0]
   
         if self.reconnectionBound is not None:
             self.reconnectionBound = streamsx.spl.types.int32(self.reconnectionBound)
@@ -993,6 +2909,7 @@ class HdfsDirectoryScan(streamsx.topology.composite.Source):
             self.sleepTime = streamsx.spl.types.float64(self.sleepTime)
         if self.initDelay is not None:
             self.initDelay = streamsx.spl.types.float64(self.initDelay)
+        self.vmArg = _connection_vm_args(self.vmArg, self.hdfsUri, self.credentials, self.maxConnectionsPerHost)
 
         if self.strictMode is not None:
             if self.strictMode is True:
@@ -1027,6 +2944,8 @@ class HdfsDirectoryScan(streamsx.topology.composite.Source):
                         vmArg=self.vmArg, \
                         name=name)
 
+        if self.consistentRegionConfig is not None:
+            return _set_consistent(_op.stream, self.consistentRegionConfig)
         return _op.stream
 
 
@@ -1054,6 +2973,23 @@ class HdfsFileSink(streamsx.topology.composite.ForEach):
         fsink = hdfs.HdfsFileSink(file=streamsx.spl.op.Expression.expression('pytest1/sample4%FILENUM.txt''), **config)
         to_file.for_each(fsink)
 
+    Example for packing many small payloads into container files of 128 MB with the value of the attribute ``fileName`` as record key,
+    instead of writing a file per payload. The records are read with :py:class:`HdfsFileSource` in container mode::
+
+        payloads = topo.source(...).map(schema=StreamSchema('tuple<rstring fileName, blob payload>'))
+        payloads.for_each(hdfs.HdfsFileSink(credentials=credentials, file='/user/hdfs/iot/payloads%FILENUM.seq', fileAttributeName='fileName', containerSize=128*1024*1024))
+
+        records = container_files.map(hdfs.HdfsFileSource(credentials=credentials, containerMode=True))
+
+    The records of a key are looked up via the index files, the input tuples contain the container and the key::
+
+        lookups = topo.source(...).map(schema=StreamSchema('tuple<rstring container, rstring key>'))
+        records = lookups.map(hdfs.HdfsFileSource(credentials=credentials, containerMode=True, containerKeyAttribute='key'))
+
+    Example for committing the written lines every 200 milliseconds via WEBHDFS, so that readers that tail the file see the lines with low latency::
+
+        lines.for_each(hdfs.HdfsFileSink(credentials=credentials, file='/user/hdfs/log/lines%FILENUM.txt', durability='hflush', durabilityInterval=200, timePerFile=3600))
+
     Attributes
     ----------
     credentials : dict|str
@@ -1068,36 +3004,59 @@ class HdfsFileSink(streamsx.topology.composite.ForEach):
     def __init__(self, credentials, file, **options):
         self.file = file
         self.localCredentials = credentials
+        self.alignToBlock = None
         self.appConfigName = None
+        self.append = None
         self.authKeytab = None
         self.authPrincipal = None
         self.bytesPerFile = None
         self.closeOnPunct = None
         self.configPath = None
+        self.containerSize = None
         self.credFile = None
         self.credentials = None
+        self.dedupAttribute = None
+        self.dedupErrorRate = None
+        self.dedupMemory = None
+        self.dedupWindow = None
+        self.durability = None
+        self.durabilityInterval = None
         self.encoding = None
         self.fileAttributeName = None
         self.schema = None
         self.hdfsPassword = None
         self.hdfsUri = None
         self.hdfsUser = None
+        self.indexInterval = None
         self.keyStorePassword = None
         self.keyStorePath = None
         self.libPath = None
+        self.maxConnectionsPerHost = None
+        self.minBytesPerFile = None
+        self.outputBlockSize = None
         self.policyFilePath = None
         self.reconnectionBound = None
         self.reconnectionInterval = None
         self.reconnectionPolicy = None
+        self.replication = None
+        self.sortAttribute = None
+        self.sortBufferSize = None
+        self.sortFileSize = None
+        self.sortSpillDirectory = None
         self.tempFile = None
         self.timeFormat = None
         self.timePerFile = None
         self.tuplesPerFile = None
         self.vmArg = None
+        self.writeBufferSize = None
         
         
+        if 'alignToBlock' in options:
+            self.alignToBlock = options.get('alignToBlock')
         if 'appConfigName' in options:
             self.appConfigName = options.get('appConfigName')
+        if 'append' in options:
+            self.append = options.get('append')
         if 'authKeytab' in options:
             self.authKeytab = options.get('authKeytab')
         if 'authPrincipal' in options:
@@ -1108,10 +3067,24 @@ class HdfsFileSink(streamsx.topology.composite.ForEach):
             self.closeOnPunct = options.get('closeOnPunct')
         if 'configPath' in options:
             self.configPath = options.get('configPath')
+        if 'containerSize' in options:
+            self.containerSize = options.get('containerSize')
         if 'credFile' in options:
             self.credFile = options.get('credFile')
         if 'credentials' in options:
             self.credentials = options.get('credentials')
+        if 'dedupAttribute' in options:
+            self.dedupAttribute = options.get('dedupAttribute')
+        if 'dedupErrorRate' in options:
+            self.dedupErrorRate = options.get('dedupErrorRate')
+        if 'dedupMemory' in options:
+            self.dedupMemory = options.get('dedupMemory')
+        if 'dedupWindow' in options:
+            self.dedupWindow = options.get('dedupWindow')
+        if 'durability' in options:
+            self.durability = options.get('durability')
+        if 'durabilityInterval' in options:
+            self.durabilityInterval = options.get('durabilityInterval')
         if 'encoding' in options:
             self.encoding = options.get('encoding')
         if 'fileAttributeName' in options:
@@ -1122,12 +3095,20 @@ class HdfsFileSink(streamsx.topology.composite.ForEach):
             self.hdfsUri = options.get('hdfsUri')
         if 'hdfsUser' in options:
             self.hdfsUser = options.get('hdfsUser')
+        if 'indexInterval' in options:
+            self.indexInterval = options.get('indexInterval')
         if 'keyStorePassword' in options:
             self.keyStorePassword = options.get('keyStorePassword')
         if 'keyStorePath' in options:
             self.keyStorePath = options.get('keyStorePath')
         if 'libPath' in options:
             self.libPath = options.get('libPath')
+        if 'maxConnectionsPerHost' in options:
+            self.maxConnectionsPerHost = options.get('maxConnectionsPerHost')
+        if 'minBytesPerFile' in options:
+            self.minBytesPerFile = options.get('minBytesPerFile')
+        if 'outputBlockSize' in options:
+            self.outputBlockSize = options.get('outputBlockSize')
         if 'policyFilePath' in options:
             self.policyFilePath = options.get('policyFilePath')
         if 'reconnectionBound' in options:
@@ -1136,6 +3117,16 @@ class HdfsFileSink(streamsx.topology.composite.ForEach):
             self.reconnectionInterval = options.get('reconnectionInterval')
         if 'reconnectionPolicy' in options:
             self.reconnectionPolicy = options.get('reconnectionPolicy')
+        if 'replication' in options:
+            self.replication = options.get('replication')
+        if 'sortAttribute' in options:
+            self.sortAttribute = options.get('sortAttribute')
+        if 'sortBufferSize' in options:
+            self.sortBufferSize = options.get('sortBufferSize')
+        if 'sortFileSize' in options:
+            self.sortFileSize = options.get('sortFileSize')
+        if 'sortSpillDirectory' in options:
+            self.sortSpillDirectory = options.get('sortSpillDirectory')
         if 'tempFile' in options:
             self.tempFile = options.get('tempFile')
         if 'timeFormat' in options:
@@ -1146,8 +3137,21 @@ class HdfsFileSink(streamsx.topology.composite.ForEach):
             self.tuplesPerFile = options.get('tuplesPerFile')
         if 'vmArg' in options:
             self.vmArg = options.get('vmArg')
+        if 'writeBufferSize' in options:
+            self.writeBufferSize = options.get('writeBufferSize')
             
  
+    @property
+    def alignToBlock(self):
+        """
+            int: This optional parameter enables the block aligned files. The file is closed before the tuple that would let the file size exceed alignToBlock times the block size, so that the files end just under a block boundary and the readers get whole blocks. The block size is given by outputBlockSize or the default block size of 128 MB. The alignToBlock parameter cannot be used with the bytesPerFile, tuplesPerFile and minBytesPerFile parameters, it can be used with timePerFile.
+        """
+        return self._alignToBlock
+
+    @alignToBlock.setter
+    def alignToBlock(self, value):
+        self._alignToBlock = value
+
     @property
     def appConfigName(self):
         """
@@ -1159,6 +3163,17 @@ class HdfsFileSink(streamsx.topology.composite.ForEach):
     def appConfigName(self, value):
         self._appConfigName = value
 
+    @property
+    def append(self):
+        """
+            bool: The optional parameter append enables the append mode. When the sink is started, it continues with the existing file with the highest %FILENUM number and appends the tuples to this file, unless the file has reached bytesPerFile, and the following files continue the numbering. Existing files are not overwritten, when another writer created a file with the same name, the next number is used. The append mode writes via WEBHDFS like durability ``'hflush'``, with the same supported parameters.
+        """
+        return self._append
+
+    @append.setter
+    def append(self, value):
+        self._append = value
+
     @property
     def authKeytab(self):
         """
@@ -1185,7 +3200,7 @@ class HdfsFileSink(streamsx.topology.composite.ForEach):
     @property
     def bytesPerFile(self):
         """
-            int: This parameter specifies the approximate size of the output file, in bytes. When the file size exceeds the specified number of bytes, the current output file is closed and a new file is opened. The bytesPerFile, timePerFile, and tuplesPerFile parameters are mutually exclusive; you can specify only one of these parameters at a time.
+            int: This parameter specifies the approximate size of the output file, in bytes. When the file size exceeds the specified number of bytes, the current output file is closed and a new file is opened. If more than one of the bytesPerFile, timePerFile, and tuplesPerFile parameters is specified, then the file is closed when the first of the limits is reached, for example to keep the files near the HDFS block size under high load and to limit the latency when the load is low.
         """
         return self._bytesPerFile
 
@@ -1216,6 +3231,17 @@ class HdfsFileSink(streamsx.topology.composite.ForEach):
     def configPath(self, value):
         self._configPath = value
 
+    @property
+    def containerSize(self):
+        """
+            int: This optional parameter enables the container mode. The tuples are packed as records into container files of approximately this size in bytes, instead of writing them to a file each. The key of a record is the value of the fileAttributeName attribute or a generated unique name, the value is the other attribute of the input tuple. The file parameter specifies the name of the container files and must contain %FILENUM . For each container file an index file with the suffix .idx is written, see indexInterval. The bytesPerFile, timePerFile and tuplesPerFile parameters cannot be used in container mode.
+        """
+        return self._containerSize
+
+    @containerSize.setter
+    def containerSize(self, value):
+        self._containerSize = value
+
     @property
     def credFile(self):
         """
@@ -1238,6 +3264,72 @@ class HdfsFileSink(streamsx.topology.composite.ForEach):
     def credentials(self, value):
         self._credentials = value
 
+    @property
+    def dedupAttribute(self):
+        """
+            str: The optional parameter dedupAttribute specifies the attribute, whose value is the key for the deduplication with dedupWindow. Without this parameter the complete tuple is the key.
+        """
+        return self._dedupAttribute
+
+    @dedupAttribute.setter
+    def dedupAttribute(self, value):
+        self._dedupAttribute = value
+
+    @property
+    def dedupErrorRate(self):
+        """
+            float: The optional parameter dedupErrorRate specifies the false positive rate of the deduplication, the rate of the tuples that are dropped although their key was not seen before. The rate is kept while the number of keys received within dedupWindow fits into dedupMemory. The default value is 0.001.
+        """
+        return self._dedupErrorRate
+
+    @dedupErrorRate.setter
+    def dedupErrorRate(self, value):
+        self._dedupErrorRate = value
+
+    @property
+    def dedupMemory(self):
+        """
+            int: The optional parameter dedupMemory specifies the memory, in bytes, of the deduplication filter. Together with dedupErrorRate it determines the number of keys per window, for which the error rate is kept, for example about 4.6 million keys with the default values. When more keys are received, the keys are recognized for a shorter time than dedupWindow. The default value is 16 MB.
+        """
+        return self._dedupMemory
+
+    @dedupMemory.setter
+    def dedupMemory(self, value):
+        self._dedupMemory = value
+
+    @property
+    def dedupWindow(self):
+        """
+            float: The optional parameter dedupWindow enables the deduplication of the tuples before they are written, for example of tuples that are replayed after a failure. A tuple is dropped if its key was received within dedupWindow seconds before. The keys are kept in a Bloom filter with bounded memory, that is checkpointed in a consistent region.
+        """
+        return self._dedupWindow
+
+    @dedupWindow.setter
+    def dedupWindow(self, value):
+        self._dedupWindow = value
+
+    @property
+    def durability(self):
+        """
+            str: The optional parameter durability specifies when the written data becomes visible and durable. With the default value ``'none'`` the data is visible when the file is closed. With ``'hflush'`` or ``'hsync'`` the tuples are written via WEBHDFS and the data is committed every durabilityInterval milliseconds, so that readers that tail the file see the data with low latency and many tuples share one commit. WEBHDFS commits are visible like after hflush. WEBHDFS does not offer hsync, so ``'hsync'`` runs exactly the same commits as ``'hflush'``: the data is only synced to disk when the datanodes set dfs.datanode.synconclose, and a warning is logged when the application is built. These values require WEBHDFS credentials and support the file, encoding, bytesPerFile, timePerFile, tuplesPerFile, outputBlockSize and replication parameters, the %TIME variable of the file name is replaced in the format yyyyMMdd_HHmmss and timeFormat cannot be used. The parameters closeOnPunct, appConfigName, authKeytab, authPrincipal, credFile, keyStorePassword, keyStorePath, libPath, maxConnectionsPerHost, policyFilePath, reconnectionBound, reconnectionInterval, reconnectionPolicy and vmArg of the toolkit operator cannot be used with these values and with append.
+        """
+        return self._durability
+
+    @durability.setter
+    def durability(self, value):
+        self._durability = value
+
+    @property
+    def durabilityInterval(self):
+        """
+            float: The optional parameter durabilityInterval specifies the time, in milliseconds, between the commits of the written data when durability is ``'hflush'`` or ``'hsync'`` or in append mode. The default value is 1000.
+        """
+        return self._durabilityInterval
+
+    @durabilityInterval.setter
+    def durabilityInterval(self, value):
+        self._durabilityInterval = value
+
     @property
     def encoding(self):
         """
@@ -1311,6 +3403,17 @@ class HdfsFileSink(streamsx.topology.composite.ForEach):
     def hdfsUser(self, value):
         self._hdfsUser = value
 
+    @property
+    def indexInterval(self):
+        """
+            int: This optional parameter specifies the number of records per entry of the index files that are written in container mode. An index entry is a line with the minimum key, maximum key, offset, length in bytes and number of records of a block of records, separated by tabs. The default value is 1 , an entry per record. A larger value gives a compact index that still limits a key lookup to a single block.
+        """
+        return self._indexInterval
+
+    @indexInterval.setter
+    def indexInterval(self, value):
+        self._indexInterval = value
+
     @property
     def keyStorePassword(self):
         """
@@ -1346,6 +3449,39 @@ class HdfsFileSink(streamsx.topology.composite.ForEach):
     def libPath(self, value):
         self._libPath = value
 
+    @property
+    def maxConnectionsPerHost(self):
+        """
+            int: The optional parameter maxConnectionsPerHost specifies the number of idle connections per host that are kept alive for reuse when connecting via WEBHDFS. This is a tuning knob of the JVM keep-alive cache (system property http.maxConnections, default value 5), it does not avoid the redirect of each request from the namenode to a datanode.
+        """
+        return self._maxConnectionsPerHost
+
+    @maxConnectionsPerHost.setter
+    def maxConnectionsPerHost(self, value):
+        self._maxConnectionsPerHost = value
+
+    @property
+    def minBytesPerFile(self):
+        """
+            int: This optional parameter specifies the minimum size of the output file, in bytes. The file is not closed by the timePerFile and tuplesPerFile limits before it reaches this size. If this parameter is specified, then the time is checked when a tuple is received, so that a file remains open without tuples. See bytesPerFile for the combination of limits.
+        """
+        return self._minBytesPerFile
+
+    @minBytesPerFile.setter
+    def minBytesPerFile(self, value):
+        self._minBytesPerFile = value
+
+    @property
+    def outputBlockSize(self):
+        """
+            int: This optional parameter specifies the HDFS block size, in bytes, of the files that are created by the operator, for example 268435456 for 256 MB. The setting is passed as dfs.blocksize in the Hadoop configuration of the operator.
+        """
+        return self._outputBlockSize
+
+    @outputBlockSize.setter
+    def outputBlockSize(self, value):
+        self._outputBlockSize = value
+
     @property
     def policyFilePath(self):
         """
@@ -1394,10 +3530,65 @@ class HdfsFileSink(streamsx.topology.composite.ForEach):
         self._reconnectionPolicy = value
 
 
+    @property
+    def replication(self):
+        """
+            int: This optional parameter specifies the replication factor of the files that are created by the operator. The setting is passed as dfs.replication in the Hadoop configuration of the operator.
+        """
+        return self._replication
+
+    @replication.setter
+    def replication(self, value):
+        self._replication = value
+
+    @property
+    def sortAttribute(self):
+        """
+            str: The optional parameter sortAttribute specifies the key attribute for sortBufferSize. The other attribute of the tuples is written. Without this parameter the tuples are sorted by the first attribute, or by the line for ``CommonSchema.String``.
+        """
+        return self._sortAttribute
+
+    @sortAttribute.setter
+    def sortAttribute(self, value):
+        self._sortAttribute = value
+
+    @property
+    def sortBufferSize(self):
+        """
+            int: The optional parameter sortBufferSize enables the sorted files. The tuples are buffered up to sortBufferSize bytes in memory and sorted by the key, so that each file is written in key order and downstream jobs can merge-join the files and prune them by key range. The file parameter must contain the %FILENUM, %MINKEY and %MAXKEY variables, that are replaced by the number, the smallest and the largest key of the file. A file is complete when it has reached sortFileSize or timePerFile, which is checked when a tuple is received, or on the final punctuation. Window punctuations of the input stream do not end a file. This parameter cannot be used with the bytesPerFile, tuplesPerFile, minBytesPerFile, alignToBlock, containerSize, fileAttributeName, durability and append parameters.
+        """
+        return self._sortBufferSize
+
+    @sortBufferSize.setter
+    def sortBufferSize(self, value):
+        self._sortBufferSize = value
+
+    @property
+    def sortFileSize(self):
+        """
+            int: The optional parameter sortFileSize specifies the size, in bytes, of the sorted files. When it is greater than sortBufferSize, the sorted buffers are spilled to local temporary files and merged when the file is written. The default value is sortBufferSize.
+        """
+        return self._sortFileSize
+
+    @sortFileSize.setter
+    def sortFileSize(self, value):
+        self._sortFileSize = value
+
+    @property
+    def sortSpillDirectory(self):
+        """
+            str: The optional parameter sortSpillDirectory specifies the local directory for the spilled buffers of sortFileSize. The default is the temporary directory of the system.
+        """
+        return self._sortSpillDirectory
+
+    @sortSpillDirectory.setter
+    def sortSpillDirectory(self, value):
+        self._sortSpillDirectory = value
+
     @property
     def tempFile(self):
         """
-            str: This parameter specifies the name of the file that the operator writes to. When the file is closed the file is renamed to the final filename defined by the file parameter or fileAttributeName parameter. 
+            str: This parameter specifies the name of the file that the operator writes to. When the file is closed the file is renamed to the final filename defined by the file parameter or fileAttributeName parameter. Set this parameter when the operator is part of a consistent region, so that only complete files are visible with the final filename and a file that is written while the region is reset is not committed. 
         """
         return self._tempFile
 
@@ -1421,7 +3612,7 @@ class HdfsFileSink(streamsx.topology.composite.ForEach):
     @property
     def timePerFile(self):
         """
-            float: This parameter specifies the approximate time, in seconds, after which the current output file is closed and a new file is opened for writing. The bytesPerFile, timePerFile, and tuplesPerFile parameters are mutually exclusive; you can specify only one of these parameters. 
+            float: This parameter specifies the approximate time, in seconds, after which the current output file is closed and a new file is opened for writing. If more than one of the bytesPerFile, timePerFile, and tuplesPerFile parameters is specified, then the file is closed when the first limit is reached. 
         """
         return self._timePerFile
 
@@ -1432,7 +3623,7 @@ class HdfsFileSink(streamsx.topology.composite.ForEach):
     @property
     def tuplesPerFile(self):
         """
-            int: This parameter specifies the maximum number of tuples that can be received for each output file. When the specified number of tuples are received, the current output file is closed and a new file is opened for writing. The bytesPerFile, timePerFile, and tuplesPerFile parameters are mutually exclusive; you can specify only one of these parameters at a time.
+            int: This parameter specifies the maximum number of tuples that can be received for each output file. When the specified number of tuples are received, the current output file is closed and a new file is opened for writing. If more than one of the bytesPerFile, timePerFile, and tuplesPerFile parameters is specified, then the file is closed when the first limit is reached.
         """
         return self._tuplesPerFile
 
@@ -1453,11 +3644,122 @@ class HdfsFileSink(streamsx.topology.composite.ForEach):
 
 
 
+    @property
+    def writeBufferSize(self):
+        """
+            int: The optional parameter writeBufferSize enables the asynchronous writes. The tuples are queued in a buffer of writeBufferSize tuples and written by a dedicated thread, so that the tuple processing continues during latency spikes of HDFS and is blocked only when the buffer is full. Without this parameter the operator writes the tuples synchronously. With durability or append, the parameter limits the tuples that are not committed yet, that are not limited otherwise.
+        """
+        return self._writeBufferSize
+
+    @writeBufferSize.setter
+    def writeBufferSize(self, value):
+        self._writeBufferSize = value
+
     def populate(self, topology, stream, name, **options) -> streamsx.topology.topology.Sink:
 
     
+        output_properties = _output_file_properties(self.outputBlockSize, self.replication)
+        if output_properties and isinstance(self.localCredentials, str) and 'xml' in self.localCredentials:
+            self.localCredentials = _write_hadoop_config(self.localCredentials, output_properties)
         self.credentials, self.hdfsUri, self.hdfsUser, self.hdfsPassword, self.configPath=_setCredentials(self.localCredentials, topology)
+        if output_properties and self.configPath is None:
+            self.configPath = _add_hadoop_config(topology, output_properties)
+
+        if self.dedupWindow is not None:
+            if self.dedupWindow <= 0:
+                raise ValueError("Invalid dedupWindow value. Value must be greater than zero.")
+            errorRate = 0.001 if self.dedupErrorRate is None else self.dedupErrorRate
+            if not 0 < errorRate < 1:
+                raise ValueError("Invalid dedupErrorRate value. Value must be greater than 0 and less than 1.")
+            _add_python_dependency(topology)
+            memory = 16 * 1024 * 1024 if self.dedupMemory is None else int(self.dedupMemory)
+            stream = stream.filter(_DedupFilter(self.dedupWindow, memory, errorRate, self.dedupAttribute), name=name+'Dedup' if name else None)
+
+        if self.sortBufferSize is not None:
+            if self.file is None or '%FILENUM' not in self.file or '%MINKEY' not in self.file or '%MAXKEY' not in self.file:
+                raise ValueError("The file parameter must contain %FILENUM, %MINKEY and %MAXKEY with sortBufferSize")
+            if self.bytesPerFile is not None or self.tuplesPerFile is not None or self.minBytesPerFile is not None or self.alignToBlock is not None or \
+               self.containerSize is not None or self.fileAttributeName is not None or self.durability not in (None, 'none') or self.append is True:
+                raise ValueError("The parameters bytesPerFile, tuplesPerFile, minBytesPerFile, alignToBlock, containerSize, fileAttributeName, durability and append cannot be used with sortBufferSize")
+            if self.sortBufferSize <= 0:
+                raise ValueError("Invalid sortBufferSize value. Value must be greater than zero.")
+            _add_python_dependency(topology)
+            fileSize = int(self.sortFileSize) if self.sortFileSize is not None else None
+            policy = _SortedRunPolicy(int(self.sortBufferSize), file_size=fileSize, time_per_file=self.timePerFile, attribute=self.sortAttribute, encoding=self.encoding)
+            sorter = _SortedRunWriter(self.file, spill_directory=self.sortSpillDirectory)
+            # a window per buffer, the window of the pending tuples is aggregated on final punctuation
+            marked = stream.map(policy, name=name+'Buffers' if name else None)
+            buffers = marked.punctor(_is_sort_buffer_end, before=False, name=name+'BufferEnd' if name else None)
+            buffers = buffers.batch('punct').aggregate(_SortedBuffer(self.sortAttribute, self.encoding), name=name+'SortBuffer' if name else None)
+            records = buffers.flat_map(sorter, name=name+'Sort' if name else None)
+            stream = records.map(schema=_SortedRunSchema, name=name+'Run' if name else None)
+            # the sink closes the file when the run name changes
+            self.file = None
+            self.fileAttributeName = 'runName'
+            self.timePerFile = None
+
+        index = None
+        if self.containerSize is not None:
+            if self.bytesPerFile is not None or self.timePerFile is not None or self.tuplesPerFile is not None or self.alignToBlock is not None:
+                raise ValueError("The parameters bytesPerFile, timePerFile, tuplesPerFile and alignToBlock cannot be used with containerSize")
+            if self.file is None or '%FILENUM' not in self.file:
+                raise ValueError("The file parameter must contain %FILENUM in container mode")
+            _add_python_dependency(topology)
+            indexInterval = 1 if self.indexInterval is None else int(self.indexInterval)
+            packed = stream.map(_ContainerWriter(self.file, int(self.containerSize), self.fileAttributeName, indexInterval), schema=_ContainerPackSchema, name=name+'Pack' if name else None)
+            stream = streamsx.spl.op.Map('spl.relational::Functor', packed, schema='tuple<blob record, rstring containerName>').stream
+            records = streamsx.spl.op.Map('spl.relational::Functor', packed, schema='tuple<rstring containerName, rstring key, uint64 offset, uint64 length, boolean blockStart>').stream
+            # a window per block, the tumbling window of the last block is aggregated on final punctuation
+            blocks = records.punctor(_is_block_start, before=True, name=name+'Blocks' if name else None)
+            index = blocks.batch('punct').aggregate(_container_index_entry, name=name+'IndexEntry' if name else None)
+            index = index.map(schema='tuple<rstring indexEntry, rstring indexName>', name=name+'IndexEntries' if name else None)
+            self.file = None
+            self.fileAttributeName = 'containerName'
        
+        if self.durability is not None and self.durability not in _DURABILITY_LEVELS:
+            raise ValueError("Invalid durability value. Valid values are: " + ', '.join(_DURABILITY_LEVELS))
+        if (self.durability is not None and self.durability != 'none') or self.append is True:
+            # write via WEBHDFS by a Python sink with group commit
+            if self.containerSize is not None or self.alignToBlock is not None or self.minBytesPerFile is not None or self.fileAttributeName is not None or self.tempFile is not None or self.timeFormat is not None:
+                raise ValueError("The parameters containerSize, alignToBlock, minBytesPerFile, fileAttributeName, tempFile and timeFormat cannot be used with durability and append")
+            _check_webhdfs_options(self, ('closeOnPunct',) + _OPERATOR_ONLY_OPTIONS, "durability and append")
+            if self.durability == 'hsync':
+                trace.warning("WEBHDFS does not offer hsync, the durability 'hsync' commits like 'hflush'. The data is synced to disk only if the datanodes set dfs.datanode.synconclose.")
+            interval = 1000.0 if self.durabilityInterval is None else float(self.durabilityInterval)
+            if interval <= 0:
+                raise ValueError("Invalid durabilityInterval value. Value must be greater than zero.")
+            client = _webhdfs_client(self.hdfsUri, self.hdfsUser, self.hdfsPassword, self.credentials)
+            _add_python_dependency(topology)
+            writer = _WebHdfsFileWriter(client, self.file, interval / 1000.0, \
+                        encoding=self.encoding, \
+                        bytes_per_file=self.bytesPerFile, \
+                        time_per_file=self.timePerFile, \
+                        tuples_per_file=self.tuplesPerFile, \
+                        block_size=self.outputBlockSize, \
+                        replication=self.replication, \
+                        append=self.append is True, \
+                        max_buffered=self.writeBufferSize)
+            return stream.for_each(writer, name=name)
+
+        if self.alignToBlock is not None:
+            if self.bytesPerFile is not None or self.tuplesPerFile is not None or self.minBytesPerFile is not None:
+                raise ValueError("The parameters bytesPerFile, tuplesPerFile and minBytesPerFile cannot be used with alignToBlock")
+            _add_python_dependency(topology)
+            blockSize = int(self.outputBlockSize) if self.outputBlockSize is not None else _DEFAULT_BLOCK_SIZE
+            stream = stream.punctor(_BlockAlignPolicy(int(self.alignToBlock) * blockSize, self.timePerFile), before=True, name=name+'Align' if name else None)
+            self.closeOnPunct = True
+        elif _is_roll_policy(self.bytesPerFile, self.timePerFile, self.tuplesPerFile, self.minBytesPerFile):
+            # the bytesPerFile, timePerFile and tuplesPerFile parameters are mutually exclusive in the operator
+            _add_python_dependency(topology)
+            stream = stream.punctor(_FileRollPolicy(self.bytesPerFile, self.timePerFile, self.tuplesPerFile, self.minBytesPerFile), before=False, name=name+'Roll' if name else None)
+            self.timePerFile = self.timePerFile if self.minBytesPerFile is None else None
+            self.tuplesPerFile = None
+            self.bytesPerFile = None
+            self.closeOnPunct = True
+        if self.writeBufferSize is not None:
+            # the split queues the tuples and the punctuations and submits them to the sink in its own thread
+            _buffer = streamsx.spl.op.Invoke(topology, 'spl.utility::ThreadedSplit', stream, schemas=[stream.oport.schema], params={'bufferSize': streamsx.spl.types.uint32(self.writeBufferSize)}, name=name+'Buffer' if name else None)
+            stream = _buffer.outputs[0]
         if self.bytesPerFile is not None:
             self.bytesPerFile = streamsx.spl.types.int64(self.bytesPerFile)
         if self.reconnectionBound is not None:
@@ -1468,6 +3770,7 @@ class HdfsFileSink(streamsx.topology.composite.ForEach):
             self.timePerFile = streamsx.spl.types.float64(self.timePerFile)
         if self.tuplesPerFile is not None:
             self.tuplesPerFile = streamsx.spl.types.int64(self.tuplesPerFile)
+        self.vmArg = _connection_vm_args(self.vmArg, self.hdfsUri, self.credentials, self.maxConnectionsPerHost)
 
         if self.closeOnPunct is not None:
             if self.closeOnPunct is True:
@@ -1505,12 +3808,20 @@ class HdfsFileSink(streamsx.topology.composite.ForEach):
                         vmArg=self.vmArg, \
                         name=name)
 
+        if index is not None:
+            _index_op = _HDFS2FileSink(stream=index, fileAttributeName='indexName', name=name+'Index' if name else None)
+            # the index file is closed when the index name changes, not by the window punctuation of the block windows
+            _index_op.params.update({k: v for k, v in _op.params.items() if k not in ('fileAttributeName', 'tempFile', 'closeOnPunct')})
+
         return streamsx.topology.topology.Sink(_op)
 
 class HdfsFileSource(streamsx.topology.composite.Map):
     """
     Reads HDFS files given by input stream and generates tuples with the file content on the output stream.
 
+    If the input stream is part of a consistent region, for example started by :py:class:`HdfsDirectoryScan`, then the operator joins this region.
+    After a reset of the region a file is read again from the beginning, the operator does not resume at an offset.
+
 
     Example, scanning for HDFS files in pytest directory and reading files via HdfsFileSource::
 
@@ -1555,6 +3866,9 @@ class HdfsFileSource(streamsx.topology.composite.Map):
         self.authKeytab = None
         self.authPrincipal = None
         self.blockSize = None        
+        self.containerKeyAttribute = None
+        self.containerKeyRangeAttributes = None
+        self.containerMode = None
         self.encoding = None        
         self.localCredentials = credentials
         self.credentials = None
@@ -1569,7 +3883,10 @@ class HdfsFileSource(streamsx.topology.composite.Map):
         self.keyStorePassword = None
         self.keyStorePath = None
         self.libPath = None
+        self.maxBytesPerSecond = None
+        self.maxConnectionsPerHost = None
         self.policyFilePath = None
+        self.prefetchDepth = None
         self.reconnectionBound = None
         self.reconnectionInterval = None
         self.reconnectionPolicy = None
@@ -1586,6 +3903,12 @@ class HdfsFileSource(streamsx.topology.composite.Map):
             self.blockSize = options.get('blockSize')
         if 'configPath' in options:
             self.configPath = options.get('configPath')
+        if 'containerKeyAttribute' in options:
+            self.containerKeyAttribute = options.get('containerKeyAttribute')
+        if 'containerKeyRangeAttributes' in options:
+            self.containerKeyRangeAttributes = options.get('containerKeyRangeAttributes')
+        if 'containerMode' in options:
+            self.containerMode = options.get('containerMode')
         if 'credFile' in options:
             self.credFile = options.get('credFile')
         if 'encoding' in options:
@@ -1608,8 +3931,14 @@ class HdfsFileSource(streamsx.topology.composite.Map):
             self.keyStorePath = options.get('keyStorePath')
         if 'libPath' in options:
             self.libPath = options.get('libPath')
+        if 'maxBytesPerSecond' in options:
+            self.maxBytesPerSecond = options.get('maxBytesPerSecond')
+        if 'maxConnectionsPerHost' in options:
+            self.maxConnectionsPerHost = options.get('maxConnectionsPerHost')
         if 'policyFilePath' in options:
             self.policyFilePath = options.get('policyFilePath')
+        if 'prefetchDepth' in options:
+            self.prefetchDepth = options.get('prefetchDepth')
         if 'reconnectionBound' in options:
             self.reconnectionBound = options.get('reconnectionBound')
         if 'reconnectionInterval' in options:
@@ -1677,6 +4006,39 @@ class HdfsFileSource(streamsx.topology.composite.Map):
     def configPath(self, value):
         self._configPath = value
 
+    @property
+    def containerKeyAttribute(self):
+        """
+            str: This optional parameter specifies the attribute of the input tuple with the key of a record lookup in container mode. The index file of the container selects the blocks that can contain the key, and only these byte ranges of the container are read. The container is specified by the file parameter or by the first other attribute of the input tuple. Lookups are done via WEBHDFS and require WEBHDFS credentials.
+        """
+        return self._containerKeyAttribute
+
+    @containerKeyAttribute.setter
+    def containerKeyAttribute(self, value):
+        self._containerKeyAttribute = value
+
+    @property
+    def containerKeyRangeAttributes(self):
+        """
+            list: This optional parameter specifies the two attributes of the input tuple with the minimum and the maximum key of a range lookup in container mode. The records with keys in the range, including the bounds, are read from the blocks that the index file selects, like with containerKeyAttribute.
+        """
+        return self._containerKeyRangeAttributes
+
+    @containerKeyRangeAttributes.setter
+    def containerKeyRangeAttributes(self, value):
+        self._containerKeyRangeAttributes = value
+
+    @property
+    def containerMode(self):
+        """
+            bool: This optional parameter enables the container mode. The operator reads container files written by HdfsFileSink in container mode and generates a tuple for each record with schema :py:const:`~streamsx.hdfs.ContainerRecordSchema`. The schema parameter is ignored in container mode.
+        """
+        return self._containerMode
+
+    @containerMode.setter
+    def containerMode(self, value):
+        self._containerMode = value
+
     @property
     def credFile(self):
         """
@@ -1805,6 +4167,28 @@ class HdfsFileSource(streamsx.topology.composite.Map):
     def libPath(self, value):
         self._libPath = value
 
+    @property
+    def maxBytesPerSecond(self):
+        """
+            int: The optional parameter maxBytesPerSecond limits the rate of the read data, in bytes per second, for example to avoid the starvation of other applications on shared datanodes. When the rate is exceeded, the operator is blocked on its output port, so that it does not read ahead and the memory for buffered tuples stays bounded. Use the blockSize parameter to bound the size of the tuples when reading binary files.
+        """
+        return self._maxBytesPerSecond
+
+    @maxBytesPerSecond.setter
+    def maxBytesPerSecond(self, value):
+        self._maxBytesPerSecond = value
+
+    @property
+    def maxConnectionsPerHost(self):
+        """
+            int: The optional parameter maxConnectionsPerHost specifies the number of idle connections per host that are kept alive for reuse when connecting via WEBHDFS. This is a tuning knob of the JVM keep-alive cache (system property http.maxConnections, default value 5), it does not avoid the redirect of each request from the namenode to a datanode.
+        """
+        return self._maxConnectionsPerHost
+
+    @maxConnectionsPerHost.setter
+    def maxConnectionsPerHost(self, value):
+        self._maxConnectionsPerHost = value
+
     @property
     def policyFilePath(self):
         """
@@ -1817,6 +4201,17 @@ class HdfsFileSource(streamsx.topology.composite.Map):
     def policyFilePath(self, value):
         self._policyFilePath = value
 
+    @property
+    def prefetchDepth(self):
+        """
+            int: The optional parameter prefetchDepth specifies the number of queued files that are opened and read ahead while the current file is processed. The files are distributed to prefetchDepth + 1 readers, a reader gets the next file as soon as it has no queued file. This hides the latency of the namenode lookup and the datanode connection for each file. The files are processed in parallel: the tuples of a file keep their order, but the tuples and the punctuations that end the files of different readers are interleaved in the output. Do not use prefetchDepth when the downstream operators rely on the file order or on a window per file, for example :py:func:`write` with ``closeOnPunct``. The maxBytesPerSecond limit applies to the total rate of all readers, a single active reader can use the whole rate.
+        """
+        return self._prefetchDepth
+
+    @prefetchDepth.setter
+    def prefetchDepth(self, value):
+        self._prefetchDepth = value
+
     @property
     def reconnectionBound(self):
         """
@@ -1877,34 +4272,78 @@ class HdfsFileSource(streamsx.topology.composite.Map):
             self.reconnectionBound = streamsx.spl.types.int32(self.reconnectionBound)
         if self.reconnectionInterval is not None:
             self.reconnectionInterval = streamsx.spl.types.float64(self.reconnectionInterval)
-             
-
-        _op = _HDFS2FileSource(stream=stream, \
-                        schema=self.schema, \
-                        appConfigName=self.appConfigName, \
-                        authKeytab=self.authKeytab, \
-                        authPrincipal=self.authPrincipal, \
-                        blockSize=self.blockSize, \
-                        encoding=self.encoding, \
-                        configPath=self.configPath, \
-                        credFile=self.credFile, \
-                        credentials=self.credentials, \
-                        file=self.file, \
-                        hdfsPassword=self.hdfsPassword, \
-                        hdfsUri=self.hdfsUri, \
-                        hdfsUser=self.hdfsUser, \
-                        initDelay=self.initDelay, \
-                        keyStorePassword=self.keyStorePassword, \
-                        keyStorePath=self.keyStorePath, \
-                        libPath=self.libPath, \
-                        policyFilePath=self.policyFilePath, \
-                        reconnectionBound=self.reconnectionBound, \
-                        reconnectionInterval=self.reconnectionInterval, \
-                        reconnectionPolicy=self.reconnectionPolicy, \
-                        vmArg=self.vmArg, \
-                        name=name)
-
-        return _op.outputs[0]
+        if self.maxBytesPerSecond is not None and self.maxBytesPerSecond <= 0:
+            raise ValueError("Invalid maxBytesPerSecond value. Value must be greater than zero.")
+        self.vmArg = _connection_vm_args(self.vmArg, self.hdfsUri, self.credentials, self.maxConnectionsPerHost)
+        if self.containerKeyAttribute is not None or self.containerKeyRangeAttributes is not None:
+            if self.containerMode is not True:
+                raise ValueError("The parameters containerKeyAttribute and containerKeyRangeAttributes require containerMode")
+            if self.containerKeyAttribute is not None and self.containerKeyRangeAttributes is not None:
+                raise ValueError("The parameters containerKeyAttribute and containerKeyRangeAttributes cannot be used together")
+            if self.containerKeyRangeAttributes is not None and len(self.containerKeyRangeAttributes) != 2:
+                raise ValueError("Invalid containerKeyRangeAttributes value. Value must be a list of two attribute names.")
+            if self.prefetchDepth is not None or self.maxBytesPerSecond is not None:
+                raise ValueError("The parameters prefetchDepth and maxBytesPerSecond cannot be used with container lookups")
+            _add_python_dependency(topology)
+            client = _webhdfs_client(self.hdfsUri, self.hdfsUser, self.hdfsPassword, self.credentials)
+            lookup = _ContainerLookup(client, self.file, self.containerKeyAttribute, self.containerKeyRangeAttributes)
+            records = stream.flat_map(lookup, name=name)
+            return records.map(schema=ContainerRecordSchema, name=name+'Records' if name else None)
+
+        if self.containerMode is True:
+            self.schema = StreamSchema('tuple<blob data>')
+
+        inputs = [stream]
+        if self.prefetchDepth is not None and self.prefetchDepth > 0:
+            # the split submits the next file name to a reader, that has no queued file, while the other readers are busy
+            _split = streamsx.spl.op.Invoke(topology, 'spl.utility::ThreadedSplit', stream, schemas=[stream.oport.schema] * (self.prefetchDepth + 1), params={'bufferSize': streamsx.spl.types.uint32(1)}, name=name+'Prefetch' if name else None)
+            inputs = _split.outputs
+
+        outputs = []
+        for channel, input_stream in enumerate(inputs):
+            op_name = name+'_'+str(channel) if name and len(inputs) > 1 else name
+            _op = _HDFS2FileSource(stream=input_stream, \
+                            schema=self.schema, \
+                            appConfigName=self.appConfigName, \
+                            authKeytab=self.authKeytab, \
+                            authPrincipal=self.authPrincipal, \
+                            blockSize=self.blockSize, \
+                            encoding=self.encoding, \
+                            configPath=self.configPath, \
+                            credFile=self.credFile, \
+                            credentials=self.credentials, \
+                            file=self.file, \
+                            hdfsPassword=self.hdfsPassword, \
+                            hdfsUri=self.hdfsUri, \
+                            hdfsUser=self.hdfsUser, \
+                            initDelay=self.initDelay, \
+                            keyStorePassword=self.keyStorePassword, \
+                            keyStorePath=self.keyStorePath, \
+                            libPath=self.libPath, \
+                            policyFilePath=self.policyFilePath, \
+                            reconnectionBound=self.reconnectionBound, \
+                            reconnectionInterval=self.reconnectionInterval, \
+                            reconnectionPolicy=self.reconnectionPolicy, \
+                            vmArg=self.vmArg, \
+                            name=op_name)
+
+            output = _op.outputs[0]
+            if self.containerMode is True:
+                _add_python_dependency(topology)
+                # records span the chunks of a file, so they are decoded behind the reader of the file
+                records = output.flat_map(_ContainerReader(), name=op_name+'Records' if op_name else None)
+                output = records.map(schema=ContainerRecordSchema)
+            outputs.append(output)
+
+        output = outputs[0]
+        if len(outputs) > 1:
+            _union = streamsx.spl.op.Invoke(topology, 'spl.utility::Union', outputs, schemas=outputs[0].oport.schema, name=name+'Union' if name else None)
+            output = _union.outputs[0]
+        if self.maxBytesPerSecond is not None:
+            _add_python_dependency(topology)
+            # a single throttle behind the readers blocks all of them, so that one active reader can use the whole rate
+            output = output.filter(_ReadThrottle(self.maxBytesPerSecond), name=name+'Throttle' if name else None)
+        return output
 
 
 class HdfsFileCopy(streamsx.topology.composite.Map):
@@ -1977,6 +4416,7 @@ class HdfsFileCopy(streamsx.topology.composite.Map):
         self.libPath = None
         self.localFile = None
         self.localFileAttrName = None
+        self.maxConnectionsPerHost = None
         self.overwriteDestinationFile = None
         self.policyFilePath = None
         self.reconnectionBound = None
@@ -2023,6 +4463,8 @@ class HdfsFileCopy(streamsx.topology.composite.Map):
             self.localFile = options.get('localFile')
         if 'localFileAttrName' in options:
             self.localFileAttrName = options.get('localFileAttrName')
+        if 'maxConnectionsPerHost' in options:
+            self.maxConnectionsPerHost = options.get('maxConnectionsPerHost')
         if 'overwriteDestinationFile' in options:
             self.overwriteDestinationFile = options.get('overwriteDestinationFile')
         if 'policyFilePath' in options:
@@ -2271,6 +4713,17 @@ class HdfsFileCopy(streamsx.topology.composite.Map):
         self._localFileAttrName = value
 
 
+    @property
+    def maxConnectionsPerHost(self):
+        """
+            int: The optional parameter maxConnectionsPerHost specifies the number of idle connections per host that are kept alive for reuse when connecting via WEBHDFS. This is a tuning knob of the JVM keep-alive cache (system property http.maxConnections, default value 5), it does not avoid the redirect of each request from the namenode to a datanode.
+        """
+        return self._maxConnectionsPerHost
+
+    @maxConnectionsPerHost.setter
+    def maxConnectionsPerHost(self, value):
+        self._maxConnectionsPerHost = value
+
     @property
     def overwriteDestinationFile(self):
         """
@@ -2351,6 +4804,7 @@ class HdfsFileCopy(streamsx.topology.composite.Map):
             self.reconnectionBound = streamsx.spl.types.int32(self.reconnectionBound)
         if self.reconnectionInterval is not None:
             self.reconnectionInterval = streamsx.spl.types.float64(self.reconnectionInterval)
+        self.vmArg = _connection_vm_args(self.vmArg, self.hdfsUri, self.credentials, self.maxConnectionsPerHost)
         if self.deleteSourceFile is not None:
             if self.deleteSourceFile is True:
                 self.closeOnPunct = streamsx.spl.op.Expression.expression('true')
@@ -2389,3 +4843,150 @@ class HdfsFileCopy(streamsx.topology.composite.Map):
 
         return _op.outputs[0]
 
+
+
+class HdfsCompactor(streamsx.topology.composite.Map):
+    """
+    Merges small HDFS files into files of a target size.
+
+    The input stream delivers the names of written or scanned files, for example the output of :py:func:`write` with schema :py:const:`~streamsx.hdfs.FileInfoSchema`
+    or the output of :py:class:`HdfsDirectoryScan`. The files are grouped by directory, until the total size of the group reaches the target size.
+    Then the files are merged into the first file of the group with the native concat of the namenode, which replaces the files in one operation.
+    If the namenode rejects the concat, then the content of the files is copied in chunks of 8 MB into a temporary file that replaces the first file.
+    The replacement takes two renames, a restarted compactor restores the first file of an interrupted replacement from the hidden ``.<name>.replaced`` file.
+    Files with a name that starts with ``.`` or ``_``, for example ``_SUCCESS`` markers, are not compacted.
+    The output stream delivers the name and the size of the merged files with schema :py:const:`~streamsx.hdfs.FileInfoSchema`.
+
+    The compactor uses the WEBHDFS REST API and requires WEBHDFS credentials.
+
+    Example for merging the small files written by the sink into files of 128 MB::
+
+        import streamsx.hdfs as hdfs
+
+        written = hdfs.write(s, credentials=credentials, file='/user/hdfs/events/part%FILENUM.txt', tuplesPerFile=1000)
+        merged = written.map(hdfs.HdfsCompactor(credentials=credentials, targetSize=128*1024*1024, maxGroupAge=3600))
+
+    Attributes
+    ----------
+    credentials : dict|str
+        The credentials of Hadoop cluster as dict or JSON string that contains the hdfs credentials key/value pairs for user, password and webhdfs .
+    options : kwargs
+        The additional optional parameters as variable keyword arguments.
+    """
+
+
+    def __init__(self, credentials, **options):
+        self.localCredentials = credentials
+        self.credentials = None
+        self.hdfsPassword = None
+        self.hdfsUri = None
+        self.hdfsUser = None
+        self.maxGroupAge = None
+        self.nativeConcat = None
+        self.targetSize = None
+
+
+        if 'credentials' in options:
+            self.credentials = options.get('credentials')
+        if 'hdfsPassword' in options:
+            self.hdfsPassword = options.get('hdfsPassword')
+        if 'hdfsUri' in options:
+            self.hdfsUri = options.get('hdfsUri')
+        if 'hdfsUser' in options:
+            self.hdfsUser = options.get('hdfsUser')
+        if 'maxGroupAge' in options:
+            self.maxGroupAge = options.get('maxGroupAge')
+        if 'nativeConcat' in options:
+            self.nativeConcat = options.get('nativeConcat')
+        if 'targetSize' in options:
+            self.targetSize = options.get('targetSize')
+
+
+    @property
+    def credentials(self):
+        """
+            str: The optional parameter credentials specifies the JSON string that contains the hdfs credentials key/value pairs for user, password and webhdfs .
+        """
+        return self._credentials
+
+    @credentials.setter
+    def credentials(self, value):
+        self._credentials = value
+
+    @property
+    def hdfsPassword(self):
+        """
+            str: The parameter hdfsPassword specifies the password to use when you connecting to a Hadoop instance via WEBHDFS.
+        """
+        return self._hdfsPassword
+
+    @hdfsPassword.setter
+    def hdfsPassword(self, value):
+        self._hdfsPassword = value
+
+    @property
+    def hdfsUri(self):
+        """
+            str: The parameter hdfsUri specifies the uniform resource identifier (URI) that you can use to connect to the HDFS file system. 
+        """
+        return self._hdfsUri
+
+    @hdfsUri.setter
+    def hdfsUri(self, value):
+        self._hdfsUri = value
+
+    @property
+    def hdfsUser(self):
+        """
+            str: The parameter hdfsUser specifies the user ID to use when you connect to the HDFS file system.
+        """
+        return self._hdfsUser
+
+    @hdfsUser.setter
+    def hdfsUser(self, value):
+        self._hdfsUser = value
+
+    @property
+    def maxGroupAge(self):
+        """
+            float: The optional parameter maxGroupAge specifies the time, in seconds, after which the files of a directory are merged, also if they have not reached the target size. The age is checked when a file is received. Without this parameter the files are merged only when they reach the target size.
+        """
+        return self._maxGroupAge
+
+    @maxGroupAge.setter
+    def maxGroupAge(self, value):
+        self._maxGroupAge = value
+
+    @property
+    def nativeConcat(self):
+        """
+            bool: The optional parameter nativeConcat specifies whether the files are merged with the concat operation of the namenode. If set to ``False``, then the content of the files is always copied into the merged file. The default value is ``True``.
+        """
+        return self._nativeConcat
+
+    @nativeConcat.setter
+    def nativeConcat(self, value):
+        self._nativeConcat = value
+
+    @property
+    def targetSize(self):
+        """
+            int: The optional parameter targetSize specifies the size, in bytes, of the merged files. Files that have this size already are not merged. The default value is 128 MB, the default HDFS block size.
+        """
+        return self._targetSize
+
+    @targetSize.setter
+    def targetSize(self, value):
+        self._targetSize = value
+
+
+    def populate(self, topology, stream, schema, name, **options):
+
+        self.credentials, self.hdfsUri, self.hdfsUser, self.hdfsPassword, configPath = _setCredentials(self.localCredentials, topology)
+        targetSize = _DEFAULT_BLOCK_SIZE if self.targetSize is None else int(self.targetSize)
+        if targetSize <= 0:
+            raise ValueError("Invalid targetSize value. Value must be greater than zero.")
+        client = _webhdfs_client(self.hdfsUri, self.hdfsUser, self.hdfsPassword, self.credentials)
+        _add_python_dependency(topology)
+        compactor = _Compactor(client, targetSize, self.maxGroupAge, self.nativeConcat is not False)
+        return stream.map(compactor, schema=FileInfoSchema, name=name)
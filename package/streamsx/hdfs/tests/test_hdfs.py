@@ -7,13 +7,24 @@ from streamsx.topology.tester import Tester
 import streamsx.spl.toolkit as tk
 import streamsx.rest as sr
 import streamsx.spl.op as op
-from streamsx.topology.schema import StreamSchema
+from streamsx.topology.schema import StreamSchema, CommonSchema
+from streamsx.topology.state import ConsistentRegionConfig
 
 
 import unittest
+import unittest.mock
 import datetime
 import os
 import json
+import tempfile
+import shutil
+import time
+import threading
+import zlib
+import dill
+import http.server
+import socketserver
+from urllib.parse import urlparse, parse_qs, unquote
 
 ##
 ## Test assumptions
@@ -71,11 +82,1265 @@ class TestParams(unittest.TestCase):
             credentials = json.load(data_file)
         topo = Topology()
         s = topo.source(['Hello World!']).as_string()
-        # expect ValueError because bytesPerFile, timePerFile, and tuplesPerFile parameters are mutually exclusive.
-        self.assertRaises(ValueError, hdfs.write, s, credentials=credentials, file='any_file', timePerFile=5, tuplesPerFile=5)
-        self.assertRaises(ValueError, hdfs.write, s, credentials=credentials, file='any_file', bytesPerFile=5, timePerFile=5)
-        self.assertRaises(ValueError, hdfs.write, s, credentials=credentials, file='any_file', bytesPerFile=5, tuplesPerFile=5)
-        self.assertRaises(ValueError, hdfs.write, s, credentials=credentials, file='any_file', bytesPerFile=200, timePerFile=5, tuplesPerFile=5)
+        # expect ValueError because the time limit must be at least one second.
+        self.assertRaises(ValueError, hdfs.write, s, credentials=credentials, file='any_file', timePerFile=0.5, tuplesPerFile=5)
+        # bytesPerFile, timePerFile, and tuplesPerFile parameters are combined, the file is closed when the first limit is reached.
+        result = hdfs.write(s, credentials=credentials, file='any_file', bytesPerFile=200, timePerFile=5, tuplesPerFile=5)
+        self.assertEqual('true', str(result._op().params['closeOnPunct']))
+
+
+HA_SITE_XML = """<?xml version="1.0"?>
+<configuration>
+  <property><name>dfs.nameservices</name><value>mycluster</value></property>
+  <property><name>dfs.ha.namenodes.mycluster</name><value>nn1,nn2</value></property>
+  <property><name>dfs.namenode.rpc-address.mycluster.nn1</name><value>namenode1.example.com:8020</value></property>
+  <property><name>dfs.namenode.rpc-address.mycluster.nn2</name><value>namenode2.example.com:8020</value></property>
+  <property><name>ipc.client.connect.timeout</name><value>5000</value></property>
+</configuration>
+"""
+
+def write_site_xml(content, name='hdfs-site.xml'):
+    path = os.path.join(tempfile.mkdtemp(), name)
+    with open(path, 'w') as xml_file:
+        xml_file.write(content)
+    return path
+
+class TestHAConfig(unittest.TestCase):
+    """ Test HA nameservice configuration with stand-in configuration files, does not require a HDFS cluster """
+
+    def test_read_ha_nameservices(self):
+        properties = hdfs._hdfs._read_hadoop_config(write_site_xml(HA_SITE_XML))
+        nameservices = hdfs._hdfs._read_ha_nameservices(properties)
+        self.assertEqual({'mycluster': [('namenode1.example.com', 8020), ('namenode2.example.com', 8020)]}, nameservices)
+
+    def test_failover_settings(self):
+        config_file, hdfs_uri = hdfs._hdfs._configure_ha_failover(write_site_xml(HA_SITE_XML))
+        self.assertEqual('hdfs://mycluster', hdfs_uri)
+        self.assertEqual('hdfs-site.xml', os.path.basename(config_file))
+        properties = hdfs._hdfs._read_hadoop_config(config_file)
+        self.assertEqual('org.apache.hadoop.hdfs.server.namenode.ha.RequestHedgingProxyProvider', properties['dfs.client.failover.proxy.provider.mycluster'])
+        self.assertEqual('0', properties['ipc.client.connect.max.retries.on.timeouts'])
+        # settings of the configuration file are kept
+        self.assertEqual('5000', properties['ipc.client.connect.timeout'])
+
+    def test_no_ha_config(self):
+        xml_file = write_site_xml('<configuration><property><name>fs.defaultFS</name><value>hdfs://namenode:8020</value></property></configuration>', 'core-site.xml')
+        self.assertEqual((xml_file, None), hdfs._hdfs._configure_ha_failover(xml_file))
+
+    def test_missing_namenode_address(self):
+        xml_file = write_site_xml(HA_SITE_XML.replace('dfs.namenode.rpc-address.mycluster.nn2', 'dfs.namenode.http-address.mycluster.nn2'))
+        self.assertRaises(ValueError, hdfs._hdfs._configure_ha_failover, xml_file)
+
+    def test_scan_with_ha_config(self):
+        topo = Topology()
+        scanned = hdfs.scan(topo, credentials=write_site_xml(HA_SITE_XML), directory='a_dir')
+        params = scanned._op().params
+        self.assertEqual('hdfs://mycluster', params['hdfsUri'])
+        # the configuration file with the failover settings is added with its directory to the etc directory of the bundle
+        config_dir = topo._files['etc'][0]
+        self.assertEqual('etc/' + os.path.basename(config_dir), params['configPath'])
+        config_file = os.path.join(config_dir, 'hdfs-site.xml')
+        properties = hdfs._hdfs._read_hadoop_config(config_file)
+        self.assertEqual('org.apache.hadoop.hdfs.server.namenode.ha.RequestHedgingProxyProvider', properties['dfs.client.failover.proxy.provider.mycluster'])
+        self.assertEqual('5000', properties['ipc.client.connect.timeout'])
+
+
+WEBHDFS_CREDENTIALS = {
+    'user': 'user',
+    'password': 'password',
+    'webhdfs': 'https://gateway.example.com:8443'
+}
+
+class TestWebHdfsConnection(unittest.TestCase):
+    """ Test WEBHDFS connection parameters, does not require any Streams instance """
+
+    def test_vm_args(self):
+        self.assertEqual(['-Xmx1g', '-Dhttp.maxConnections=20'], hdfs._hdfs._add_vm_args('-Xmx1g', ['-Dhttp.maxConnections=20']))
+        # system properties defined by the application are kept
+        self.assertEqual(['-Dhttp.maxConnections=2'], hdfs._hdfs._add_vm_args(['-Dhttp.maxConnections=2'], hdfs._hdfs._keep_alive_vm_args(max_connections=20)))
+
+    def test_file_source_keep_alive(self):
+        topo = Topology()
+        s = topo.source(['a_file']).as_string()
+        lines = s.map(hdfs.HdfsFileSource(credentials=WEBHDFS_CREDENTIALS, maxConnectionsPerHost=20))
+        self.assertEqual(['-Dhttp.maxConnections=20'], lines._op().params['vmArg'])
+
+    def test_connection_pool_all_operators(self):
+        topo = Topology()
+        config = {
+            'maxConnectionsPerHost': 10
+        }
+        expected = ['-Dhttp.maxConnections=10']
+        scanned = topo.source(hdfs.HdfsDirectoryScan(credentials=WEBHDFS_CREDENTIALS, directory='a_dir', **config))
+        self.assertEqual(expected, scanned._op().params['vmArg'])
+        copied = scanned.map(hdfs.HdfsFileCopy(credentials=json.dumps(WEBHDFS_CREDENTIALS), direction='copyToLocalFile', localFile='/tmp/', **config))
+        self.assertEqual(expected, copied._op().params['vmArg'])
+        s = topo.source(['Hello World!']).as_string()
+        sink = s.for_each(hdfs.HdfsFileSink(credentials=WEBHDFS_CREDENTIALS, file='a_file', **config))
+        self.assertEqual(expected, sink._op().params['vmArg'])
+
+    def test_connection_pool_not_applied_to_hdfs_uri(self):
+        topo = Topology()
+        scanned = topo.source(hdfs.HdfsDirectoryScan(credentials={'host': 'namenode.example.com', 'port': 8020}, directory='a_dir', maxConnectionsPerHost=10))
+        self.assertNotIn('vmArg', scanned._op().params)
+
+
+def index_entries(packed):
+    # the index entries of the packed records, the punctuation before each block start ends the window of a block
+    blocks = [[]]
+    for p in packed:
+        if hdfs._hdfs._is_block_start(p):
+            blocks.append([])
+        blocks[-1].append(p)
+    return [hdfs._hdfs._container_index_entry(block) for block in blocks if block]
+
+class TestContainer(unittest.TestCase):
+    """ Test container mode, does not require any Streams instance """
+
+    def test_container_roundtrip(self):
+        writer = hdfs._hdfs._ContainerWriter('data%FILENUM.seq', 100, 'fileName')
+        packed = [writer({'fileName': 'file' + str(i) + '.json', 'payload': b'x' * i}) for i in range(20)]
+        containers = [p['containerName'] for p in packed]
+        names = sorted(set(containers), key=containers.index)
+        self.assertEqual(7, len(names))
+        self.assertEqual(['data' + str(i) + '.seq' for i in range(7)], names)
+        # each container starts with the header
+        for i, p in enumerate(packed):
+            self.assertEqual(i == 0 or containers[i] != containers[i-1], p['record'].startswith(hdfs._hdfs._CONTAINER_MAGIC))
+        entries = index_entries(packed)
+        min_key, max_key, offset, length, count = entries[1]['indexEntry'].split('\t')
+        self.assertEqual(('file1.json', 'file1.json', '1'), (min_key, max_key, count))
+        self.assertEqual('data0.seq.idx', entries[1]['indexName'])
+        self.assertEqual(len(packed[0]['record']), int(offset))
+        self.assertEqual(len(packed[1]['record']), int(length))
+
+        # read the concatenated containers in chunks that do not match record boundaries
+        data = b''.join(p['record'] for p in packed)
+        reader = hdfs._hdfs._ContainerReader()
+        records = []
+        for i in range(0, len(data), 7):
+            records.extend(reader({'data': data[i:i+7]}))
+        self.assertEqual(['file' + str(i) + '.json' for i in range(20)], [r['key'] for r in records])
+        self.assertEqual(b'x' * 19, records[19]['value'])
+
+        reader = hdfs._hdfs._ContainerReader(keys=['file3.json'])
+        self.assertEqual([{'key': 'file3.json', 'value': b'xxx'}], reader(data))
+        reader = hdfs._hdfs._ContainerReader(key_range=('file15.json', 'file17.json'))
+        self.assertEqual(['file15.json', 'file16.json', 'file17.json'], [r['key'] for r in reader(data)])
+
+    def test_block_index(self):
+        writer = hdfs._hdfs._ContainerWriter('data%FILENUM.seq', 1024, 'fileName', index_interval=4)
+        packed = [writer({'fileName': 'key' + str(i), 'payload': 'value'}) for i in range(10)]
+        entries = [(e['indexName'], e['indexEntry'].split('\t')) for e in index_entries(packed)]
+        self.assertEqual(3, len(entries))
+        self.assertEqual(('data0.seq.idx', ['key0', 'key3', str(len(hdfs._hdfs._CONTAINER_MAGIC)), str(4 * len(packed[1]['record'])), '4']), entries[0])
+        self.assertEqual(['key4', 'key7'], entries[1][1][:2])
+        # the last block of the stream is indexed on final punctuation
+        self.assertEqual(['key8', 'key9'], entries[2][1][:2])
+        self.assertEqual('2', entries[2][1][4])
+
+        # the last block of a container is indexed when the next container is started
+        writer = hdfs._hdfs._ContainerWriter('data%FILENUM.seq', 40, 'fileName', index_interval=4)
+        packed = [writer({'fileName': 'key' + str(i), 'payload': 'value'}) for i in range(3)]
+        self.assertEqual(['data0.seq', 'data0.seq', 'data1.seq'], [p['containerName'] for p in packed])
+        self.assertEqual([False, False, True], [p['blockStart'] for p in packed])
+        entries = index_entries(packed)
+        self.assertEqual(['data0.seq.idx', 'data1.seq.idx'], [e['indexName'] for e in entries])
+        self.assertEqual(['key0', 'key1'], entries[0]['indexEntry'].split('\t')[:2])
+
+    def test_index_covers_every_record(self):
+        writer = hdfs._hdfs._ContainerWriter('data%FILENUM.seq', 200, 'fileName', index_interval=3)
+        packed = [writer({'fileName': 'key%02d' % i, 'payload': b'x' * i}) for i in range(25)]
+        data = {}
+        for p in packed:
+            data[p['containerName']] = data.get(p['containerName'], b'') + p['record']
+        indexed = []
+        for e in index_entries(packed):
+            min_key, max_key, offset, length, count = e['indexEntry'].split('\t')
+            block = data[e['indexName'][:-len('.idx')]][int(offset):int(offset)+int(length)]
+            keys = [r['key'] for r in hdfs._hdfs._ContainerReader()(block)]
+            self.assertEqual(int(count), len(keys))
+            self.assertEqual((min_key, max_key), (min(keys), max(keys)))
+            indexed.extend(keys)
+        self.assertEqual(['key%02d' % i for i in range(25)], indexed)
+
+    def test_container_sink(self):
+        topo = Topology()
+        s = topo.source(['Hello World!']).as_string()
+        sink = s.for_each(hdfs.HdfsFileSink(credentials=WEBHDFS_CREDENTIALS, file='a_dir/data%FILENUM.seq', containerSize=1024*1024))
+        self.assertEqual('containerName', sink._op().params['fileAttributeName'])
+        self.assertRaises(ValueError, s.for_each, hdfs.HdfsFileSink(credentials=WEBHDFS_CREDENTIALS, file='a_dir/data.seq', containerSize=1024*1024))
+        self.assertRaises(ValueError, s.for_each, hdfs.HdfsFileSink(credentials=WEBHDFS_CREDENTIALS, file='a_dir/data%FILENUM.seq', containerSize=1024*1024, tuplesPerFile=10))
+
+    def test_container_source(self):
+        topo = Topology()
+        s = topo.source(['a_dir/data0.seq']).as_string()
+        records = s.map(hdfs.HdfsFileSource(credentials=WEBHDFS_CREDENTIALS, containerMode=True))
+        self.assertEqual(hdfs.ContainerRecordSchema, records.oport.schema)
+
+        lookups = topo.source([{'container': 'a_dir/data0.seq', 'key': 'device42.json'}]).map(schema=StreamSchema('tuple<rstring container, rstring key>'))
+        records = lookups.map(hdfs.HdfsFileSource(credentials=WEBHDFS_CREDENTIALS, containerMode=True, containerKeyAttribute='key'))
+        self.assertEqual(hdfs.ContainerRecordSchema, records.oport.schema)
+        lookup = [o.function for o in topo.graph.operators if isinstance(o.function, hdfs._hdfs._ContainerLookup)][0]
+        self.assertEqual('key', lookup.key_attribute)
+        self.assertRaises(ValueError, lookups.map, hdfs.HdfsFileSource(credentials=WEBHDFS_CREDENTIALS, containerKeyAttribute='key'))
+        self.assertRaises(ValueError, lookups.map, hdfs.HdfsFileSource(credentials=WEBHDFS_CREDENTIALS, containerMode=True, containerKeyRangeAttributes=['key']))
+
+    def test_indexed_lookup(self):
+        writer = hdfs._hdfs._ContainerWriter('/data/c%FILENUM.seq', 1024, 'fileName', index_interval=4)
+        packed = [writer({'fileName': 'key%02d' % i, 'payload': 'value' + str(i)}) for i in range(20)]
+        server = WebHdfsStandIn({})
+        contents = {}
+        for p in packed:
+            contents[p['containerName']] = contents.get(p['containerName'], b'') + p['record']
+        entries = index_entries(packed)
+        for e in entries:
+            contents[e['indexName']] = contents.get(e['indexName'], b'') + (e['indexEntry'] + '\n').encode('utf-8')
+        for path, data in contents.items():
+            server.contents[path] = data
+            server.files[path] = {'length': len(data), 'modificationTime': 1}
+        client = hdfs._hdfs._WebHdfsClient(server.url(), 'user')
+
+        lookup = hdfs._hdfs._ContainerLookup(client, key_attribute='key')
+        self.assertEqual([{'key': 'key05', 'value': b'value5'}], lookup({'container': '/data/c0.seq', 'key': 'key05'}))
+        # only the index and the byte range of the block with the key are read
+        offset, length = entries[1]['indexEntry'].split('\t')[2:4]
+        self.assertEqual([('/data/c0.seq.idx', 0, None), ('/data/c0.seq', int(offset), int(length))], server.reads)
+        # the index is cached
+        server.reads.clear()
+        self.assertEqual([], lookup({'container': '/data/c0.seq', 'key': 'key05x'}))
+        self.assertEqual([('/data/c0.seq', int(offset), int(length))], server.reads)
+
+        # adjacent blocks of a key range are read with one request
+        server.reads.clear()
+        lookup = hdfs._hdfs._ContainerLookup(client, file='/data/c0.seq', range_attributes=('min', 'max'))
+        records = lookup({'min': 'key03', 'max': 'key09'})
+        self.assertEqual(['key%02d' % i for i in range(3, 10)], [r['key'] for r in records])
+        first_offset = int(entries[0]['indexEntry'].split('\t')[2])
+        last_offset, last_length = entries[2]['indexEntry'].split('\t')[2:4]
+        self.assertEqual(('/data/c0.seq', first_offset, int(last_offset) + int(last_length) - first_offset), server.reads[-1])
+        self.assertEqual(2, len(server.reads))
+        server.shutdown()
+
+
+class TestConsistentRegion(unittest.TestCase):
+    """ Test consistent region parameters, does not require any Streams instance """
+
+    def test_scan_consistent_region(self):
+        topo = Topology()
+        scanned = hdfs.scan(topo, credentials=WEBHDFS_CREDENTIALS, directory='a_dir', consistent_region_config=ConsistentRegionConfig.periodic(30))
+        self.assertIsInstance(scanned._op()._consistent, ConsistentRegionConfig)
+        self.assertRaises(TypeError, hdfs.scan, topo, credentials=WEBHDFS_CREDENTIALS, directory='a_dir', consistent_region_config=30)
+
+    def test_composite_consistent_region(self):
+        topo = Topology()
+        scanned = topo.source(hdfs.HdfsDirectoryScan(credentials=WEBHDFS_CREDENTIALS, directory='a_dir', consistentRegionConfig=ConsistentRegionConfig.operator_driven()))
+        self.assertIsInstance(scanned._op()._consistent, ConsistentRegionConfig)
+
+    def test_read_in_consistent_region(self):
+        topo = Topology()
+        scanned = hdfs.scan(topo, credentials=WEBHDFS_CREDENTIALS, directory='a_dir', consistent_region_config=ConsistentRegionConfig.operator_driven())
+        # the reader joins the region of the scan and does not start a region
+        lines = scanned.map(hdfs.HdfsFileSource(credentials=WEBHDFS_CREDENTIALS))
+        self.assertIsNone(lines._op()._consistent)
+        lines = hdfs.read(scanned, credentials=WEBHDFS_CREDENTIALS)
+        self.assertIsNone(lines._op()._consistent)
+
+
+class TestFileRolling(unittest.TestCase):
+    """ Test the file roll policy of the sink, does not require any Streams instance """
+
+    def test_first_limit(self):
+        policy = hdfs._hdfs._FileRollPolicy(bytes_per_file=10, tuples_per_file=3)
+        self.assertEqual([False, False, True, False, True], [policy(t) for t in ['a', 'b', 'c', 'abcdef', 'abcd']])
+        policy = hdfs._hdfs._FileRollPolicy(time_per_file=0.2, tuples_per_file=100)
+        self.assertFalse(policy('a'))
+        time.sleep(0.25)
+        # the sink has closed the file after the time, the next tuple starts a new file
+        self.assertFalse(policy('b'))
+
+    def test_min_bytes(self):
+        policy = hdfs._hdfs._FileRollPolicy(time_per_file=0.2, tuples_per_file=2, min_bytes=10)
+        self.assertEqual([False, False, True], [policy(t) for t in ['abcd', 'abcd', 'abcd']])
+        self.assertFalse(policy('abcd'))
+        time.sleep(0.25)
+        self.assertFalse(policy('abcd'))
+        self.assertTrue(policy('abcd'))
+
+    def test_sink_roll_policy(self):
+        topo = Topology()
+        s = topo.source(['Hello World!']).as_string()
+        sink = s.for_each(hdfs.HdfsFileSink(credentials=WEBHDFS_CREDENTIALS, file='a_dir/data%FILENUM.txt', bytesPerFile=128*1024*1024, timePerFile=60))
+        params = sink._op().params
+        self.assertEqual('true', str(params['closeOnPunct']))
+        self.assertEqual('60.0', str(params['timePerFile']))
+        self.assertNotIn('bytesPerFile', params)
+        self.assertIn('Punctor', [o.kind.split('::')[-1] for o in topo.graph.operators])
+        result = hdfs.write(s, credentials=WEBHDFS_CREDENTIALS, file='data%FILENUM.txt', tuplesPerFile=1000, minBytesPerFile=1024)
+        self.assertNotIn('timePerFile', result._op().params)
+        self.assertEqual(1000, [o.function for o in topo.graph.operators if isinstance(o.function, hdfs._hdfs._FileRollPolicy)][-1].tuples_per_file)
+
+
+    def test_block_align(self):
+        policy = hdfs._hdfs._BlockAlignPolicy(10)
+        # lines are written with a newline
+        self.assertEqual([False, False, True, False, True], [policy(t) for t in ['abcd', 'abcd', 'a', 'abcdefg', 'abcdefghijklmn']])
+        policy = hdfs._hdfs._BlockAlignPolicy(10)
+        self.assertEqual([False, False, True], [policy({'data': b'x' * 5}) for i in range(3)])
+        # the file that the sink operator closed after timePerFile is not counted for the next file
+        policy = hdfs._hdfs._BlockAlignPolicy(10, time_per_file=0.1)
+        self.assertEqual([False, False], [policy('abcd') for i in range(2)])
+        time.sleep(0.15)
+        self.assertEqual([False, False, True], [policy('abcd') for i in range(3)])
+
+    def test_block_size_and_replication(self):
+        topo = Topology()
+        s = topo.source(['Hello World!']).as_string()
+        sink = s.for_each(hdfs.HdfsFileSink(credentials=WEBHDFS_CREDENTIALS, file='data%FILENUM.txt', outputBlockSize=256*1024*1024, replication=2, alignToBlock=2, timePerFile=600))
+        params = sink._op().params
+        self.assertEqual('etc/' + os.path.basename(topo._files['etc'][0]), params['configPath'])
+        self.assertEqual('true', str(params['closeOnPunct']))
+        self.assertIn('timePerFile', params)
+        policy = [o.function for o in topo.graph.operators if isinstance(o.function, hdfs._hdfs._BlockAlignPolicy)][0]
+        self.assertEqual(512*1024*1024, policy.limit)
+        self.assertEqual(600, policy.time_per_file)
+        config_file = os.path.join(topo._files['etc'][0], 'core-site.xml')
+        self.assertEqual({'dfs.blocksize': '268435456', 'dfs.replication': '2'}, hdfs._hdfs._read_hadoop_config(config_file))
+        self.assertRaises(ValueError, s.for_each, hdfs.HdfsFileSink(credentials=WEBHDFS_CREDENTIALS, file='data%FILENUM.txt', alignToBlock=1, bytesPerFile=1024))
+
+    def test_block_size_with_config_file(self):
+        topo = Topology()
+        s = topo.source(['Hello World!']).as_string()
+        xml_file = write_site_xml(HA_SITE_XML)
+        s.for_each(hdfs.HdfsFileSink(credentials=xml_file, file='data%FILENUM.txt', replication=1))
+        # the copy of the configuration file with the replication and the failover settings is added to the bundle
+        config_file = os.path.join(topo._files['etc'][0], 'hdfs-site.xml')
+        properties = hdfs._hdfs._read_hadoop_config(config_file)
+        self.assertEqual('1', properties['dfs.replication'])
+        self.assertEqual('mycluster', properties['dfs.nameservices'])
+        self.assertIn('dfs.client.failover.proxy.provider.mycluster', properties)
+
+
+    def test_settings_per_sink(self):
+        topo = Topology()
+        s = topo.source(['Hello World!']).as_string()
+        xml_file = write_site_xml(HA_SITE_XML)
+        scanned = hdfs.scan(topo, credentials=xml_file, directory='a_dir')
+        sinks = [s.for_each(hdfs.HdfsFileSink(credentials=WEBHDFS_CREDENTIALS, file='data%FILENUM.txt', replication=replication)) for replication in (2, 3)]
+        sinks.append(s.for_each(hdfs.HdfsFileSink(credentials=xml_file, file='data%FILENUM.txt', replication=1)))
+        # each operator reads its own copy of the configuration
+        config_paths = [op._op().params['configPath'] for op in [scanned] + sinks]
+        self.assertEqual(4, len(set(config_paths)))
+        self.assertEqual(config_paths, ['etc/' + os.path.basename(d) for d in topo._files['etc']])
+        replications = [hdfs._hdfs._read_hadoop_config(os.path.join(d, name)).get('dfs.replication') for d, name in zip(topo._files['etc'], ['hdfs-site.xml', 'core-site.xml', 'core-site.xml', 'hdfs-site.xml'])]
+        self.assertEqual([None, '2', '3', '1'], replications)
+
+
+class TestReadPacing(unittest.TestCase):
+    """ Test read rate and read-ahead parameters, does not require any Streams instance """
+
+    def test_throttle(self):
+        throttle = hdfs._hdfs._ReadThrottle(1000000)
+        start = time.monotonic()
+        self.assertTrue(throttle({'data': b'x' * 1500000}))
+        self.assertTrue(throttle('x'))
+        self.assertGreaterEqual(time.monotonic() - start, 0.45)
+        self.assertEqual(6, hdfs._hdfs._tuple_size({'line': 'abc', 'data': b'xyz', 'number': 7}))
+
+    def test_max_bytes_per_second(self):
+        topo = Topology()
+        files = topo.source(['a.txt']).as_string()
+        lines = files.map(hdfs.HdfsFileSource(credentials=WEBHDFS_CREDENTIALS, maxBytesPerSecond=1000000))
+        self.assertIsInstance(lines._op().function, hdfs._hdfs._ReadThrottle)
+        self.assertRaises(ValueError, files.map, hdfs.HdfsFileSource(credentials=WEBHDFS_CREDENTIALS, maxBytesPerSecond=0))
+
+    def test_prefetch_depth(self):
+        topo = Topology()
+        files = topo.source(['a.txt', 'b.txt']).as_string()
+        lines = files.map(hdfs.HdfsFileSource(credentials=WEBHDFS_CREDENTIALS, prefetchDepth=2, maxBytesPerSecond=3000000))
+        # one throttle for the total rate of the readers
+        throttles = [o.function for o in topo.graph.operators if isinstance(o.function, hdfs._hdfs._ReadThrottle)]
+        self.assertEqual([3000000], [throttle.rate for throttle in throttles])
+        self.assertIs(throttles[0], lines._op().function)
+        self.assertEqual(3, len([o for o in topo.graph.operators if o.kind == 'com.ibm.streamsx.hdfs::HDFS2FileSource']))
+        self.assertEqual(3, len([o for o in topo.graph.operators if o.kind == 'spl.utility::Union'][0].inputPorts))
+        self.assertIn('spl.utility::ThreadedSplit', [o.kind for o in topo.graph.operators])
+
+
+class WebHdfsStandIn(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    """ Local stand-in for the WEBHDFS REST API of a namenode, serves the directory listings of the files dict and keeps the written data in the contents dict """
+
+    def __init__(self, files, limit=1000, batch=True):
+        super().__init__(('127.0.0.1', 0), WebHdfsStandInHandler)
+        self.files = files
+        self.limit = limit
+        self.batch = batch
+        self.directory_times = {}
+        self.contents = {}
+        self.concat = True
+        self.delay = 0
+        self.requests = []
+        self.reads = []
+        self.home = True
+        self.connections = 0
+        self.drop = False
+        self.daemon_threads = True
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def url(self):
+        return 'http://127.0.0.1:' + str(self.server_address[1]) + '/webhdfs/v1'
+
+    def status(self, path):
+        if path in self.files:
+            return dict(self.files[path], pathSuffix='', type='FILE')
+        if any(f.startswith(path.rstrip('/') + '/') for f in self.files):
+            return {'pathSuffix': '', 'type': 'DIRECTORY', 'modificationTime': self.directory_times.get(path, 0), 'length': 0}
+        return None
+
+    def children(self, path):
+        prefix = path.rstrip('/') + '/'
+        children = {}
+        for f in self.files:
+            if f.startswith(prefix):
+                name = f[len(prefix):].split('/')[0]
+                children[name] = dict(self.files[f], pathSuffix=name, type='FILE') if '/' not in f[len(prefix):] else {'pathSuffix': name, 'type': 'DIRECTORY', 'modificationTime': 0, 'length': 0}
+        return [children[name] for name in sorted(children)]
+
+class WebHdfsStandInHandler(http.server.BaseHTTPRequestHandler):
+
+    # keeps the connections of the clients open between the requests
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def handle_one_request(self):
+        super().handle_one_request()
+        # closes the connection without notice like a server that drops idle connections
+        if self.server.drop:
+            self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, code, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        path = unquote(url.path[len('/webhdfs/v1'):]) or '/'
+        query = parse_qs(url.query)
+        op = query['op'][0]
+        if 'datanode' not in query:
+            self.server.requests.append((op, path, self.headers.get('Authorization')))
+        if op == 'GETHOMEDIRECTORY':
+            if not self.server.home:
+                return self.reply(400, {'RemoteException': {'exception': 'IllegalArgumentException'}})
+            return self.reply(200, {'Path': '/user/' + query.get('user.name', ['dr.who'])[0]})
+        if self.server.status(path) is None:
+            return self.reply(404, {'RemoteException': {'exception': 'FileNotFoundException'}})
+        if op == 'GETFILESTATUS':
+            return self.reply(200, {'FileStatus': self.server.status(path)})
+        if op == 'OPEN' and 'datanode' not in query:
+            # the namenode redirects the read to a datanode
+            self.send_response(307)
+            self.send_header('Location', self.server.url() + url.path[len('/webhdfs/v1'):] + '?' + url.query + '&datanode=true')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if op == 'OPEN':
+            offset = int(query.get('offset', [0])[0])
+            length = int(query['length'][0]) if 'length' in query else None
+            self.server.reads.append((path, offset, length))
+            data = self.server.contents[path][offset:]
+            if length is not None:
+                data = data[:length]
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        children = self.server.children(path)
+        if op == 'LISTSTATUS':
+            return self.reply(200, {'FileStatuses': {'FileStatus': children}})
+        if op == 'LISTSTATUS_BATCH' and self.server.batch:
+            start_after = query.get('startAfter', [None])[0]
+            if start_after is not None:
+                children = [c for c in children if c['pathSuffix'] > start_after]
+            page = children[:self.server.limit]
+            return self.reply(200, {'DirectoryListing': {'partialListing': {'FileStatuses': {'FileStatus': page}}, 'remainingEntries': len(children) - len(page)}})
+        return self.reply(400, {'RemoteException': {'exception': 'IllegalArgumentException'}})
+
+    def write(self, op):
+        url = urlparse(self.path)
+        path = unquote(url.path[len('/webhdfs/v1'):])
+        query = parse_qs(url.query)
+        if 'datanode' not in query:
+            # the namenode redirects the request to a datanode
+            self.server.requests.append((query['op'][0], path, self.headers.get('Authorization')))
+            if op == 'CREATE' and query.get('overwrite') == ['false'] and path in self.server.files:
+                return self.reply(403, {'RemoteException': {'exception': 'FileAlreadyExistsException'}})
+            self.send_response(307)
+            self.send_header('Location', self.server.url() + url.path[len('/webhdfs/v1'):] + '?' + url.query + '&datanode=true')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        data = self.rfile.read(int(self.headers['Content-Length']))
+        time.sleep(self.server.delay)
+        if op == 'APPEND':
+            if path not in self.server.contents:
+                return self.reply(404, {'RemoteException': {'exception': 'FileNotFoundException'}})
+            data = self.server.contents[path] + data
+        self.server.contents[path] = data
+        self.server.files[path] = {'length': len(data), 'modificationTime': int(time.time() * 1000), 'blockSize': int(query.get('blocksize', [0])[0]), 'replication': int(query.get('replication', [0])[0])}
+        self.send_response(201 if op == 'CREATE' else 200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def move(self, path, destination):
+        self.server.files[destination] = self.server.files.pop(path)
+        self.server.contents[destination] = self.server.contents.pop(path)
+
+    def namespace(self):
+        # handles the operations of the namenode, that do not transfer data
+        url = urlparse(self.path)
+        path = unquote(url.path[len('/webhdfs/v1'):])
+        query = parse_qs(url.query)
+        op = query['op'][0]
+        if op not in ('RENAME', 'CONCAT', 'DELETE'):
+            return False
+        self.server.requests.append((op, path, self.headers.get('Authorization')))
+        if op == 'RENAME':
+            destination = query['destination'][0]
+            if path not in self.server.files or destination in self.server.files:
+                self.reply(200, {'boolean': False})
+            else:
+                self.move(path, destination)
+                self.reply(200, {'boolean': True})
+        elif op == 'CONCAT':
+            if not self.server.concat:
+                self.reply(400, {'RemoteException': {'exception': 'HadoopIllegalArgumentException'}})
+                return True
+            for source in query['sources'][0].split(','):
+                self.server.contents[path] += self.server.contents.pop(source)
+                del self.server.files[source]
+            self.server.files[path]['length'] = len(self.server.contents[path])
+            self.send_response(200)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        else:
+            deleted = path in self.server.files
+            self.server.files.pop(path, None)
+            self.server.contents.pop(path, None)
+            self.reply(200, {'boolean': deleted})
+        return True
+
+    def do_PUT(self):
+        if not self.namespace():
+            self.write('CREATE')
+
+    def do_POST(self):
+        if not self.namespace():
+            self.write('APPEND')
+
+    def do_DELETE(self):
+        self.namespace()
+
+
+class TestWebHdfsScan(unittest.TestCase):
+    """ Test the scan via WEBHDFS with a local stand-in for the REST API, does not require any Streams instance or HDFS cluster """
+
+    def setUp(self):
+        self.files = {'/data/f' + str(i) + '.txt': {'length': 100 * i, 'modificationTime': 1000 + i} for i in range(5)}
+        self.files['/data/sub/g.txt'] = {'length': 1, 'modificationTime': 1}
+
+    def test_webhdfs_url(self):
+        self.assertEqual('https://gateway.example.com:8443/gateway/default/webhdfs/v1', hdfs._hdfs._webhdfs_url('webhdfs://gateway.example.com:8443', 'password'))
+        self.assertEqual('https://chs.example.com:8443/gateway/default/webhdfs/v1', hdfs._hdfs._webhdfs_url('https://chs.example.com:8443/gateway/default/webhdfs/v1/', 'password'))
+        self.assertEqual('http://namenode:9870/webhdfs/v1', hdfs._hdfs._webhdfs_url('webhdfs://namenode:9870'))
+
+    def test_batched_listing(self):
+        server = WebHdfsStandIn(self.files, limit=2)
+        self.addCleanup(server.shutdown)
+        client = hdfs._hdfs._WebHdfsClient(server.url(), 'user', 'password')
+        names = [entry['pathSuffix'] for entry in client.iter_status('/data')]
+        self.assertEqual(['f0.txt', 'f1.txt', 'f2.txt', 'f3.txt', 'f4.txt', 'sub'], names)
+        self.assertEqual(['LISTSTATUS_BATCH'] * 3, [r[0] for r in server.requests])
+        self.assertTrue(server.requests[0][2].startswith('Basic '))
+
+    def test_listing_without_batch_support(self):
+        server = WebHdfsStandIn(self.files, batch=False)
+        self.addCleanup(server.shutdown)
+        client = hdfs._hdfs._WebHdfsClient(server.url(), 'user')
+        self.assertEqual(6, len(list(client.iter_status('/data'))))
+        self.assertEqual(6, len(list(client.iter_status('/data'))))
+        self.assertEqual(['LISTSTATUS_BATCH', 'LISTSTATUS', 'LISTSTATUS'], [r[0] for r in server.requests])
+
+    def test_connection_reuse(self):
+        server = WebHdfsStandIn(self.files)
+        self.addCleanup(server.shutdown)
+        client = hdfs._hdfs._WebHdfsClient(server.url(), 'user')
+        client.create('/data/new.txt', b'data')
+        for i in range(3):
+            self.assertEqual(7, len(list(client.iter_status('/data'))))
+        self.assertEqual(b'data', client.read('/data/new.txt'))
+        self.assertEqual(1, server.connections)
+        # the connection is not pickled
+        copy = dill.loads(dill.dumps(client))
+        self.assertEqual(7, len(list(copy.iter_status('/data'))))
+        self.assertEqual(2, server.connections)
+        # the server closes the connection after the response, the next request is sent again on a new connection
+        server.drop = True
+        self.assertEqual(7, len(list(client.iter_status('/data'))))
+        self.assertEqual(7, len(list(client.iter_status('/data'))))
+        self.assertEqual(3, server.connections)
+
+    def test_read_redirect_cache(self):
+        server = WebHdfsStandIn(self.files)
+        self.addCleanup(server.shutdown)
+        client = hdfs._hdfs._WebHdfsClient(server.url(), 'user', redirect_block_size=4)
+        client.create('/data/new.txt', b'abcdefgh')
+        server.requests.clear()
+        self.assertEqual(b'ab', client.read('/data/new.txt', 0, 2))
+        self.assertEqual(b'cd', client.read('/data/new.txt', 2, 2))
+        # the second block is redirected by the namenode
+        self.assertEqual(b'efgh', client.read('/data/new.txt', 4))
+        self.assertEqual(b'gh', client.read('/data/new.txt', 6, 2))
+        self.assertEqual(2, len([r for r in server.requests if r[0] == 'OPEN']))
+        self.assertEqual([('/data/new.txt', 0, 2), ('/data/new.txt', 2, 2), ('/data/new.txt', 4, None), ('/data/new.txt', 6, 2)], server.reads)
+        # a failing location is redirected again
+        client._redirects[('/data/new.txt', 0)] = (server.url() + '/data/missing.txt?op=OPEN&datanode=true', time.monotonic() + 60)
+        self.assertEqual(b'bc', client.read('/data/new.txt', 1, 2))
+        self.assertEqual(3, len([r for r in server.requests if r[0] == 'OPEN']))
+        # expired locations are not used
+        client.redirect_ttl = 0
+        client._redirects.clear()
+        client.read('/data/new.txt', 0, 2)
+        client.read('/data/new.txt', 0, 2)
+        self.assertEqual(5, len([r for r in server.requests if r[0] == 'OPEN']))
+
+    def test_scan_new_and_modified_files(self):
+        server = WebHdfsStandIn(self.files, limit=2)
+        self.addCleanup(server.shutdown)
+        scanner = hdfs._hdfs._WebHdfsDirectoryScan(hdfs._hdfs._WebHdfsClient(server.url(), 'user'), '/data', pattern=r'f[0-3]\.txt')
+        self.assertEqual(['/data/f0.txt', '/data/f1.txt', '/data/f2.txt', '/data/f3.txt'], [f['fileName'] for f in scanner.scan()])
+        self.assertEqual([], scanner.scan())
+        self.files['/data/f1.txt']['modificationTime'] = 2000
+        self.assertEqual([{'fileName': '/data/f1.txt'}], [scanner._tuple(f) for f in scanner.scan()])
+
+    def test_relative_paths(self):
+        files = {'/user/user/data/f' + str(i) + '.txt': {'length': 1, 'modificationTime': 1} for i in range(3)}
+        server = WebHdfsStandIn(files)
+        self.addCleanup(server.shutdown)
+        client = hdfs._hdfs._WebHdfsClient(server.url(), 'user')
+        self.assertEqual('/user/user/out/data.txt', client.absolute('out/data.txt'))
+        self.assertEqual('/user/user', client.absolute('.'))
+        self.assertEqual('/out/data.txt', client.absolute('/out/data.txt'))
+        # the home directory is requested once
+        self.assertEqual(['GETHOMEDIRECTORY'], [r[0] for r in server.requests])
+
+        scanner = hdfs._hdfs._WebHdfsDirectoryScan(client, 'data')
+        self.assertEqual(['/user/user/data/f0.txt', '/user/user/data/f1.txt', '/user/user/data/f2.txt'], [f['fileName'] for f in scanner.scan()])
+        scanner = hdfs._hdfs._WebHdfsDirectoryScan(client, 'd*/f[12].txt')
+        self.assertEqual(['/user/user/data/f1.txt', '/user/user/data/f2.txt'], [f['fileName'] for f in scanner.scan()])
+
+        client.create('out/data0.txt', b'a\n')
+        client.create('out/data1.txt', b'b\n')
+        self.assertEqual(b'a\n', server.contents['/user/user/out/data0.txt'])
+        status, number = hdfs._hdfs._last_file(client, 'out/data%FILENUM.txt')
+        self.assertEqual(('/user/user/out/data1.txt', 1), (status['pathSuffix'], number))
+        client.concat('out/data0.txt', ['out/data1.txt'])
+        client.rename('out/data0.txt', 'out/all.txt')
+        self.assertEqual(b'a\nb\n', client.read('out/all.txt'))
+
+        # without GETHOMEDIRECTORY the home directory is /user/<user>
+        server.home = False
+        client = hdfs._hdfs._WebHdfsClient(server.url(), 'other')
+        self.assertEqual('/user/other/data', client.absolute('data'))
+
+    def test_scan_iterator_checkpoint(self):
+        server = WebHdfsStandIn(self.files)
+        self.addCleanup(server.shutdown)
+        scanner = hdfs._hdfs._WebHdfsDirectoryScan(hdfs._hdfs._WebHdfsClient(server.url(), 'user'), '/data', pattern=r'f\d\.txt', sleep_time=0.01)
+        files = iter(scanner)
+        self.assertIs(scanner, files)
+        self.assertEqual(['/data/f0.txt', '/data/f1.txt'], [next(files)['fileName'] for i in range(2)])
+        # the iterator is checkpointed in a consistent region
+        restored = dill.loads(dill.dumps(files))
+        self.assertEqual(['/data/f2.txt', '/data/f3.txt', '/data/f4.txt'], [next(restored)['fileName'] for i in range(3)])
+        self.files['/data/f5.txt'] = {'length': 1, 'modificationTime': 1}
+        self.assertEqual('/data/f5.txt', next(restored)['fileName'])
+        # the original iterator continues from its own state
+        self.assertEqual('/data/f2.txt', next(files)['fileName'])
+
+    def test_sleep_time_jitter(self):
+        scanner = hdfs._hdfs._WebHdfsDirectoryScan(None, '/data', sleep_time=10, max_sleep_time=60, jitter=0.2)
+        for i in range(100):
+            self.assertTrue(8 <= scanner._jittered(10) <= 12)
+
+    def test_composite_scan(self):
+        topo = Topology()
+        scanned = topo.source(hdfs.HdfsDirectoryScan(credentials=WEBHDFS_CREDENTIALS, directory='/data', schema=StreamSchema('tuple<rstring name>'), maxSleepTime=60, sleepTimeJitter=0.1))
+        scanner = topo.graph.operators[0].function._callable
+        self.assertEqual('https://gateway.example.com:8443/gateway/default/webhdfs/v1', scanner.client.url)
+        self.assertEqual('name', scanner.attribute)
+        self.assertEqual(60, scanner.max_sleep_time)
+        self.assertRaises(ValueError, topo.source, hdfs.HdfsDirectoryScan(credentials={'host': 'namenode.example.com', 'port': 8020}, directory='/data', maxSleepTime=60))
+        # the parameters of the toolkit operator are not ignored by the scan via WEBHDFS
+        for option in ({'keyStorePath': '/etc/trust.jks'}, {'reconnectionPolicy': 'NoRetry'}, {'vmArg': '-Xmx1g'}, {'authKeytab': 'hdfs.keytab'}, {'maxConnectionsPerHost': 10}):
+            self.assertRaises(ValueError, topo.source, hdfs.HdfsDirectoryScan(credentials=WEBHDFS_CREDENTIALS, directory='/data', stableScans=2, **option))
+
+    def test_scan_metadata_and_order(self):
+        server = WebHdfsStandIn(self.files)
+        self.addCleanup(server.shutdown)
+        client = hdfs._hdfs._WebHdfsClient(server.url(), 'user')
+        scanner = hdfs._hdfs._WebHdfsDirectoryScan(client, '/data', order='largestFirst', metadata=True)
+        tuples = [scanner._tuple(f) for f in scanner.scan()]
+        self.assertEqual(['/data/f4.txt', '/data/f3.txt', '/data/f2.txt', '/data/f1.txt', '/data/f0.txt'], [t['fileName'] for t in tuples])
+        self.assertEqual({'fileName': '/data/f4.txt', 'fileSize': 400, 'modificationTime': 1004, 'replication': 0, 'blockSize': 0, 'owner': ''}, tuples[0])
+        self.files['/data/f0.txt']['modificationTime'] = 3000
+        self.files['/data/f3.txt']['modificationTime'] = 2000
+        scanner = hdfs._hdfs._WebHdfsDirectoryScan(client, '/data', order='oldestFirst')
+        self.assertEqual(['/data/f1.txt', '/data/f2.txt', '/data/f4.txt', '/data/f3.txt', '/data/f0.txt'], [f['fileName'] for f in scanner.scan()])
+
+        topo = Topology()
+        topo.source(hdfs.HdfsDirectoryScan(credentials=WEBHDFS_CREDENTIALS, directory='/data', schema=hdfs.DirectoryScanMetadataSchema))
+        self.assertTrue(topo.graph.operators[0].function._callable.metadata)
+        self.assertRaises(ValueError, topo.source, hdfs.HdfsDirectoryScan(credentials=WEBHDFS_CREDENTIALS, directory='/data', scanOrder='newestFirst'))
+
+    def test_readiness(self):
+        server = WebHdfsStandIn(self.files)
+        self.addCleanup(server.shutdown)
+        client = hdfs._hdfs._WebHdfsClient(server.url(), 'user')
+        scanner = hdfs._hdfs._WebHdfsDirectoryScan(client, '/data', stable_scans=2, ignore_suffixes=['._COPYING_'])
+        self.files['/data/f5.txt._COPYING_'] = {'length': 1, 'modificationTime': 1}
+        self.assertEqual([], scanner.scan())
+        # f4.txt is still written
+        self.files['/data/f4.txt']['length'] = 800
+        self.assertEqual(['/data/f0.txt', '/data/f1.txt', '/data/f2.txt', '/data/f3.txt'], [f['fileName'] for f in scanner.scan()])
+        self.assertEqual(['/data/f4.txt'], [f['fileName'] for f in scanner.scan()])
+        self.assertEqual([], scanner.scan())
+
+        scanner = hdfs._hdfs._WebHdfsDirectoryScan(client, '/data', success_marker='_SUCCESS')
+        self.assertEqual([], scanner.scan())
+        self.files['/data/_SUCCESS'] = {'length': 0, 'modificationTime': 5000}
+        self.assertEqual(6, len(scanner.scan()))
+
+        topo = Topology()
+        self.assertRaises(ValueError, topo.source, hdfs.HdfsDirectoryScan(credentials=WEBHDFS_CREDENTIALS, directory='/data', stableScans=0))
+
+    def test_glob_and_directories(self):
+        files = {
+            '/data/a/2025-12/events-1.json': {'length': 1, 'modificationTime': 1},
+            '/data/a/2026-01/events-1.json': {'length': 1, 'modificationTime': 1},
+            '/data/a/2026-01/other.json': {'length': 1, 'modificationTime': 1},
+            '/data/b/2026-02/events-2.json': {'length': 1, 'modificationTime': 1},
+            '/data/b/2026-02/sub/events-3.json': {'length': 1, 'modificationTime': 1},
+            '/archive/events/e.json': {'length': 1, 'modificationTime': 1},
+        }
+        server = WebHdfsStandIn(files)
+        self.addCleanup(server.shutdown)
+        client = hdfs._hdfs._WebHdfsClient(server.url(), 'user')
+        scanner = hdfs._hdfs._WebHdfsDirectoryScan(client, ['/data/*/2026-*/events-*.json', '/archive/events', '/data/{a,b}/2026-0[12]/'])
+        self.assertEqual(['/data/a/2026-01/events-1.json', '/data/b/2026-02/events-2.json', '/archive/events/e.json', '/data/a/2026-01/other.json'], [f['fileName'] for f in scanner.scan()])
+        # each directory is listed once, the directories of 2025 are not listed
+        listed = [r[1] for r in server.requests]
+        self.assertEqual(['/data', '/data/a', '/data/b', '/data/a/2026-01', '/data/b/2026-02', '/archive/events'], listed)
+        self.assertEqual('(?:a|b)', hdfs._hdfs._glob_regex('{a,b}'))
+
+        topo = Topology()
+        topo.source(hdfs.HdfsDirectoryScan(credentials=WEBHDFS_CREDENTIALS, directory=['/data', '/archive']))
+        self.assertEqual(['/data', '/archive'], topo.graph.operators[0].function._callable.directories)
+        # a single directory of a list is scanned by the toolkit operator
+        scanned = topo.source(hdfs.HdfsDirectoryScan(credentials=WEBHDFS_CREDENTIALS, directory=['/data']))
+        self.assertEqual('com.ibm.streamsx.hdfs::HDFS2DirectoryScan', scanned._op().kind)
+        self.assertEqual('/data', scanned._op().params['directory'])
+
+    def test_sharded_scan(self):
+        files = {'/data/d' + str(d) + '/f' + str(i) + '.txt': {'length': 1, 'modificationTime': 1} for d in range(4) for i in range(25)}
+        server = WebHdfsStandIn(files)
+        self.addCleanup(server.shutdown)
+        client = hdfs._hdfs._WebHdfsClient(server.url(), 'user')
+        for shard_by in ['fileName', 'directory']:
+            found = []
+            for channel in range(3):
+                scanner = hdfs._hdfs._WebHdfsDirectoryScan(client, '/data/*/', shard=(channel, 3), shard_by=shard_by)
+                found.append([f['fileName'] for f in scanner.scan()])
+            self.assertEqual(sorted(files), sorted(sum(found, [])))
+            self.assertTrue(all(len(names) < len(files) for names in found))
+        # with directory shards each channel lists only its directories
+        server.requests = []
+        hdfs._hdfs._WebHdfsDirectoryScan(client, '/data/*/', shard=(0, 3), shard_by='directory').scan()
+        self.assertLess(len(server.requests), 5)
+
+        topo = Topology()
+        scanned = topo.source(hdfs.HdfsDirectoryScan(credentials=WEBHDFS_CREDENTIALS, directory='/data', scanChannels=3, shardBy='directory'))
+        self.assertEqual('spl.utility::Union', scanned._op().kind)
+        scanners = [o.function._callable for o in topo.graph.operators if hasattr(o.function, '_callable')]
+        self.assertEqual([(0, 3), (1, 3), (2, 3)], [scanner.shard for scanner in scanners])
+        self.assertRaises(ValueError, topo.source, hdfs.HdfsDirectoryScan(credentials=WEBHDFS_CREDENTIALS, directory='/data', shardBy='owner'))
+
+    def test_change_detection(self):
+        server = WebHdfsStandIn(self.files)
+        self.addCleanup(server.shutdown)
+        scanner = hdfs._hdfs._WebHdfsDirectoryScan(hdfs._hdfs._WebHdfsClient(server.url(), 'user'), '/data', change_poll_time=0.01)
+        self.assertEqual(5, len(scanner.scan()))
+        self.assertFalse(scanner._wait(0.05))
+        # a new file updates the modification time of the directory
+        self.files['/data/f5.txt'] = {'length': 1, 'modificationTime': 3000}
+        server.directory_times['/data'] = 3000
+        start = time.monotonic()
+        self.assertTrue(scanner._wait(30))
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(['/data/f5.txt'], [f['fileName'] for f in scanner.scan()])
+        self.assertEqual(['GETFILESTATUS', 'LISTSTATUS_BATCH'], [r[0] for r in server.requests[-2:]])
+
+        topo = Topology()
+        topo.source(hdfs.HdfsDirectoryScan(credentials=WEBHDFS_CREDENTIALS, directory='/data', changePollTime=0.5))
+        self.assertEqual(0.5, topo.graph.operators[0].function._callable.change_poll_time)
+
+
+class TestDurability(unittest.TestCase):
+    """ Test the WEBHDFS writers with group commit, append mode and commit on punctuation with a local stand-in for the REST API, does not require any Streams instance or HDFS cluster """
+
+    def test_group_commit(self):
+        server = WebHdfsStandIn({})
+        self.addCleanup(server.shutdown)
+        writer = hdfs._hdfs._WebHdfsFileWriter(hdfs._hdfs._WebHdfsClient(server.url(), 'user'), '/out/data%FILENUM.txt', 0.2, tuples_per_file=250)
+        writer.__enter__()
+        for i in range(100):
+            writer('line' + str(i))
+        # nothing is written before the commit interval
+        self.assertEqual({}, server.contents)
+        time.sleep(0.5)
+        self.assertEqual(''.join('line' + str(i) + '\n' for i in range(100)).encode('utf-8'), server.contents['/out/data0.txt'])
+        for i in range(100, 300):
+            writer({'line': 'line' + str(i)})
+        writer.__exit__(None, None, None)
+        self.assertEqual(''.join('line' + str(i) + '\n' for i in range(250)).encode('utf-8'), server.contents['/out/data0.txt'])
+        self.assertEqual(''.join('line' + str(i) + '\n' for i in range(250, 300)).encode('utf-8'), server.contents['/out/data1.txt'])
+        # one CREATE for the first commit and a few APPEND requests for many tuples
+        ops = [r[0] for r in server.requests]
+        self.assertEqual(2, ops.count('CREATE'))
+        self.assertLessEqual(ops.count('APPEND'), 3)
+
+    def test_failed_commit_is_retried(self):
+        writer = hdfs._hdfs._WebHdfsFileWriter(hdfs._hdfs._WebHdfsClient('http://127.0.0.1:1/webhdfs/v1', 'user', timeout=1), '/out/data.txt', 60)
+        writer.__enter__()
+        writer(b'abc')
+        self.assertEqual([['/out/data.txt', [b'abc']]], writer._commit(writer._segments))
+        server = WebHdfsStandIn({})
+        self.addCleanup(server.shutdown)
+        writer.client.url = server.url()
+        writer.__exit__(None, None, None)
+        self.assertEqual(b'abc', server.contents['/out/data.txt'])
+
+    def test_composite_durability(self):
+        topo = Topology()
+        s = topo.source(['Hello', 'World!']).as_string()
+        s.for_each(hdfs.HdfsFileSink(credentials=WEBHDFS_CREDENTIALS, file='/out/data%FILENUM.txt', durability='hflush', durabilityInterval=50, tuplesPerFile=1000, replication=2))
+        writer = topo.graph.operators[-1].function
+        self.assertIsInstance(writer, hdfs._hdfs._WebHdfsFileWriter)
+        self.assertEqual(0.05, writer.commit_interval)
+        self.assertEqual(1000, writer.tuples_per_file)
+        self.assertEqual(2, writer.replication)
+        self.assertEqual('https://gateway.example.com:8443/gateway/default/webhdfs/v1', writer.client.url)
+        self.assertRaises(ValueError, s.for_each, hdfs.HdfsFileSink(credentials=WEBHDFS_CREDENTIALS, file='/out/data.txt', durability='fsync'))
+        self.assertRaises(ValueError, s.for_each, hdfs.HdfsFileSink(credentials=WEBHDFS_CREDENTIALS, file='/out/data.txt', durability='hsync', tempFile='/out/data.tmp'))
+        self.assertRaises(ValueError, s.for_each, hdfs.HdfsFileSink(credentials=WEBHDFS_CREDENTIALS, file='/out/data%TIME.txt', durability='hflush', timeFormat='yyyyMMdd'))
+        # the parameters of the toolkit operator are not ignored by the Python sink
+        for option in ({'closeOnPunct': True}, {'keyStorePath': '/etc/trust.jks'}, {'authKeytab': 'hdfs.keytab'}, {'appConfigName': 'hdfs'}, {'vmArg': '-Xmx1g'}, {'maxConnectionsPerHost': 10}):
+            self.assertRaises(ValueError, s.for_each, hdfs.HdfsFileSink(credentials=WEBHDFS_CREDENTIALS, file='/out/data.txt', durability='hflush', **option))
+            self.assertRaises(ValueError, s.for_each, hdfs.HdfsFileSink(credentials=WEBHDFS_CREDENTIALS, file='/out/data%FILENUM.txt', append=True, **option))
+        # hsync commits like hflush
+        with self.assertLogs('streamsx.hdfs', level='WARNING'):
+            s.for_each(hdfs.HdfsFileSink(credentials=WEBHDFS_CREDENTIALS, file='/out/data.txt', durability='hsync'))
+        self.assertIsInstance(topo.graph.operators[-1].function, hdfs._hdfs._WebHdfsFileWriter)
+
+
+    def test_bounded_buffer(self):
+        server = WebHdfsStandIn({})
+        self.addCleanup(server.shutdown)
+        server.delay = 0.5
+        writer = hdfs._hdfs._WebHdfsFileWriter(hdfs._hdfs._WebHdfsClient(server.url(), 'user'), '/out/data.txt', 60, max_buffered=3)
+        writer.__enter__()
+        start = time.time()
+        for i in range(3):
+            writer('line' + str(i))
+        # the tuple thread does not wait for the request
+        self.assertLess(time.time() - start, 0.25)
+        # the full buffer is committed at once, the next tuple waits for the commit
+        writer('line3')
+        self.assertGreaterEqual(time.time() - start, 0.4)
+        server.delay = 0
+        writer.__exit__(None, None, None)
+        self.assertEqual(b'line0\nline1\nline2\nline3\n', server.contents['/out/data.txt'])
+
+    def test_append_continues_last_file(self):
+        files = {'/out/data' + str(i) + '.txt': {'length': 10, 'modificationTime': 1000 + i} for i in range(12)}
+        files['/out/other.txt'] = {'length': 10, 'modificationTime': 1}
+        server = WebHdfsStandIn(files)
+        self.addCleanup(server.shutdown)
+        server.contents['/out/data11.txt'] = b'123456789\n'
+        writer = hdfs._hdfs._WebHdfsFileWriter(hdfs._hdfs._WebHdfsClient(server.url(), 'user'), '/out/data%FILENUM.txt', 60, bytes_per_file=25, append=True)
+        writer.__enter__()
+        writer('abcd')
+        writer('efghijklm')
+        writer('next')
+        writer.__exit__(None, None, None)
+        self.assertEqual(b'123456789\nabcd\nefghijklm\n', server.contents['/out/data11.txt'])
+        self.assertEqual(b'next\n', server.contents['/out/data12.txt'])
+        self.assertEqual(['LISTSTATUS_BATCH', 'APPEND', 'CREATE'], [r[0] for r in server.requests])
+
+    def test_append_does_not_overwrite(self):
+        server = WebHdfsStandIn({'/out/data0.txt': {'length': 100, 'modificationTime': 1000}})
+        self.addCleanup(server.shutdown)
+        writer = hdfs._hdfs._WebHdfsFileWriter(hdfs._hdfs._WebHdfsClient(server.url(), 'user'), '/out/data%FILENUM.txt', 60, bytes_per_file=100, append=True)
+        writer.__enter__()
+        # another writer creates the next file after the start of this writer
+        server.files['/out/data1.txt'] = {'length': 1, 'modificationTime': 1000}
+        writer('abcd')
+        writer.__exit__(None, None, None)
+        self.assertNotIn('/out/data1.txt', server.contents)
+        self.assertEqual(b'abcd\n', server.contents['/out/data2.txt'])
+
+    def test_composite_append(self):
+        topo = Topology()
+        s = topo.source(['Hello', 'World!']).as_string()
+        s.for_each(hdfs.HdfsFileSink(credentials=WEBHDFS_CREDENTIALS, file='/out/data%FILENUM.txt', append=True))
+        writer = topo.graph.operators[-1].function
+        self.assertTrue(writer.append)
+        self.assertEqual(1.0, writer.commit_interval)
+        self.assertRaises(ValueError, s.for_each, hdfs.HdfsFileSink(credentials=WEBHDFS_CREDENTIALS, file='/out/data%FILENUM.txt', append=True, alignToBlock=1))
+
+    def test_commit_on_punct(self):
+        server = WebHdfsStandIn({})
+        self.addCleanup(server.shutdown)
+        writer = hdfs._hdfs._PunctCommitWriter(hdfs._hdfs._WebHdfsClient(server.url(), 'user'), '/out/data%FILENUM.txt', tuples_per_file=4)
+        self.assertEqual({'fileName': '/out/data0.txt', 'fileSize': 4}, writer(['a', 'b']))
+        self.assertIsNone(writer([]))
+        self.assertEqual({'fileName': '/out/data0.txt', 'fileSize': 12}, writer([{'line': 'cc'}, {'line': 'dd'}, {'line': 'e'}]))
+        # the file has reached the limit, the next window is written to a new file
+        self.assertEqual({'fileName': '/out/data1.txt', 'fileSize': 2}, writer(['f']))
+        self.assertEqual(b'a\nb\ncc\ndd\ne\n', server.contents['/out/data0.txt'])
+        manifest = [json.loads(line) for line in server.contents['/out/data0.txt.manifest'].decode('utf-8').splitlines()]
+        self.assertEqual([{'window': 0, 'offset': 0, 'length': 4, 'tuples': 2}, {'window': 1, 'offset': 4, 'length': 8, 'tuples': 3}], manifest)
+        self.assertEqual(['CREATE', 'CREATE', 'APPEND', 'APPEND', 'CREATE', 'CREATE'], [r[0] for r in server.requests])
+
+    def test_file_statistics(self):
+        server = WebHdfsStandIn({})
+        self.addCleanup(server.shutdown)
+        writer = hdfs._hdfs._PunctCommitWriter(hdfs._hdfs._WebHdfsClient(server.url(), 'user'), '/out/data%FILENUM.txt', statistics=True)
+        writer([(1000.0, 'a'), (1000.5, 'b')])
+        info = writer([(1001.0, 'cc'), (1002.25, 'dd')])
+        self.assertEqual('/out/data0.txt', info['fileName'])
+        self.assertEqual(10, info['fileSize'])
+        self.assertEqual(4, info['tupleCount'])
+        self.assertEqual(1000000, info['firstTupleTime'])
+        self.assertEqual(1002250, info['lastTupleTime'])
+        self.assertGreater(info['writeDuration'], 0)
+        self.assertAlmostEqual(10 / info['writeDuration'], info['bytesPerSecond'])
+        self.assertEqual(zlib.crc32(server.contents['/out/data0.txt']), info['checksum'])
+        self.assertEqual(8, len(info))
+
+        topo = Topology()
+        s = topo.source(['Hello', 'World!']).as_string()
+        result = hdfs.write(s, credentials=WEBHDFS_CREDENTIALS, file='/out/data%FILENUM.txt', commitOnPunct=True, schema=hdfs.FileStatisticsSchema)
+        self.assertEqual(hdfs.FileStatisticsSchema, result.oport.schema)
+        self.assertIn(hdfs._hdfs._arrival_time, [o.function for o in topo.graph.operators])
+        self.assertRaises(ValueError, hdfs.write, s, credentials=WEBHDFS_CREDENTIALS, file='/out/data.txt', schema=hdfs.FileStatisticsSchema)
+        # other schemas are ignored like before
+        result = hdfs.write(s, credentials=WEBHDFS_CREDENTIALS, file='/out/data.txt', schema=CommonSchema.String)
+        self.assertEqual(hdfs._hdfs.FileInfoSchema, result.oport.schema)
+        result = hdfs.write(s, credentials=WEBHDFS_CREDENTIALS, file='/out/data%FILENUM.txt', commitOnPunct=True, schema=CommonSchema.String)
+        self.assertEqual(hdfs._hdfs.FileInfoSchema, result.oport.schema)
+
+    def test_write_commit_on_punct(self):
+        topo = Topology()
+        s = topo.source(['Hello', 'World!']).as_string()
+        result = hdfs.write(s, credentials=WEBHDFS_CREDENTIALS, file='/out/data%FILENUM.txt', commitOnPunct=True, bytesPerFile=128*1024*1024)
+        self.assertEqual(hdfs._hdfs.FileInfoSchema, result.oport.schema)
+        writer = [o.function for o in topo.graph.operators if isinstance(o.function, hdfs._hdfs._PunctCommitWriter)][0]
+        self.assertEqual(128*1024*1024, writer.bytes_per_file)
+        self.assertNotIn('com.ibm.streamsx.hdfs::HDFS2FileSink', [o.kind for o in topo.graph.operators])
+        self.assertRaises(ValueError, hdfs.write, s, credentials=WEBHDFS_CREDENTIALS, file='/out/data.txt', commitOnPunct=True, minBytesPerFile=1024)
+
+    def test_sink_write_buffer(self):
+        topo = Topology()
+        s = topo.source(['Hello', 'World!']).as_string()
+        s.for_each(hdfs.HdfsFileSink(credentials=WEBHDFS_CREDENTIALS, file='/out/data%FILENUM.txt', writeBufferSize=1000, tuplesPerFile=100))
+        sink = topo.graph.operators[-1]
+        self.assertEqual('com.ibm.streamsx.hdfs::HDFS2FileSink', sink.kind)
+        split = [o for o in topo.graph.operators if o.kind == 'spl.utility::ThreadedSplit'][0]
+        self.assertEqual(1000, split.params['bufferSize'].spl_json()['value'])
+        self.assertIn(split.outputPorts[0], sink.inputPorts[0].outputPorts)
+        s.for_each(hdfs.HdfsFileSink(credentials=WEBHDFS_CREDENTIALS, file='/out/data%FILENUM.txt', durability='hflush', writeBufferSize=1000))
+        self.assertEqual(1000, topo.graph.operators[-1].function.max_buffered)
+
+
+class TestCompaction(unittest.TestCase):
+    """ Test the compaction of small files with a local stand-in for the WEBHDFS REST API, does not require any Streams instance or HDFS cluster """
+
+    def setUp(self):
+        self.server = WebHdfsStandIn({})
+        self.addCleanup(self.server.shutdown)
+        self.client = hdfs._hdfs._WebHdfsClient(self.server.url(), 'user')
+        for directory in ('/a', '/b'):
+            for i in range(4):
+                self.client.create(directory + '/part' + str(i) + '.txt', (directory + str(i) + '\n').encode('utf-8') * 10)
+        self.server.requests.clear()
+
+    def test_native_concat(self):
+        compactor = hdfs._hdfs._Compactor(self.client, 150)
+        self.assertIsNone(compactor({'fileName': '/a/part0.txt', 'fileSize': 40}))
+        self.assertIsNone(compactor({'fileName': '/b/part0.txt', 'fileSize': 40}))
+        self.assertIsNone(compactor({'fileName': '/a/part1.txt', 'fileSize': 40}))
+        self.assertIsNone(compactor({'fileName': '/a/part2.txt', 'fileSize': 40}))
+        self.assertEqual({'fileName': '/a/part0.txt', 'fileSize': 160}, compactor('/a/part3.txt'))
+        self.assertEqual(b''.join(('/a' + str(i) + '\n').encode('utf-8') * 10 for i in range(4)), self.server.contents['/a/part0.txt'])
+        self.assertEqual(['/a/part0.txt', '/b/part0.txt', '/b/part1.txt', '/b/part2.txt', '/b/part3.txt'], sorted(self.server.files))
+        self.assertIn('CONCAT', [r[0] for r in self.server.requests])
+        # large files are not compacted
+        self.assertIsNone(compactor({'fileName': '/a/part0.txt', 'fileSize': 160}))
+
+    def test_copy_when_concat_is_rejected(self):
+        self.server.concat = False
+        compactor = hdfs._hdfs._Compactor(self.client, 60)
+        self.assertIsNone(compactor({'fileName': '/b/part0.txt', 'fileSize': 40}))
+        self.assertEqual({'fileName': '/b/part0.txt', 'fileSize': 80}, compactor({'fileName': '/b/part1.txt', 'fileSize': 40}))
+        self.assertEqual(b'/b0\n' * 10 + b'/b1\n' * 10, self.server.contents['/b/part0.txt'])
+        self.assertEqual(['/b/part0.txt', '/b/part2.txt', '/b/part3.txt'], sorted(f for f in self.server.files if f.startswith('/b/')))
+        self.assertEqual(['CONCAT', 'RENAME', 'RENAME', 'DELETE', 'DELETE'], [r[0] for r in self.server.requests if r[0] in ('CONCAT', 'RENAME', 'DELETE')])
+
+    def test_copy_in_chunks(self):
+        self.server.concat = False
+        compactor = hdfs._hdfs._Compactor(self.client, 60, chunk_size=16)
+        self.assertIsNone(compactor({'fileName': '/b/part0.txt', 'fileSize': 40}))
+        self.assertEqual({'fileName': '/b/part0.txt', 'fileSize': 80}, compactor({'fileName': '/b/part1.txt', 'fileSize': 40}))
+        self.assertEqual(b'/b0\n' * 10 + b'/b1\n' * 10, self.server.contents['/b/part0.txt'])
+        self.assertEqual([('/b/part0.txt', 0, 16), ('/b/part0.txt', 16, 16), ('/b/part0.txt', 32, 16), ('/b/part1.txt', 0, 16), ('/b/part1.txt', 16, 16), ('/b/part1.txt', 32, 16)], self.server.reads)
+
+    def test_recover_interrupted_copy(self):
+        # interrupted between the renames: the first file is only present as .replaced
+        self.client.rename('/b/part0.txt', '/b/.part0.txt.replaced')
+        self.client.create('/b/.part0.txt.compacting', b'/b0\n' * 10)
+        # interrupted while deleting: the merged file is in place
+        self.client.create('/b/.part1.txt.replaced', b'/b1\n' * 10)
+        compactor = hdfs._hdfs._Compactor(self.client, 1000)
+        self.assertIsNone(compactor({'fileName': '/b/part2.txt', 'fileSize': 40}))
+        self.assertEqual(['/b/part0.txt', '/b/part1.txt', '/b/part2.txt', '/b/part3.txt'], sorted(f for f in self.server.files if f.startswith('/b/')))
+        self.assertEqual(b'/b0\n' * 10, self.server.contents['/b/part0.txt'])
+        # the directory is recovered once
+        listings = len([r for r in self.server.requests if r[0].startswith('LISTSTATUS')])
+        self.assertIsNone(compactor({'fileName': '/b/part3.txt', 'fileSize': 40}))
+        self.assertEqual(listings, len([r for r in self.server.requests if r[0].startswith('LISTSTATUS')]))
+
+    def test_relative_and_hidden_files(self):
+        for i in range(2):
+            self.client.create('c/part' + str(i) + '.txt', b'c' * 40)
+        compactor = hdfs._hdfs._Compactor(self.client, 60)
+        # hidden files are not compacted
+        self.assertIsNone(compactor({'fileName': '/b/.part0.txt.compacting', 'fileSize': 1}))
+        self.assertIsNone(compactor({'fileName': '/b/_SUCCESS', 'fileSize': 0}))
+        self.assertEqual({}, compactor._groups)
+        # relative names are resolved against the home directory
+        self.assertIsNone(compactor({'fileName': 'c/part0.txt', 'fileSize': 40}))
+        self.assertEqual({'fileName': '/user/user/c/part0.txt', 'fileSize': 80}, compactor({'fileName': 'c/part1.txt', 'fileSize': 40}))
+
+    def test_failed_merge_keeps_group(self):
+        self.server.concat = False
+        compactor = hdfs._hdfs._Compactor(self.client, 100)
+        self.assertIsNone(compactor({'fileName': '/a/part0.txt', 'fileSize': 40}))
+        self.assertIsNone(compactor({'fileName': '/a/gone.txt', 'fileSize': 40}))
+        with self.assertLogs('streamsx.hdfs', level='ERROR'):
+            self.assertIsNone(compactor({'fileName': '/a/part1.txt', 'fileSize': 40}))
+        # the missing file is removed from the group, the other files are merged with the next file
+        self.assertEqual(['/a/part0.txt', '/a/part1.txt'], sorted(compactor._groups['/a'][1]))
+        self.assertEqual({'fileName': '/a/part0.txt', 'fileSize': 120}, compactor({'fileName': '/a/part2.txt', 'fileSize': 40}))
+        self.assertEqual(['/a/part0.txt', '/a/part3.txt'], sorted(f for f in self.server.files if f.startswith('/a/')))
+
+    def test_max_group_age(self):
+        compactor = hdfs._hdfs._Compactor(self.client, 1000, max_group_age=0.2)
+        self.assertIsNone(compactor({'fileName': '/a/part0.txt', 'fileSize': 40}))
+        self.assertIsNone(compactor({'fileName': '/a/part1.txt', 'fileSize': 40}))
+        time.sleep(0.3)
+        self.assertEqual({'fileName': '/a/part0.txt', 'fileSize': 120}, compactor({'fileName': '/a/part2.txt', 'fileSize': 40}))
+
+    def test_composite(self):
+        topo = Topology()
+        scanned = topo.source(hdfs.HdfsDirectoryScan(credentials=WEBHDFS_CREDENTIALS, directory='/a', maxSleepTime=60))
+        merged = scanned.map(hdfs.HdfsCompactor(credentials=WEBHDFS_CREDENTIALS, targetSize=64*1024*1024, nativeConcat=False))
+        self.assertEqual(hdfs._hdfs.FileInfoSchema, merged.oport.schema)
+        compactor = topo.graph.operators[-1].function
+        self.assertEqual(64*1024*1024, compactor.target_size)
+        self.assertFalse(compactor.native_concat)
+        self.assertRaises(ValueError, scanned.map, hdfs.HdfsCompactor(credentials=WEBHDFS_CREDENTIALS, targetSize=0))
+
+
+class TestDeduplication(unittest.TestCase):
+    """ Test the deduplication filter in front of the sink, does not require any Streams instance or HDFS cluster """
+
+    def test_duplicates_are_dropped(self):
+        dedup = hdfs._hdfs._DedupFilter(60, 64 * 1024, 0.001, attribute='id')
+        self.assertEqual([True, True, False, True, False], [dedup({'id': key, 'value': 'v'}) for key in ['a', 'b', 'a', 'c', 'b']])
+
+    def test_error_rate(self):
+        dedup = hdfs._hdfs._DedupFilter(60, 64 * 1024, 0.01)
+        # each generation is sized for half of the error rate
+        self.assertEqual(8, dedup.hashes)
+        keys = dedup.capacity
+        # at half of the capacity the filter is sparse, new keys are rarely dropped
+        dropped = len([i for i in range(keys // 2) if not dedup('key' + str(i))])
+        self.assertLess(dropped, keys // 2 // 1000)
+        false_positives = len([i for i in range(keys, keys + 10000) if not dedup('other' + str(i))])
+        self.assertLess(false_positives, 100)
+        # the keys are looked up in both generations, the rate is kept when both are full
+        dedup = hdfs._hdfs._DedupFilter(3600, 64 * 1024, 0.01)
+        for i in range(keys):
+            dedup('a' + str(i))
+        dedup._rotate(time.time())
+        for i in range(keys):
+            dedup('b' + str(i))
+        false_positives = len([i for i in range(20000) if not dedup('other' + str(i))])
+        self.assertLess(false_positives, 200)
+
+    def test_window(self):
+        dedup = hdfs._hdfs._DedupFilter(0.2, 1024, 0.001)
+        self.assertTrue(dedup('a'))
+        time.sleep(0.25)
+        # the key is recognized in the previous generation
+        self.assertFalse(dedup('a'))
+        time.sleep(0.25)
+        self.assertTrue(dedup('b'))
+        self.assertTrue(dedup('a'))
+
+    def test_capacity(self):
+        dedup = hdfs._hdfs._DedupFilter(60, 1024, 0.01)
+        for i in range(dedup.capacity * 3):
+            dedup('key' + str(i))
+        # two generations are rotated, the first keys are forgotten
+        self.assertTrue(dedup('key0'))
+
+    def test_sink_dedup(self):
+        topo = Topology()
+        s = topo.source([{'id': 'a', 'line': 'Hello'}]).map(schema=StreamSchema('tuple<rstring id, rstring line>'))
+        s.for_each(hdfs.HdfsFileSink(credentials=WEBHDFS_CREDENTIALS, file='/out/data%FILENUM.txt', dedupWindow=3600, dedupAttribute='id', dedupMemory=1024*1024))
+        dedup = [o.function for o in topo.graph.operators if isinstance(o.function, hdfs._hdfs._DedupFilter)][0]
+        self.assertEqual('id', dedup.attribute)
+        self.assertEqual(3600, dedup.window)
+        self.assertEqual(4 * 1024 * 1024, dedup.bits)
+        self.assertRaises(ValueError, s.for_each, hdfs.HdfsFileSink(credentials=WEBHDFS_CREDENTIALS, file='/out/data.txt', dedupWindow=60, dedupErrorRate=1.5))
+
+
+def sort_windows(policy, buffer, sorter, tuples, window, final=False):
+    # runs the tuples through the operators of the sorted files, the window keeps the tuples after the last punctuation
+    records = []
+    for tuple_ in tuples:
+        marked = policy(tuple_)
+        window.append(marked)
+        if hdfs._hdfs._is_sort_buffer_end(marked):
+            records.extend(sorter(buffer(window)) or [])
+            del window[:]
+    if final:
+        # the final punctuation aggregates the pending window
+        records.extend(sorter(buffer(window)) or [])
+        del window[:]
+    return records
+
+class TestSortedRuns(unittest.TestCase):
+    """ Test the sorted files of the sink, does not require any Streams instance or HDFS cluster """
+
+    def test_sorted_run(self):
+        policy = hdfs._hdfs._SortedRunPolicy(12)
+        self.assertEqual([0, 0, hdfs._hdfs._SORT_RUN_COMPLETE, 0], [policy(line)[1] for line in ['pear', 'fig', 'apple', 'kiwi']])
+        policy = hdfs._hdfs._SortedRunPolicy(12)
+        sorter = hdfs._hdfs._SortedRunWriter('/out/run%FILENUM_%MINKEY_%MAXKEY.txt')
+        records = sort_windows(policy, hdfs._hdfs._SortedBuffer(), sorter, ['pear', 'fig', 'apple', 'kiwi'], [])
+        self.assertEqual([b'apple\n', b'fig\n', b'pear\n'], [r['record'] for r in records])
+        self.assertEqual({'/out/run0_apple_pear.txt'}, set(r['runName'] for r in records))
+
+    def test_spilled_runs(self):
+        spill_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spill_directory)
+        policy = hdfs._hdfs._SortedRunPolicy(20, file_size=60, attribute='key')
+        buffer = hdfs._hdfs._SortedBuffer(attribute='key')
+        sorter = hdfs._hdfs._SortedRunWriter('/out/run%FILENUM_%MINKEY_%MAXKEY.txt', spill_directory=spill_directory)
+        keys = [17, 3, 42, 8, 23, 15, 4, 16, 99, 1, 50, 7]
+        tuples = [{'key': key, 'line': 'line' + str(key).zfill(2)} for key in keys]
+        window = []
+        records = sort_windows(policy, buffer, sorter, tuples[:8], window)
+        self.assertEqual([], records)
+        self.assertEqual(2, len(os.listdir(spill_directory)))
+        records = sort_windows(policy, buffer, sorter, tuples[8:], window)
+        self.assertEqual(['line' + str(key).zfill(2) + '\n' for key in sorted(keys[:9])], [r['record'].decode('utf-8') for r in records[:9]])
+        self.assertEqual({'/out/run0_3_99.txt'}, set(r['runName'] for r in records))
+        # the spilled runs of the first file are removed after the merge, the full buffer of the next file is spilled
+        self.assertEqual(1, len(os.listdir(spill_directory)))
+        # the window of the final punctuation completes the pending run
+        records = sort_windows(policy, buffer, sorter, [], window, final=True)
+        self.assertEqual(['line01\n', 'line07\n', 'line50\n'], [r['record'].decode('utf-8') for r in records])
+        self.assertEqual({'/out/run1_1_50.txt'}, set(r['runName'] for r in records))
+        self.assertEqual([], os.listdir(spill_directory))
+        self.assertIsNone(sorter(buffer([])))
+
+    def test_final_punctuation(self):
+        policy = hdfs._hdfs._SortedRunPolicy(8, file_size=1000)
+        sorter = hdfs._hdfs._SortedRunWriter('/out/run%FILENUM_%MINKEY_%MAXKEY.txt')
+        records = sort_windows(policy, hdfs._hdfs._SortedBuffer(), sorter, ['melon', 'lime', 'fig'], [], final=True)
+        self.assertEqual([b'fig\n', b'lime\n', b'melon\n'], [r['record'] for r in records])
+        self.assertEqual({'/out/run0_fig_melon.txt'}, set(r['runName'] for r in records))
+
+    def test_time_per_file(self):
+        # the run is completed by the decision of the policy, the writer does not track the time
+        now = [100.0]
+        with unittest.mock.patch.object(hdfs._hdfs.time, 'time', lambda: now[0]):
+            policy = hdfs._hdfs._SortedRunPolicy(10, file_size=1000, time_per_file=1.0)
+            sorter = hdfs._hdfs._SortedRunWriter('/out/run%FILENUM_%MINKEY_%MAXKEY.txt')
+            buffer = hdfs._hdfs._SortedBuffer()
+            records = []
+            window = []
+            for line in ['d', 'c', 'b', 'a']:
+                records.extend(sort_windows(policy, buffer, sorter, [line * 4], window))
+                now[0] += 0.5
+            # the second tuple fills the buffer, the third one completes the run after one second
+            self.assertEqual([b'bbbb\n', b'cccc\n', b'dddd\n'], [r['record'] for r in records])
+            self.assertEqual({'/out/run0_bbbb_dddd.txt'}, set(r['runName'] for r in records))
+            self.assertEqual(['aaaa'], [marked[0] for marked in window])
+
+    def test_exit_removes_spilled_runs(self):
+        spill_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spill_directory)
+        policy = hdfs._hdfs._SortedRunPolicy(4, file_size=100)
+        sorter = hdfs._hdfs._SortedRunWriter('/out/run%FILENUM_%MINKEY_%MAXKEY.txt', spill_directory=spill_directory)
+        with sorter:
+            self.assertEqual([], sort_windows(policy, hdfs._hdfs._SortedBuffer(), sorter, ['pear', 'kiwi'], []))
+            self.assertEqual(2, len(os.listdir(spill_directory)))
+        self.assertEqual([], os.listdir(spill_directory))
+
+    def test_sink_sorted_files(self):
+        topo = Topology()
+        s = topo.source([{'key': 'a', 'line': 'Hello'}]).map(schema=StreamSchema('tuple<rstring key, rstring line>'))
+        s.for_each(hdfs.HdfsFileSink(credentials=WEBHDFS_CREDENTIALS, file='/out/sorted%FILENUM_%MINKEY_%MAXKEY.txt', sortBufferSize=64*1024*1024, sortFileSize=256*1024*1024, sortAttribute='key', timePerFile=600))
+        policy = [o.function for o in topo.graph.operators if isinstance(o.function, hdfs._hdfs._SortedRunPolicy)][0]
+        self.assertEqual(256*1024*1024, policy.file_size)
+        self.assertEqual(600, policy.time_per_file)
+        sink = topo.graph.operators[-1]
+        self.assertEqual('com.ibm.streamsx.hdfs::HDFS2FileSink', sink.kind)
+        self.assertEqual('runName', sink.params['fileAttributeName'])
+        self.assertNotIn('file', sink.params)
+        self.assertNotIn('timePerFile', sink.params)
+        functions = [o.function for o in topo.graph.operators if hasattr(o, 'function')]
+        self.assertEqual(1, len([f for f in functions if isinstance(f, hdfs._hdfs._SortedRunPolicy)]))
+        self.assertEqual('key', [f for f in functions if isinstance(f, hdfs._hdfs._SortedBuffer)][0].attribute)
+        self.assertRaises(ValueError, s.for_each, hdfs.HdfsFileSink(credentials=WEBHDFS_CREDENTIALS, file='/out/sorted%FILENUM.txt', sortBufferSize=1024))
+        self.assertRaises(ValueError, s.for_each, hdfs.HdfsFileSink(credentials=WEBHDFS_CREDENTIALS, file='/out/sorted_%MINKEY_%MAXKEY.txt', sortBufferSize=1024))
+        self.assertRaises(ValueError, s.for_each, hdfs.HdfsFileSink(credentials=WEBHDFS_CREDENTIALS, file='/out/sorted%FILENUM_%MINKEY_%MAXKEY.txt', sortBufferSize=1024, tuplesPerFile=10))
 
 
 class TestCompositeDistributed(unittest.TestCase):